@@ -0,0 +1,208 @@
+"""
+Helpers for batch CV ingestion.
+
+Uploads (plain files or .zip archives) are expanded into a flat list of items,
+processed under a concurrency cap, and streamed back as NDJSON in completion
+order. A failing item only produces its own error line.
+
+Plain files are spooled up front through read_cv_upload (FastAPI closes the
+form files once the endpoint returns, before the stream runs); archives are
+spooled whole and their entries are only decompressed when the item runs, so
+at most `concurrency` entries are held at a time. The file count and total
+size are checked while walking the uploads and zip directories, before any
+entry is read.
+"""
+
+import asyncio
+import io
+import json
+import os
+import zipfile
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+from fastapi import HTTPException, UploadFile
+
+from extraction import SUPPORTED_CV_EXTENSIONS, cv_extension
+from uploads import CVUpload, read_cv_upload, spool_stream
+
+CV_BATCH_CONCURRENCY = int(os.getenv("CV_BATCH_CONCURRENCY", "8"))
+CV_BATCH_MAX_FILES = int(os.getenv("CV_BATCH_MAX_FILES", "500"))
+CV_BATCH_MAX_ENTRY_BYTES = int(os.getenv("CV_BATCH_MAX_ENTRY_BYTES", str(20 * 1024 * 1024)))
+# Whole request: plain files plus the uncompressed size of every zip entry
+CV_BATCH_MAX_TOTAL_BYTES = int(os.getenv("CV_BATCH_MAX_TOTAL_BYTES", str(200 * 1024 * 1024)))
+
+def _batch_too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Batch exceeds the {CV_BATCH_MAX_TOTAL_BYTES // (1024 * 1024)} MB limit")
+
+
+@dataclass
+class BatchItem:
+    index: int
+    filename: str
+    upload: Optional[CVUpload] = None
+    # Zip entry, decompressed by open() when the item runs
+    archive: Optional[zipfile.ZipFile] = None
+    entry: Optional[zipfile.ZipInfo] = None
+    error: Optional[str] = None
+    status_code: int = 400
+    closed: bool = False
+
+    def open(self) -> CVUpload:
+        """The item's file, spooling a zip entry on first use. Blocking."""
+        if self.upload is None:
+            try:
+                with self.archive.open(self.entry) as f:
+                    self.upload = spool_stream(f, self.filename, CV_BATCH_MAX_ENTRY_BYTES)
+            except (zipfile.BadZipFile, EOFError):
+                raise HTTPException(status_code=400, detail="Corrupt zip entry")
+            # The stream was cancelled while this thread was still spooling
+            if self.closed:
+                self.upload.close()
+        return self.upload
+
+    def close(self) -> None:
+        self.closed = True
+        if self.upload is not None:
+            self.upload.close()
+
+
+@dataclass
+class Batch:
+    items: List[BatchItem] = field(default_factory=list)
+    total_bytes: int = 0
+    # Spooled archives, kept open until the last entry has been read
+    archives: List[CVUpload] = field(default_factory=list)
+    zip_files: List[zipfile.ZipFile] = field(default_factory=list)
+
+    def charge(self, size: int) -> None:
+        self.total_bytes += size
+        if self.total_bytes > CV_BATCH_MAX_TOTAL_BYTES:
+            raise _batch_too_large()
+
+    def add(self, filename: str, size: int = 0, **kwargs) -> BatchItem:
+        if len(self.items) >= CV_BATCH_MAX_FILES:
+            raise HTTPException(status_code=413, detail=f"Batch exceeds {CV_BATCH_MAX_FILES} files")
+        self.charge(size)
+        item = BatchItem(len(self.items), filename, **kwargs)
+        self.items.append(item)
+        return item
+
+    def close(self) -> None:
+        for item in self.items:
+            item.close()
+        for zip_file in self.zip_files:
+            zip_file.close()
+        for archive in self.archives:
+            archive.close()
+
+
+def _expand_zip(batch: Batch, archive: CVUpload) -> None:
+    batch.archives.append(archive)
+    try:
+        zip_file = zipfile.ZipFile(archive.path or io.BytesIO(archive.content))
+    except zipfile.BadZipFile:
+        batch.add(archive.filename, error="Invalid zip archive")
+        return
+    batch.zip_files.append(zip_file)
+
+    for info in zip_file.infolist():
+        name = info.filename
+        if info.is_dir() or name.startswith("__MACOSX/") or os.path.basename(name).startswith("."):
+            continue
+        label = f"{archive.filename}/{name}"
+        if cv_extension(name) not in SUPPORTED_CV_EXTENSIONS:
+            batch.add(label, error="Unsupported file format")
+        elif info.file_size > CV_BATCH_MAX_ENTRY_BYTES:
+            batch.add(label, error="File too large", status_code=413)
+        elif info.file_size == 0:
+            batch.add(label, error="File is empty")
+        else:
+            # zipfile stops at the declared size and checks the CRC, so this bounds the real one
+            batch.add(label, info.file_size, archive=zip_file, entry=info)
+
+
+async def _read_batch_uploads(batch: Batch, files: List[UploadFile]) -> None:
+    for upload in files:
+        filename = upload.filename or f"file-{len(batch.items)}"
+        if cv_extension(filename) == ".zip":
+            try:
+                archive = await read_cv_upload(upload, max_bytes=CV_BATCH_MAX_TOTAL_BYTES - batch.total_bytes)
+            except HTTPException:
+                raise _batch_too_large()
+            archive.filename = filename
+            _expand_zip(batch, archive)
+        elif cv_extension(filename) not in SUPPORTED_CV_EXTENSIONS:
+            batch.add(filename, error="Unsupported file format")
+        else:
+            # Count the slot first so an over-count batch is rejected before spooling
+            item = batch.add(filename)
+            try:
+                item.upload = await read_cv_upload(upload, max_bytes=CV_BATCH_MAX_ENTRY_BYTES)
+            except HTTPException as e:
+                item.error, item.status_code = "File too large", e.status_code
+                continue
+            item.upload.filename = filename
+            batch.charge(item.upload.size)
+            if not item.upload.size:
+                item.error = "File is empty"
+
+    if not batch.items:
+        raise HTTPException(status_code=422, detail="No files provided")
+
+
+async def read_batch_uploads(files: List[UploadFile]) -> Batch:
+    """Spool every upload and index zip entries up front, before the streaming response starts; close() releases them."""
+    batch = Batch()
+    try:
+        await _read_batch_uploads(batch, files)
+    except BaseException:
+        batch.close()
+        raise
+    return batch
+
+
+async def stream_batch_results(
+    batch: Batch,
+    worker: Callable[[CVUpload], Awaitable[dict]],
+    concurrency: int,
+) -> AsyncIterator[str]:
+    """Run `worker` over the batch with at most `concurrency` in flight, yielding one NDJSON line per item."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(item: BatchItem) -> dict:
+        line = {"type": "result", "index": item.index, "filename": item.filename}
+        if item.error:
+            return {**line, "success": False, "status_code": item.status_code, "error": item.error}
+        async with semaphore:
+            try:
+                upload = await asyncio.to_thread(item.open)
+                return {**line, "success": True, **(await worker(upload))}
+            except HTTPException as e:
+                return {**line, "success": False, "status_code": e.status_code, "error": e.detail}
+            except Exception as e:
+                return {**line, "success": False, "status_code": 500, "error": str(e)}
+            finally:
+                # Free the spooled copy as soon as the item is done
+                item.close()
+
+    tasks = [asyncio.create_task(run_one(item)) for item in batch.items]
+    succeeded = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            succeeded += bool(result["success"])
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+        yield json.dumps({
+            "type": "summary",
+            "total": len(batch.items),
+            "succeeded": succeeded,
+            "failed": len(batch.items) - succeeded
+        }) + "\n"
+    finally:
+        # Client went away mid-stream: stop the remaining work
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        batch.close()
@@ -0,0 +1,6 @@
+"""
+Load-testing tools: a local OpenRouter stand-in, a sample CV corpus generator
+and a benchmark driver. Run from the backend directory, e.g.
+
+    python -m bench.loadtest --spawn
+"""
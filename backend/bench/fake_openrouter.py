@@ -0,0 +1,282 @@
+"""
+Local stand-in for the OpenRouter /chat/completions API.
+
+Recognises the backend's parse / match / job-description / interview-question
+prompts and answers with canned but well-formed content, after a configurable
+latency. Supports `stream: true` (SSE token deltas), injected errors and
+malformed JSON; output longer than `max_tokens` is cut with finish_reason "length".
+
+    python -m bench.fake_openrouter --port 9999 --latency lognormal:800,0.5 --error-rate 0.02
+    OPENROUTER_BASE_URL=http://127.0.0.1:9999 python main.py
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+from collections import Counter
+from typing import Callable, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# ==================== CONFIG ====================
+
+FAKE_LATENCY = os.getenv("FAKE_LATENCY", "lognormal:800,0.4")
+FAKE_TOKEN_MS = float(os.getenv("FAKE_TOKEN_MS", "5"))
+FAKE_ERROR_RATE = float(os.getenv("FAKE_ERROR_RATE", "0"))
+FAKE_ERROR_STATUS = os.getenv("FAKE_ERROR_STATUS", "429,500,503")
+FAKE_SEED = os.getenv("FAKE_SEED")
+# Comma-separated models that always answer 503 (exercises model fallback)
+FAKE_FAIL_MODELS = os.getenv("FAKE_FAIL_MODELS", "")
+# Fraction of JSON answers broken with a trailing comma (exercises the JSON repair call)
+FAKE_MALFORMED_RATE = float(os.getenv("FAKE_MALFORMED_RATE", "0"))
+
+# Rough chars-per-token ratio used for `usage` and for pacing streamed tokens
+_CHARS_PER_TOKEN = 4
+
+
+def parse_latency(spec: str, rng: random.Random) -> Callable[[], float]:
+    """
+    Latency spec (milliseconds) -> sampler returning seconds:
+      fixed:500 | uniform:200,1500 | normal:800,200 | lognormal:<median>,<sigma>
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v.strip()] if args else []
+    kind = kind.strip().lower()
+
+    if kind == "fixed":
+        return lambda: values[0] / 1000
+    if kind == "uniform":
+        return lambda: rng.uniform(values[0], values[1]) / 1000
+    if kind == "normal":
+        return lambda: max(0.0, rng.gauss(values[0], values[1])) / 1000
+    if kind == "lognormal":
+        mu = math.log(values[0])
+        return lambda: rng.lognormvariate(mu, values[1]) / 1000
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+# ==================== CANNED CONTENT ====================
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_PHONE_RE = re.compile(r"(?:\+?84|0)[\d .-]{8,12}\d")
+_JOB_RE = re.compile(r"^ID: (.+)\nTên vị trí: (.+)$", re.MULTILINE)
+_SKILLS = ["Python", "FastAPI", "Docker", "PostgreSQL", "React", "TypeScript", "AWS", "Git", "Redis", "Kubernetes"]
+
+
+def _score(job_id: str) -> int:
+    return 40 + int(hashlib.md5(job_id.encode()).hexdigest(), 16) % 56
+
+
+def _match_entry(job_id: str, title: str) -> dict:
+    return {
+        "job_id": job_id,
+        "job_title": title,
+        "match_score": _score(job_id),
+        "strengths": ["Có kinh nghiệm Python và FastAPI", "Làm việc nhóm tốt", "Đã triển khai Docker"],
+        "weaknesses": ["Chưa có kinh nghiệm Kubernetes"],
+        "recommendation": "Ứng viên phù hợp ở mức khá với vị trí. " * 6
+    }
+
+
+def cv_section(prompt: str) -> str:
+    """The CV itself, without the instructions around it (full or compact prompt)."""
+    text = prompt.split("CV CONTENT:", 1)[-1]
+    return text.split("COMPREHENSIVE EXTRACTION GUIDELINES", 1)[0].strip("━\n ")
+
+
+def parse_cv_content(text: str) -> str:
+    email = _EMAIL_RE.search(text)
+    phone = _PHONE_RE.search(text)
+    first_line = next((line.strip() for line in text.splitlines() if line.strip()), "Nguyen Van A")
+    return json.dumps({
+        "full_name": first_line[:60],
+        "email": email.group(0) if email else "candidate@example.com",
+        "phone_number": phone.group(0) if phone else None,
+        "address": "Hà Nội",
+        "university": "Đại học Bách Khoa Hà Nội",
+        "education": "Cử nhân Khoa học Máy tính (2016-2020)",
+        "experience": "Backend Developer tại Công ty ABC (2020-2024): phát triển API với Python/FastAPI.",
+        "skills": [s for s in _SKILLS if s.lower() in text.lower()] or _SKILLS[:4],
+        "summary": "Kỹ sư phần mềm với 4 năm kinh nghiệm backend."
+    }, ensure_ascii=False)
+
+
+def match_content(prompt: str, single: bool) -> str:
+    jobs = _JOB_RE.findall(prompt) or [("1", "Unknown")]
+    if single:
+        return json.dumps(_match_entry(*jobs[0]), ensure_ascii=False)
+    matches = sorted((_match_entry(job_id, title) for job_id, title in jobs), key=lambda m: -m["match_score"])
+    return json.dumps({
+        "overall_score": matches[0]["match_score"],
+        "best_match": matches[0],
+        "all_matches": matches
+    }, ensure_ascii=False)
+
+
+def job_description_content() -> str:
+    return "```json\n" + json.dumps({
+        "description": "Chúng tôi đang tìm kiếm một kỹ sư có trách nhiệm thiết kế, phát triển và vận hành hệ thống. " * 8,
+        "requirements": "\n".join(f"• Yêu cầu {i}: thành thạo công nghệ liên quan" for i in range(1, 8)),
+        "benefits": "\n".join(f"• Quyền lợi {i}: chế độ đãi ngộ hấp dẫn" for i in range(1, 6))
+    }, ensure_ascii=False, indent=2) + "\n```"
+
+
+def interview_questions_content() -> str:
+    sections = ["Kiến thức chuyên môn", "Kỹ năng mềm", "Tình huống thực tế", "Định hướng & Động lực"]
+    lines = ["```markdown", "# Câu hỏi phỏng vấn cho vị trí: Backend Developer", ""]
+    n = 1
+    for part, name in enumerate(sections, 1):
+        lines += [f"## Phần {part}: {name}", ""]
+        for _ in range(4):
+            lines.append(f"{n}. Hãy mô tả một dự án mà bạn đã áp dụng kiến thức này để giải quyết vấn đề thực tế?")
+            lines.append("   - Follow-up: Bạn đã đo lường kết quả như thế nào?")
+            n += 1
+        lines.append("")
+    lines.append("```")
+    return "\n".join(lines)
+
+
+def repair_content(prompt: str) -> str:
+    """Answer to the backend's JSON repair prompt: the broken JSON without trailing commas."""
+    broken = prompt.split("Malformed JSON:\n", 1)[-1]
+    return re.sub(r",(\s*[}\]])", r"\1", broken)
+
+
+def break_json(content: str) -> str:
+    """Insert a trailing comma before the last closing brace."""
+    end = content.rfind("}")
+    return content[:end] + "," + content[end:] if end > 0 else content
+
+
+def canned_content(messages: List[dict]) -> tuple:
+    """(kind, content) for the backend prompt in `messages`."""
+    system = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "")
+    user = "\n".join(m.get("content") or "" for m in messages if m.get("role") == "user")
+
+    if "repair malformed JSON" in system:
+        return "json_repair", repair_content(user)
+    if "CV parser" in system:
+        return "parse_cv", parse_cv_content(cv_section(user))
+    if "interview" in system:
+        return "interview_questions", interview_questions_content()
+    if "job description" in user:
+        return "job_description", job_description_content()
+    if "all_matches" in system or "all_matches" in user:
+        return "match", match_content(user, single="CHỈ có MỘT job" in user)
+    return "other", json.dumps({"ok": True})
+
+
+# ==================== APP ====================
+
+def create_app(
+    latency: str = FAKE_LATENCY,
+    token_ms: float = FAKE_TOKEN_MS,
+    error_rate: float = FAKE_ERROR_RATE,
+    error_status: str = FAKE_ERROR_STATUS,
+    seed: Optional[str] = FAKE_SEED,
+    fail_models: str = FAKE_FAIL_MODELS,
+    malformed_rate: float = FAKE_MALFORMED_RATE,
+) -> FastAPI:
+    rng = random.Random(seed)
+    sample_latency = parse_latency(latency, rng)
+    statuses = [int(s) for s in error_status.split(",") if s.strip()]
+    failing = {m.strip() for m in fail_models.split(",") if m.strip()}
+    counts: Counter = Counter()
+
+    app = FastAPI(title="Fake OpenRouter")
+
+    @app.get("/")
+    async def root():
+        return {"status": "ok", "latency": latency, "token_ms": token_ms, "error_rate": error_rate}
+
+    @app.get("/stats")
+    async def stats():
+        return dict(counts)
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        kind, content = canned_content(body.get("messages") or [])
+        counts[kind] += 1
+        if kind in ("parse_cv", "match", "job_description") and rng.random() < malformed_rate:
+            content = break_json(content)
+            counts["malformed"] += 1
+
+        # Like the real API, stop at max_tokens
+        finish_reason = "stop"
+        max_chars = int(body.get("max_tokens") or 0) * _CHARS_PER_TOKEN
+        if max_chars and len(content) > max_chars:
+            content, finish_reason = content[:max_chars], "length"
+            counts["truncated"] += 1
+
+        # Time to first token
+        await asyncio.sleep(sample_latency())
+
+        if body.get("model") in failing or rng.random() < error_rate:
+            status = 503 if body.get("model") in failing else rng.choice(statuses)
+            counts["errors"] += 1
+            return JSONResponse(
+                status_code=status,
+                content={"error": {"message": f"Injected error ({status})", "code": status}}
+            )
+
+        prompt_chars = sum(len(m.get("content") or "") for m in body.get("messages") or [])
+        usage = {
+            "prompt_tokens": prompt_chars // _CHARS_PER_TOKEN,
+            "completion_tokens": len(content) // _CHARS_PER_TOKEN,
+            "total_tokens": (prompt_chars + len(content)) // _CHARS_PER_TOKEN
+        }
+        model = body.get("model", "openai/gpt-4o-mini")
+
+        if body.get("stream"):
+            async def events():
+                yield ": OPENROUTER PROCESSING\n\n"
+                for i in range(0, len(content), _CHARS_PER_TOKEN):
+                    if token_ms:
+                        await asyncio.sleep(token_ms / 1000)
+                    chunk = {"model": model, "choices": [{"index": 0, "delta": {"content": content[i:i + _CHARS_PER_TOKEN]}}]}
+                    yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                final = {"model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}], "usage": usage}
+                yield f"data: {json.dumps(final)}\n\n"
+                yield "data: [DONE]\n\n"
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        # Non-streaming calls still pay for generating every token
+        await asyncio.sleep(token_ms * usage["completion_tokens"] / 1000)
+        return {
+            "id": f"gen-fake-{counts[kind]}",
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": finish_reason}],
+            "usage": usage
+        }
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9999)
+    parser.add_argument("--latency", default=FAKE_LATENCY, help="fixed:MS | uniform:LO,HI | normal:MEAN,SD | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--token-ms", type=float, default=FAKE_TOKEN_MS, help="Delay per generated token")
+    parser.add_argument("--error-rate", type=float, default=FAKE_ERROR_RATE, help="Fraction of requests answered with an error")
+    parser.add_argument("--error-status", default=FAKE_ERROR_STATUS, help="Comma-separated status codes to inject")
+    parser.add_argument("--seed", default=FAKE_SEED)
+    parser.add_argument("--fail-models", default=FAKE_FAIL_MODELS, help="Comma-separated models that always answer 503")
+    parser.add_argument("--malformed-rate", type=float, default=FAKE_MALFORMED_RATE, help="Fraction of JSON answers made invalid")
+    args = parser.parse_args()
+
+    app = create_app(args.latency, args.token_ms, args.error_rate, args.error_status, args.seed, args.fail_models, args.malformed_rate)
+    print(f"🧪 Fake OpenRouter on http://{args.host}:{args.port} (latency {args.latency}, {args.token_ms} ms/token, error rate {args.error_rate})")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,457 @@
+"""
+Benchmark the API endpoints at fixed concurrency levels.
+
+Reports p50 / p95 / p99 latency, requests per second, error count, time to
+first byte (streaming scenarios) and peak server RSS per endpoint, plus the
+peak growth over the RSS before each run divided by the concurrency (memory per
+in-flight request; parse_cv_large uploads one padded --upload-mb PDF).
+
+    # Start the fake OpenRouter + backend as subprocesses and run everything
+    python -m bench.loadtest --spawn --concurrency 1,8,32 --requests 64
+
+    # Against an already running backend (pass its PID to sample memory)
+    python -m bench.loadtest --base-url http://localhost:8000 --server-pid 1234
+
+    # Memory per concurrent upload of a 15 MB PDF
+    python -m bench.loadtest --spawn --scenarios parse_cv_large --concurrency 1,4,8 --upload-mb 15
+
+    # Regression gate: exit 1 if p95 or RPS is >20% worse than a saved run
+    python -m bench.loadtest --spawn --json run.json --baseline baseline.json --tolerance 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from bench.make_corpus import generate_corpus, generate_large_pdf
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CORPUS = os.path.join(BACKEND_DIR, "bench", "corpus")
+SCENARIOS = ("parse_cv", "parse_cv_large", "match_cv_jobs", "job_description", "interview_questions", "job_description_stream", "interview_questions_stream")
+
+
+@dataclass
+class Result:
+    scenario: str
+    concurrency: int
+    requests: int
+    errors: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    rps: float
+    ttfb_p50_ms: Optional[float] = None
+    rss_peak_mb: Optional[float] = None
+    # (peak - idle RSS) / concurrency
+    rss_per_request_mb: Optional[float] = None
+    status_codes: Dict[str, int] = field(default_factory=dict)
+
+
+# ==================== MEASUREMENT ====================
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def _children(pid: int) -> List[int]:
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children += [int(c) for c in f.read().split()]
+    except OSError:
+        pass
+    return children
+
+
+def process_tree_rss_mb(pid: int) -> Optional[float]:
+    """RSS of `pid` plus all descendants (extraction workers), Linux /proc only."""
+    total_kb = 0
+    stack = [pid]
+    seen = set()
+    while stack:
+        current = stack.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            if current == pid:
+                return None
+            continue
+        stack.extend(_children(current))
+    return round(total_kb / 1024, 1)
+
+
+class MemorySampler:
+    def __init__(self, pid: Optional[int], interval: float = 0.1):
+        self.pid = pid
+        self.interval = interval
+        self.peak: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            rss = process_tree_rss_mb(self.pid)
+            if rss is not None:
+                self.peak = max(self.peak or 0.0, rss)
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self):
+        if self.pid:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        if self._task:
+            self._task.cancel()
+
+
+# ==================== SCENARIOS ====================
+
+SAMPLE_JOB_TITLES = ["Backend Developer", "Frontend Developer", "DevOps Engineer", "Data Engineer", "QA Engineer", "Fullstack Developer"]
+
+
+def sample_jobs(count: int, rng: random.Random) -> List[dict]:
+    jobs = []
+    for i in range(count):
+        title = rng.choice(SAMPLE_JOB_TITLES)
+        jobs.append({
+            "id": f"job-{i}",
+            "title": f"{title} #{i}",
+            "level": rng.choice(["Junior", "Mid", "Senior"]),
+            "department": "Engineering",
+            "description": f"Tham gia phát triển hệ thống {title.lower()} cho sản phẩm thương mại điện tử.",
+            "requirements": "Python, FastAPI, Docker, PostgreSQL, Redis, CI/CD",
+            "benefits": "Lương tháng 13, bảo hiểm sức khoẻ, 15 ngày phép",
+            "mandatory_requirements": rng.choice([None, "Tốt nghiệp Đại học", "Tối thiểu 2 năm kinh nghiệm Python"])
+        })
+    return jobs
+
+
+def sample_cv_text(corpus: Sequence[str]) -> str:
+    from extraction import extract_text_sync
+    for path in corpus:
+        if path.endswith(".docx"):
+            with open(path, "rb") as f:
+                return extract_text_sync(os.path.basename(path), f.read(), 5)[0]
+    return "Nguyễn Văn A\nBackend Developer, 4 năm kinh nghiệm Python, FastAPI, Docker."
+
+
+def build_scenarios(corpus: Sequence[str], jobs_per_match: int, use_cache: bool, large_upload: Optional[str] = None) -> Dict[str, Callable[[httpx.AsyncClient, int], Awaitable[Tuple[int, Optional[float]]]]]:
+    """scenario name -> request(client, i) returning (status_code, ttfb_seconds)."""
+    rng = random.Random(7)
+    files = [(os.path.basename(p), open(p, "rb").read()) for p in corpus]
+    cv_text = sample_cv_text(corpus)
+    match_body = {
+        "cv_text": cv_text,
+        "cv_data": {
+            "full_name": "Nguyễn Văn A",
+            "email": "a@example.com",
+            "education": "Cử nhân Công nghệ Thông tin",
+            "experience": "Backend Developer 4 năm",
+            "skills": ["Python", "FastAPI", "Docker"]
+        },
+        "jobs": sample_jobs(jobs_per_match, rng),
+        "primary_job_id": "job-0"
+    }
+    # Skip the result caches (parse_cv / generate) unless --use-cache, so every request does the full work
+    regenerate = not use_cache
+
+    async def parse_cv(client, i):
+        name, content = files[i % len(files)]
+        response = await client.post(
+            "/api/parse-cv",
+            params={"bypass_cache": str(regenerate).lower()},
+            files={"file": (name, content)}
+        )
+        return response.status_code, None
+
+    async def parse_cv_large(client, i):
+        # Streamed from disk so the benchmark itself does not hold N copies
+        with open(large_upload, "rb") as f:
+            response = await client.post(
+                "/api/parse-cv",
+                params={"bypass_cache": str(regenerate).lower()},
+                files={"file": (os.path.basename(large_upload), f)}
+            )
+        return response.status_code, None
+
+    async def match_cv_jobs(client, i):
+        response = await client.post("/api/match-cv-jobs", json=match_body)
+        return response.status_code, None
+
+    def job_description_body(i, stream):
+        return {"title": f"Backend Developer {i % 50}", "level": "Senior", "department": "Engineering",
+                "keywords": "Python, FastAPI", "stream": stream, "regenerate": regenerate}
+
+    def interview_questions_body(i, stream):
+        return {"job_id": f"job-{i % 50}", "job_title": "Backend Developer", "department": "Engineering",
+                "level": "Senior", "requirements": "Python, FastAPI", "stream": stream, "regenerate": regenerate}
+
+    async def job_description(client, i):
+        response = await client.post("/api/generate-job-description", json=job_description_body(i, False))
+        return response.status_code, None
+
+    async def interview_questions(client, i):
+        response = await client.post("/api/generate-interview-questions", json=interview_questions_body(i, False))
+        return response.status_code, None
+
+    async def streamed(client, path, body):
+        start = time.perf_counter()
+        ttfb = None
+        status = 0
+        async with client.stream("POST", path, json=body) as response:
+            status = response.status_code
+            async for line in response.aiter_lines():
+                if ttfb is None and line.startswith("event:"):
+                    ttfb = time.perf_counter() - start
+                if line.startswith("event: error"):
+                    status = 599
+        return status, ttfb
+
+    async def job_description_stream(client, i):
+        return await streamed(client, "/api/generate-job-description", job_description_body(i, True))
+
+    async def interview_questions_stream(client, i):
+        return await streamed(client, "/api/generate-interview-questions", interview_questions_body(i, True))
+
+    return {
+        "parse_cv": parse_cv,
+        "parse_cv_large": parse_cv_large,
+        "match_cv_jobs": match_cv_jobs,
+        "job_description": job_description,
+        "interview_questions": interview_questions,
+        "job_description_stream": job_description_stream,
+        "interview_questions_stream": interview_questions_stream,
+    }
+
+
+async def run_scenario(client: httpx.AsyncClient, name: str, request, concurrency: int, total: int, server_pid: Optional[int]) -> Result:
+    latencies: List[float] = []
+    ttfbs: List[float] = []
+    statuses: Dict[str, int] = {}
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                status, ttfb = await request(client, i)
+            except httpx.HTTPError as e:
+                status, ttfb = type(e).__name__, None
+            latencies.append(time.perf_counter() - start)
+            if ttfb is not None:
+                ttfbs.append(ttfb)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            if status != 200:
+                errors += 1
+
+    idle_rss = None
+    if server_pid:
+        # One untimed request first, so worker start-up is not counted as per-request memory
+        try:
+            await request(client, 0)
+        except httpx.HTTPError:
+            pass
+        idle_rss = process_tree_rss_mb(server_pid)
+    with MemorySampler(server_pid) as sampler:
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ttfbs.sort()
+    return Result(
+        scenario=name,
+        concurrency=concurrency,
+        requests=total,
+        errors=errors,
+        p50_ms=round(percentile(latencies, 50) * 1000, 1),
+        p95_ms=round(percentile(latencies, 95) * 1000, 1),
+        p99_ms=round(percentile(latencies, 99) * 1000, 1),
+        mean_ms=round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+        rps=round(total / elapsed, 2) if elapsed else 0.0,
+        ttfb_p50_ms=round(percentile(ttfbs, 50) * 1000, 1) if ttfbs else None,
+        rss_peak_mb=sampler.peak,
+        rss_per_request_mb=round((sampler.peak - idle_rss) / concurrency, 1) if sampler.peak is not None and idle_rss is not None else None,
+        status_codes=statuses
+    )
+
+
+# ==================== REPORTING ====================
+
+def print_table(results: Sequence[Result]) -> None:
+    header = f"{'scenario':<28}{'conc':>5}{'reqs':>6}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'rps':>8}{'ttfb50':>8}{'rss MB':>8}{'MB/req':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        ttfb = f"{r.ttfb_p50_ms:.0f}" if r.ttfb_p50_ms is not None else "-"
+        rss = f"{r.rss_peak_mb:.0f}" if r.rss_peak_mb is not None else "-"
+        per_request = f"{r.rss_per_request_mb:.1f}" if r.rss_per_request_mb is not None else "-"
+        print(f"{r.scenario:<28}{r.concurrency:>5}{r.requests:>6}{r.errors:>5}{r.p50_ms:>9.0f}{r.p95_ms:>9.0f}{r.p99_ms:>9.0f}{r.rps:>8.1f}{ttfb:>8}{rss:>8}{per_request:>8}")
+
+
+def compare_with_baseline(results: Sequence[Result], baseline_path: str, tolerance: float) -> List[str]:
+    """Regressions (p95 up or RPS down by more than `tolerance`) against a saved --json run."""
+    with open(baseline_path) as f:
+        baseline = {(r["scenario"], r["concurrency"]): r for r in json.load(f)["results"]}
+
+    regressions = []
+    for r in results:
+        base = baseline.get((r.scenario, r.concurrency))
+        if not base:
+            continue
+        if base["p95_ms"] and r.p95_ms > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{r.scenario} @ {r.concurrency}: p95 {base['p95_ms']:.0f} -> {r.p95_ms:.0f} ms")
+        if base["rps"] and r.rps < base["rps"] * (1 - tolerance):
+            regressions.append(f"{r.scenario} @ {r.concurrency}: rps {base['rps']:.1f} -> {r.rps:.1f}")
+        if r.errors > base["errors"]:
+            regressions.append(f"{r.scenario} @ {r.concurrency}: errors {base['errors']} -> {r.errors}")
+    return regressions
+
+
+# ==================== SERVERS ====================
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready")
+
+
+def spawn_servers(fake_args: List[str]) -> Tuple[str, List[subprocess.Popen]]:
+    """Start the fake OpenRouter and the backend (pointed at it); returns (base_url, processes)."""
+    fake_port, backend_port = _free_port(), _free_port()
+    fake = subprocess.Popen(
+        [sys.executable, "-m", "bench.fake_openrouter", "--port", str(fake_port)] + fake_args,
+        cwd=BACKEND_DIR
+    )
+    _wait_ready(f"http://127.0.0.1:{fake_port}/")
+
+    env = dict(os.environ)
+    env.update({
+        "OPENROUTER_BASE_URL": f"http://127.0.0.1:{fake_port}",
+        "OPENROUTER_API_KEY": env.get("OPENROUTER_API_KEY", "bench"),
+        "OPENROUTER_HTTP2": "false",
+        "PORT": str(backend_port),
+    })
+    backend = subprocess.Popen([sys.executable, "main.py"], cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{backend_port}"
+    _wait_ready(f"{base_url}/health")
+    return base_url, [backend, fake]
+
+
+# ==================== MAIN ====================
+
+async def run(args) -> List[Result]:
+    corpus_dir = args.corpus
+    if not os.path.isdir(corpus_dir) or not os.listdir(corpus_dir):
+        generate_corpus(corpus_dir)
+    corpus = sorted(os.path.join(corpus_dir, name) for name in os.listdir(corpus_dir) if name.endswith((".pdf", ".docx")))
+
+    selected = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    large_upload = os.path.join(tempfile.gettempdir(), f"bench_cv_{args.upload_mb:g}mb.pdf")
+    if "parse_cv_large" in selected and not os.path.exists(large_upload):
+        generate_large_pdf(large_upload, args.upload_mb)
+    scenarios = build_scenarios(corpus, args.jobs, args.use_cache, large_upload)
+    unknown = [s for s in selected if s not in scenarios]
+    if unknown:
+        raise SystemExit(f"Unknown scenario(s): {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+
+    results = []
+    limits = httpx.Limits(max_connections=1000, max_keepalive_connections=1000)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        for name in selected:
+            for concurrency in [int(c) for c in args.concurrency.split(",")]:
+                total = max(args.requests, concurrency)
+                print(f"▶️  {name} @ concurrency {concurrency} ({total} requests)...", flush=True)
+                results.append(await run_scenario(client, name, scenarios[name], concurrency, total, args.server_pid))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--spawn", action="store_true", help="Start the fake OpenRouter and the backend as subprocesses")
+    parser.add_argument("--fake-args", default="--latency lognormal:800,0.4 --token-ms 2", help="Extra arguments for bench.fake_openrouter when --spawn is used")
+    parser.add_argument("--server-pid", type=int, help="Backend PID for RSS sampling (set automatically with --spawn)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=32, help="Requests per scenario and concurrency level")
+    parser.add_argument("--jobs", type=int, default=20, help="Jobs per match-cv-jobs request")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Directory of sample CVs (generated when missing)")
+    parser.add_argument("--upload-mb", type=float, default=15.0, help="Size of the PDF uploaded by parse_cv_large")
+    parser.add_argument("--use-cache", action="store_true", help="Let the result caches serve repeated requests")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare against a previous --json file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    processes: List[subprocess.Popen] = []
+    try:
+        if args.spawn:
+            args.base_url, processes = spawn_servers(args.fake_args.split())
+            args.server_pid = processes[0].pid
+        results = asyncio.run(run(args))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=10)
+
+    print()
+    print_table(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"created_at": time.time(), "args": vars(args), "results": [asdict(r) for r in results]}, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.tolerance)
+        if regressions:
+            print("\n❌ Regressions vs baseline:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("\n✅ No regressions vs baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Generate a reproducible corpus of sample CVs (PDF + DOCX) for load tests.
+
+    python -m bench.make_corpus --out bench/corpus --count 24
+
+Roughly a quarter of the CVs are long (several pages) so the chunked parse
+path is exercised too. PDFs are written by hand (Helvetica, accent-free text)
+so no PDF library is needed; DOCX files use python-docx.
+"""
+
+import argparse
+import os
+import random
+from typing import List, Tuple
+
+from docx import Document
+
+from text_utils import strip_diacritics
+
+FIRST_NAMES = ["An", "Bảo", "Chi", "Dũng", "Giang", "Hà", "Hùng", "Khánh", "Linh", "Minh", "Nam", "Phương", "Quân", "Thảo", "Trang", "Tuấn"]
+LAST_NAMES = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Võ", "Đặng", "Bùi"]
+MIDDLE_NAMES = ["Văn", "Thị", "Minh", "Huỳnh", "Đức", "Ngọc"]
+SKILLS = ["Python", "FastAPI", "Django", "Node.js", "React", "TypeScript", "Java", "Spring Boot", "Docker",
+          "Kubernetes", "PostgreSQL", "MySQL", "MongoDB", "Redis", "AWS", "GCP", "CI/CD", "Git", "C++", "Go"]
+COMPANIES = ["FPT Software", "VNG", "Tiki", "MoMo", "Viettel", "VNPT", "Shopee", "Grab", "KMS Technology", "NashTech"]
+ROLES = ["Backend Developer", "Frontend Developer", "Fullstack Developer", "DevOps Engineer", "Data Engineer", "QA Engineer"]
+UNIVERSITIES = ["Đại học Bách Khoa Hà Nội", "Đại học Công nghệ - ĐHQGHN", "Đại học Bách Khoa TP.HCM", "Đại học FPT"]
+
+
+def make_cv(rng: random.Random, index: int, long: bool) -> Tuple[str, List[Tuple[str, List[str]]]]:
+    """(name, [(heading, lines)]) for one synthetic CV."""
+    name = f"{rng.choice(LAST_NAMES)} {rng.choice(MIDDLE_NAMES)} {rng.choice(FIRST_NAMES)}"
+    skills = rng.sample(SKILLS, 8)
+    start_year = rng.randint(2012, 2020)
+
+    jobs = []
+    year = start_year
+    for _ in range(rng.randint(6, 9) if long else rng.randint(1, 3)):
+        end = min(year + rng.randint(1, 3), 2025)
+        company, role = rng.choice(COMPANIES), rng.choice(ROLES)
+        bullets = [
+            f"- Phát triển và bảo trì dịch vụ {rng.choice(skills)} phục vụ {rng.randint(1, 50)}0.000 người dùng",
+            f"- Tối ưu truy vấn {rng.choice(['PostgreSQL', 'MySQL', 'MongoDB'])}, giảm {rng.randint(20, 80)}% thời gian phản hồi",
+            f"- Xây dựng pipeline CI/CD với {rng.choice(['GitLab CI', 'GitHub Actions', 'Jenkins'])}",
+        ]
+        if long:
+            bullets += [f"- Dự án {k}: tích hợp {rng.choice(skills)} với {rng.choice(skills)}, làm việc theo Scrum" for k in range(1, 16)]
+        jobs.append([f"{role} - {company} ({year} - {end})"] + bullets)
+        year = end
+
+    sections = [
+        ("THÔNG TIN CÁ NHÂN", [name, f"Email: candidate{index}@example.com", f"Điện thoại: 09{rng.randint(10000000, 99999999)}", "Địa chỉ: Hà Nội"]),
+        ("MỤC TIÊU NGHỀ NGHIỆP", [f"Kỹ sư phần mềm với {2025 - start_year} năm kinh nghiệm, mong muốn phát triển ở vị trí {rng.choice(ROLES)}."]),
+        ("HỌC VẤN", [f"Cử nhân Công nghệ Thông tin - {rng.choice(UNIVERSITIES)} ({start_year - 4} - {start_year})", f"GPA: {rng.uniform(2.8, 3.9):.2f}/4.0"]),
+        ("KINH NGHIỆM LÀM VIỆC", [line for job in jobs for line in job + [""]]),
+        ("KỸ NĂNG", [", ".join(skills)]),
+        ("CHỨNG CHỈ", [rng.choice(["AWS Certified Developer", "IELTS 7.0", "TOEIC 850", "Oracle Java SE 11"])]),
+    ]
+    return name, sections
+
+
+def write_docx(path: str, name: str, sections) -> None:
+    document = Document()
+    document.add_heading(name, level=0)
+    for heading, lines in sections:
+        document.add_heading(heading, level=1)
+        for line in lines:
+            document.add_paragraph(line)
+    document.save(path)
+
+
+def _pdf_escape(text: str) -> str:
+    return strip_diacritics(text).encode("latin-1", "replace").decode("latin-1").replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, name: str, sections, lines_per_page: int = 55, padding_bytes: int = 0) -> None:
+    """`padding_bytes` adds an unreferenced binary stream, like the scanned images that make real CVs large."""
+    lines = [name, ""]
+    for heading, body in sections:
+        lines += [heading] + body + [""]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+
+    objects: List[bytes] = []
+    font_id = 3
+    page_ids = []
+    for page_lines in pages:
+        stream = "BT /F1 10 Tf 12 TL 50 800 Td " + " ".join(f"({_pdf_escape(line)}) Tj T*" for line in page_lines) + " ET"
+        stream_bytes = stream.encode("latin-1")
+        content_id = font_id + 1 + len(objects)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream_bytes), stream_bytes))
+        page_ids.append((content_id + 1, content_id))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+    if padding_bytes:
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (padding_bytes, os.urandom(padding_bytes)))
+
+    kids = " ".join(f"{page_id} 0 R" for page_id, _ in page_ids).encode()
+    header = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids)),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(header + objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(offsets) + 1, xref)
+
+    with open(path, "wb") as f:
+        f.write(bytes(out))
+
+
+def generate_corpus(out_dir: str, count: int = 24, seed: int = 42) -> List[str]:
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        long = i % 8 in (2, 7)  # one PDF and one DOCX in every eight
+        name, sections = make_cv(rng, i, long)
+        stem = os.path.join(out_dir, f"cv_{i:03d}{'_long' if long else ''}")
+        if i % 2 == 0:
+            write_pdf(stem + ".pdf", name, sections)
+            paths.append(stem + ".pdf")
+        else:
+            write_docx(stem + ".docx", name, sections)
+            paths.append(stem + ".docx")
+    return paths
+
+
+def generate_large_pdf(path: str, size_mb: float, seed: int = 42) -> str:
+    """One ordinary CV padded to about `size_mb` MB, for the upload memory benchmark."""
+    name, sections = make_cv(random.Random(seed), 0, long=False)
+    write_pdf(path, name, sections, padding_bytes=int(size_mb * 1024 * 1024))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=os.path.join(os.path.dirname(__file__), "corpus"))
+    parser.add_argument("--count", type=int, default=24)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    paths = generate_corpus(args.out, args.count, args.seed)
+    print(f"📁 Wrote {len(paths)} CVs to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
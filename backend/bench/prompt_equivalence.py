@@ -0,0 +1,224 @@
+"""
+Equivalence check for the prompt variants (PROMPT_VARIANT=full vs compact).
+
+Starts one backend per variant against the same upstream, parses every CV of
+the sample corpus with both and matches it against sample jobs with both,
+then compares: contact fields must be equal, skills must overlap and match
+scores must agree within a tolerance. Sampling temperature is forced to 0 so
+differences come from the prompts. Also prints the static tokens per template.
+
+    # Real OpenRouter (uses OPENROUTER_API_KEY / OPENROUTER_BASE_URL from the environment)
+    python -m bench.prompt_equivalence --jobs 5
+
+    # Plumbing check against the local stand-in
+    python -m bench.prompt_equivalence --fake
+
+Exits with status 1 when any CV falls outside the tolerances.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from bench.loadtest import BACKEND_DIR, DEFAULT_CORPUS, _free_port, _wait_ready, sample_jobs
+from bench.make_corpus import generate_corpus
+from prompts import PROMPT_SETS
+from text_utils import normalize_text
+
+VARIANTS = ("full", "compact")
+CONTACT_FIELDS = ("full_name", "email", "phone_number", "university")
+
+
+# ==================== SERVERS ====================
+
+def spawn_backend(variant: str, upstream: Dict[str, str], workdir: str) -> Tuple[str, subprocess.Popen]:
+    port = _free_port()
+    env = dict(os.environ)
+    env.update(upstream)
+    env.update({
+        "PROMPT_VARIANT": variant,
+        "PORT": str(port),
+        "CV_CACHE_BACKEND": "none",
+        "GENERATE_CACHE_BACKEND": "none",
+        "JOB_QUEUE_PATH": os.path.join(workdir, f"jobs_{variant}.sqlite3"),
+        "MODEL_ROUTE_PARSE_CV_TEMPERATURE": "0",
+        "MODEL_ROUTE_MATCH_TEMPERATURE": "0",
+        "LOG_LEVEL": "WARNING",
+    })
+    backend = subprocess.Popen([sys.executable, "main.py"], cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    _wait_ready(f"{base_url}/health")
+    return base_url, backend
+
+
+# ==================== COMPARISON ====================
+
+def _norm(value) -> str:
+    text = normalize_text(str(value or ""))
+    if "@" not in text and any(ch.isdigit() for ch in text) and not any(ch.isalpha() for ch in text):
+        # Phone numbers: digits only
+        return "".join(ch for ch in text if ch.isdigit())
+    return " ".join(text.split())
+
+
+def skill_overlap(a: Optional[List[str]], b: Optional[List[str]]) -> float:
+    left, right = {_norm(s) for s in a or []}, {_norm(s) for s in b or []}
+    if not left and not right:
+        return 1.0
+    return len(left & right) / len(left | right)
+
+
+def compare_parse(full: dict, compact: dict, min_skill_overlap: float) -> List[str]:
+    problems = [
+        f"{field}: {full.get(field)!r} != {compact.get(field)!r}"
+        for field in CONTACT_FIELDS if _norm(full.get(field)) != _norm(compact.get(field))
+    ]
+    overlap = skill_overlap(full.get("skills"), compact.get("skills"))
+    if overlap < min_skill_overlap:
+        problems.append(f"skills overlap {overlap:.2f} < {min_skill_overlap:.2f}")
+    return problems
+
+
+def compare_match(full: dict, compact: dict, score_tolerance: float) -> List[str]:
+    full_scores = {m["job_id"]: m.get("match_score", 0) for m in full.get("all_matches") or []}
+    compact_scores = {m["job_id"]: m.get("match_score", 0) for m in compact.get("all_matches") or []}
+    problems = [
+        f"job {job_id}: score {score} vs {compact_scores.get(job_id)}"
+        for job_id, score in full_scores.items()
+        if job_id not in compact_scores or abs(score - compact_scores[job_id]) > score_tolerance
+    ]
+    full_best, compact_best = full.get("best_match") or {}, compact.get("best_match") or {}
+    if full_best.get("job_id") != compact_best.get("job_id") and abs(full_best.get("match_score", 0) - compact_best.get("match_score", 0)) > score_tolerance:
+        problems.append(f"best_match {full_best.get('job_id')} vs {compact_best.get('job_id')}")
+    return problems
+
+
+# ==================== MAIN ====================
+
+def print_token_table() -> None:
+    full, compact = PROMPT_SETS["full"], PROMPT_SETS["compact"]
+    print(f"{'template':<24} {'full':>7} {'compact':>8} {'saved':>7}   (static tokens, {full.stats()['tokenizer']})")
+    print("-" * 52)
+    rows = [(name, template.static_tokens, compact[name].static_tokens) for name, template in full.templates.items()]
+    # parse_cv compact moves the guidelines from the user message into the (cacheable) system prefix
+    rows.append(("parse_cv system+user", *(s["parse_cv_system"].static_tokens + s["parse_cv_user"].static_tokens for s in (full, compact))))
+    for name, big, small in rows:
+        print(f"{name:<24} {big:>7} {small:>8} {1 - small / big if big else 0.0:>6.0%}")
+    print()
+
+
+async def check_cv(clients: Dict[str, httpx.AsyncClient], path: str, jobs: List[dict], args) -> List[str]:
+    with open(path, "rb") as f:
+        content = f.read()
+    name = os.path.basename(path)
+
+    parsed = {}
+    for variant, client in clients.items():
+        response = await client.post("/api/parse-cv", params={"bypass_cache": "true"}, files={"file": (name, content)})
+        response.raise_for_status()
+        parsed[variant] = response.json()["data"]
+    problems = [f"parse {p}" for p in compare_parse(parsed["full"], parsed["compact"], args.min_skill_overlap)]
+
+    # Both variants match the same CV data, so only the match prompt differs
+    cv = parsed["full"]
+    body = {
+        "cv_text": cv.get("fullText", ""),
+        "cv_data": {
+            "full_name": cv.get("full_name") or name,
+            "email": cv.get("email") or "unknown@example.com",
+            "phone_number": cv.get("phone_number"),
+            "university": cv.get("university"),
+            "education": cv.get("education") if isinstance(cv.get("education"), str) else None,
+            "experience": cv.get("experience") if isinstance(cv.get("experience"), str) else None,
+            "skills": cv.get("skills") or []
+        },
+        "jobs": jobs,
+        "primary_job_id": jobs[0]["id"],
+        "mode": "batch",
+        "top_k": 0
+    }
+    matched = {}
+    for variant, client in clients.items():
+        response = await client.post("/api/match-cv-jobs", json=body)
+        response.raise_for_status()
+        matched[variant] = response.json()["data"]
+    problems += [f"match {p}" for p in compare_match(matched["full"], matched["compact"], args.score_tolerance)]
+    return problems
+
+
+async def run(args, base_urls: Dict[str, str]) -> int:
+    corpus_dir = args.corpus
+    if not os.path.isdir(corpus_dir) or not os.listdir(corpus_dir):
+        generate_corpus(corpus_dir)
+    corpus = sorted(os.path.join(corpus_dir, name) for name in os.listdir(corpus_dir) if name.endswith((".pdf", ".docx")))
+    if args.limit:
+        corpus = corpus[:args.limit]
+    jobs = sample_jobs(args.jobs, random.Random(11))
+
+    failures = 0
+    clients = {variant: httpx.AsyncClient(base_url=url, timeout=args.timeout) for variant, url in base_urls.items()}
+    try:
+        for path in corpus:
+            problems = await check_cv(clients, path, jobs, args)
+            failures += bool(problems)
+            print(f"{'✅' if not problems else '❌'} {os.path.basename(path)}")
+            for problem in problems:
+                print(f"    - {problem}")
+    finally:
+        for client in clients.values():
+            await client.aclose()
+
+    print(f"\n{len(corpus) - failures}/{len(corpus)} CVs equivalent")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Directory of sample CVs (generated when missing)")
+    parser.add_argument("--limit", type=int, help="Only the first N CVs")
+    parser.add_argument("--jobs", type=int, default=5, help="Sample jobs per match request")
+    parser.add_argument("--fake", action="store_true", help="Use bench.fake_openrouter instead of the configured upstream")
+    parser.add_argument("--min-skill-overlap", type=float, default=0.7, help="Minimum Jaccard overlap of parsed skills")
+    parser.add_argument("--score-tolerance", type=float, default=10, help="Maximum match_score difference per job")
+    parser.add_argument("--timeout", type=float, default=180.0)
+    args = parser.parse_args()
+
+    print_token_table()
+
+    processes: List[subprocess.Popen] = []
+    upstream: Dict[str, str] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            if args.fake:
+                fake_port = _free_port()
+                processes.append(subprocess.Popen(
+                    [sys.executable, "-m", "bench.fake_openrouter", "--port", str(fake_port), "--latency", "fixed:20", "--token-ms", "0"],
+                    cwd=BACKEND_DIR
+                ))
+                _wait_ready(f"http://127.0.0.1:{fake_port}/")
+                upstream = {"OPENROUTER_BASE_URL": f"http://127.0.0.1:{fake_port}", "OPENROUTER_API_KEY": "bench"}
+            elif not os.getenv("OPENROUTER_API_KEY"):
+                raise SystemExit("OPENROUTER_API_KEY is not set (or use --fake)")
+
+            base_urls = {}
+            for variant in VARIANTS:
+                base_urls[variant], backend = spawn_backend(variant, upstream, workdir)
+                processes.append(backend)
+            failures = asyncio.run(run(args, base_urls))
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait(timeout=10)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
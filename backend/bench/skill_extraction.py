@@ -0,0 +1,81 @@
+"""
+Throughput of the local skill extractor on the sample CV corpus.
+
+Extracts the text of every CV once, then times SkillOntology.extract() over
+the whole corpus for a number of rounds and reports per-CV latency, CVs and
+MB per second. The same skills are also looked up with one regex search per
+alias (how mandatory_check scans), as a reference for the automaton.
+
+    python -m bench.skill_extraction --rounds 50
+"""
+
+import argparse
+import os
+import re
+import time
+from typing import List
+
+from bench.loadtest import DEFAULT_CORPUS, percentile
+from bench.make_corpus import generate_corpus
+from extraction import extract_text_sync
+from skill_extraction import SkillOntology
+from text_utils import normalize_text
+
+
+def regex_extract(ontology: SkillOntology, patterns: List[re.Pattern], text: str) -> List[str]:
+    norm = normalize_text(text)
+    return [skill.name for skill, pattern in zip(ontology.skills, patterns) if pattern.search(norm)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Directory of sample CVs (generated when missing)")
+    parser.add_argument("--rounds", type=int, default=50, help="Passes over the corpus")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.corpus) or not os.listdir(args.corpus):
+        generate_corpus(args.corpus)
+    paths = sorted(os.path.join(args.corpus, name) for name in os.listdir(args.corpus) if name.endswith((".pdf", ".docx")))
+    texts = []
+    for path in paths:
+        with open(path, "rb") as f:
+            texts.append(extract_text_sync(os.path.basename(path), f.read())[0])
+    total_bytes = sum(len(text.encode("utf-8")) for text in texts)
+
+    started = time.perf_counter()
+    ontology = SkillOntology.load()
+    load_ms = (time.perf_counter() - started) * 1000
+    stats = ontology.stats()
+    print(f"ontology {stats['version']}: {stats['skills']} skills, {stats['aliases']} aliases, {stats['automaton_states']} states, built in {load_ms:.1f} ms")
+    print(f"corpus: {len(texts)} CVs, {total_bytes / 1024:.0f} KiB of text\n")
+
+    # Same whole-word rule as mandatory_check, one pattern per skill
+    patterns = [
+        re.compile("|".join(r"(?<![a-z0-9+#])" + re.escape(normalize_text(alias)) + r"(?![a-z0-9+#]|\.[a-z0-9])" for alias in skill.aliases))
+        for skill in ontology.skills
+    ]
+    found = [ontology.extract(text) for text in texts]
+
+    print(f"{'method':<16} {'p50 µs':>9} {'p95 µs':>9} {'CVs/s':>9} {'MB/s':>8}")
+    print("-" * 55)
+    for name, extract in (("aho-corasick", ontology.extract), ("regex per skill", lambda text: regex_extract(ontology, patterns, text))):
+        rounds = args.rounds if name == "aho-corasick" else max(1, args.rounds // 10)
+        timings = []
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for text in texts:
+                t0 = time.perf_counter()
+                extract(text)
+                timings.append((time.perf_counter() - t0) * 1e6)
+        elapsed = time.perf_counter() - started
+        timings.sort()
+        print(f"{name:<16} {percentile(timings, 50):>9.0f} {percentile(timings, 95):>9.0f} {len(timings) / elapsed:>9.0f} {rounds * total_bytes / elapsed / 1e6:>8.1f}")
+
+    counts = sorted(len(skills) for skills in found)
+    print(f"\nskills per CV: min {counts[0]}, median {counts[len(counts) // 2]}, max {counts[-1]}")
+    for path, skills in list(zip(paths, found))[:3]:
+        print(f"  {os.path.basename(path)}: {', '.join(skills[:12])}{' …' if len(skills) > 12 else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Result caches for LLM-backed endpoints.
+
+Backends are pluggable: an in-memory LRU with TTL (per process) or an on-disk
+SQLite table (shared by every worker on the host). `ResultCache` wraps a
+backend with hit/miss counters and runs blocking backends off the event loop.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Union
+
+from metrics import CACHE_EVENTS
+
+
+def content_key(*parts: Union[bytes, str]) -> str:
+    """SHA-256 over all parts, length-prefixed so ('ab', 'c') != ('a', 'bc')."""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part.encode("utf-8") if isinstance(part, str) else part
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class CacheBackend:
+    """Minimal key -> JSON-serialisable value store."""
+
+    # True when get/set do I/O and should run in a thread
+    blocking = False
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryLRUCache(CacheBackend):
+    def __init__(self, max_entries: int = 1000, ttl: Optional[float] = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at and expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        expires_at = time.time() + self.ttl if self.ttl else 0.0
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache(CacheBackend):
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl: Optional[float] = None, table: str = "cache"):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table}(accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at and expires_at < now:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else 0.0
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at, now)
+            )
+            # LRU eviction by last access time
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ResultCache:
+    """Async facade with hit/miss/bypass counters over a CacheBackend (or disabled when None)."""
+
+    def __init__(self, name: str, backend: Optional[CacheBackend]):
+        self.name = name
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stores = 0
+        self.invalidated = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def _run(self, fn, *args):
+        if self.backend.blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    async def get(self, key: str, bypass: bool = False) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        if bypass:
+            self.bypassed += 1
+            CACHE_EVENTS.inc(cache=self.name, event="bypass")
+            return None
+        value = await self._run(self.backend.get, key)
+        if value is None:
+            self.misses += 1
+            CACHE_EVENTS.inc(cache=self.name, event="miss")
+        else:
+            self.hits += 1
+            CACHE_EVENTS.inc(cache=self.name, event="hit")
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        await self._run(self.backend.set, key, value)
+        self.stores += 1
+        CACHE_EVENTS.inc(cache=self.name, event="store")
+
+    async def set_versioned(self, group: str, key: str, value: Any) -> None:
+        """
+        Store `value` as the current entry of `group` (e.g. one job), deleting the
+        group's previous entry when its key differs - i.e. the inputs changed.
+        """
+        if not self.enabled:
+            return
+        pointer = content_key("group", group)
+        previous = await self._run(self.backend.get, pointer)
+        if previous and previous != key:
+            await self._run(self.backend.delete, previous)
+            self.invalidated += 1
+            CACHE_EVENTS.inc(cache=self.name, event="invalidated")
+        await self._run(self.backend.set, key, value)
+        await self._run(self.backend.set, pointer, key)
+        self.stores += 1
+        CACHE_EVENTS.inc(cache=self.name, event="store")
+
+    async def delete(self, key: str) -> None:
+        if self.enabled:
+            await self._run(self.backend.delete, key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__ if self.enabled else None,
+            "entries": len(self.backend) if self.enabled else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "stores": self.stores,
+            "invalidated": self.invalidated,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+def build_cache_backend(prefix: str, default_path: str) -> Optional[CacheBackend]:
+    """Backend from env: <PREFIX>_BACKEND=memory|sqlite|none, _TTL, _MAX_ENTRIES, _PATH."""
+    kind = os.getenv(f"{prefix}_BACKEND", "memory").lower()
+    ttl = float(os.getenv(f"{prefix}_TTL", "604800")) or None
+    max_entries = int(os.getenv(f"{prefix}_MAX_ENTRIES", "1000"))
+
+    if kind in ("none", "off", "disabled"):
+        return None
+    if kind == "sqlite":
+        return SQLiteCache(os.getenv(f"{prefix}_PATH", default_path), max_entries=max_entries, ttl=ttl)
+    return MemoryLRUCache(max_entries=max_entries, ttl=ttl)
@@ -0,0 +1,114 @@
+"""
+Cheap local pre-scoring of many candidates for one job, before the LLM.
+
+The reverse of job_ranking: the candidates are the documents. Each one gets two
+signals computed for the whole pool in one pass, BM25 of the job's terms over
+the parsed CV fields and the cosine similarity of hashed n-gram vectors (stored
+ones from the vector index are reused), each scaled to the best candidate and
+averaged. Candidates that clearly fail a mandatory requirement are ranked
+after every other candidate, so they only reach the LLM shortlist when there
+are not enough others.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from job_ranking import BM25, cv_query, job_document
+from mandatory_check import MandatoryCheckResult, check_mandatory_requirements
+from vector_index import HashingEmbedder, cv_fields, job_fields
+
+# Candidates scored by the LLM per request (the rest keep their local score)
+MATCH_CANDIDATES_SHORTLIST = int(os.getenv("MATCH_CANDIDATES_SHORTLIST", "20"))
+MATCH_CANDIDATES_MAX = int(os.getenv("MATCH_CANDIDATES_MAX", "5000"))
+
+# Weight of the BM25 signal; the vector similarity gets the rest
+BM25_WEIGHT = 0.5
+
+
+@dataclass
+class Candidate:
+    id: str
+    cv_data: object
+    cv_text: str = ""
+    # Stored vector from the index, when the candidate came from there
+    vector: Optional[np.ndarray] = None
+
+
+@dataclass
+class PreScore:
+    candidate: Candidate
+    bm25: float
+    similarity: float
+    # 0..1, relative to the best candidate on each signal
+    score: float
+    mandatory_check: Optional[MandatoryCheckResult] = None
+
+    @property
+    def decisive_fail(self) -> bool:
+        return self.mandatory_check is not None and self.mandatory_check.decisive_fail
+
+    def to_dict(self) -> dict:
+        return {
+            "candidate_id": self.candidate.id,
+            "full_name": self.candidate.cv_data.full_name,
+            "local_score": round(self.score, 4),
+            "similarity": round(self.similarity, 4),
+            "bm25": round(self.bm25, 4),
+            "mandatory_status": self.mandatory_check.status if self.mandatory_check else None
+        }
+
+
+def _relative(values: np.ndarray) -> np.ndarray:
+    top = values.max() if len(values) else 0.0
+    return values / top if top > 0 else np.zeros_like(values)
+
+
+def prescore_candidates(job, candidates: Sequence[Candidate], embedder: HashingEmbedder, check_mandatory: bool = True) -> List[PreScore]:
+    """All candidates with their local scores, best first (clear mandatory fails last)."""
+    if not candidates:
+        return []
+    bm25 = np.array(BM25([cv_query(c.cv_data, "") for c in candidates]).scores(job_document(job)), dtype=np.float32)
+
+    vectors = np.zeros((len(candidates), embedder.dim), dtype=np.float32)
+    missing = [i for i, c in enumerate(candidates) if c.vector is None]
+    if missing:
+        vectors[missing] = embedder.embed_many([cv_fields(candidates[i].cv_data) for i in missing])
+    for i, c in enumerate(candidates):
+        if c.vector is not None:
+            vectors[i] = c.vector
+    # One matrix-vector product for the whole pool
+    similarity = np.clip(vectors @ embedder.embed(job_fields(job)), 0.0, None)
+
+    scores = BM25_WEIGHT * _relative(bm25) + (1 - BM25_WEIGHT) * _relative(similarity)
+    prescored = [
+        PreScore(
+            candidate=c,
+            bm25=float(bm25[i]),
+            similarity=float(similarity[i]),
+            score=float(scores[i]),
+            mandatory_check=check_mandatory_requirements(job.mandatory_requirements, c.cv_data, c.cv_text) if check_mandatory else None
+        )
+        for i, c in enumerate(candidates)
+    ]
+    prescored.sort(key=lambda p: (p.decisive_fail, -p.score))
+    return prescored
+
+
+def pre_screened_entry(prescore: PreScore) -> dict:
+    """
+    Result entry for a candidate that was not sent to the LLM: `match_score` is None
+    (not on the AI's 0-100 scale) and the local score is `prefilter_score`, 0-100
+    relative to the best candidate.
+    """
+    return {
+        **prescore.to_dict(),
+        "match_score": None,
+        "prefilter_score": int(round(100 * prescore.score)),
+        "pre_screened": True,
+        "strengths": [],
+        "weaknesses": [],
+        "recommendation": "Chưa được AI đánh giá chi tiết - điểm từ bước sàng lọc cục bộ (pre-screened)."
+    }
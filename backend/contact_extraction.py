@@ -0,0 +1,140 @@
+"""
+Local extraction of the contact fields (name, email, phone) from CV text.
+
+Used by the quick parse mode, which answers without the LLM. Emails and phone
+numbers come from regexes (Vietnamese mobile / landline numbers with or
+without +84, and international numbers written with a leading +); the name is
+taken from a "Họ tên: / Name:" label or, failing that, from the first lines
+that look like a person's name rather than a heading, a job title or contact
+details.
+"""
+
+import re
+from dataclasses import asdict, dataclass
+from typing import List, Optional
+
+from text_utils import normalize_text
+
+EMAIL_RE = re.compile(r"(?<![\w.+-])[A-Za-z0-9][A-Za-z0-9._%+-]*@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}")
+# Digit runs with the usual separators; validated on the digits afterwards. Letters may
+# precede the number: icon fonts and labels get glued to it ("phone+84 945 446 761")
+_PHONE_CANDIDATE_RE = re.compile(r"(?<![\d+])(?:\+|\(\+?)?\d[\d \t.\-()]{7,18}\d(?!\w)")
+# CV templates (LaTeX fontawesome and similar) draw an icon before each contact value; PDF
+# text extraction often returns the glyph's name glued to the value ("/envelopejo@x.com",
+# "githubgithub.com/jo"), sometimes with a letter replaced by a stray symbol ("envel⌢pe").
+_ICON_GLYPH_NAMES = (
+    "envelope", "envelope-o", "envelope-open", "phone", "phone-alt", "phone-square", "mobile", "mobile-alt",
+    "mobile-phone", "map-marker", "map-marker-alt", "map-pin", "globe", "linkedin", "linkedin-in", "github",
+    "gitlab", "skype", "whatsapp", "telegram", "birthday-cake"
+)
+
+
+# A symbol that can stand in for one letter of a glyph name: not a separator that can belong to the value
+_GLYPH_ARTIFACT = r"[^\w\s/|,;:@.+()\-]"
+
+
+def _glyph_pattern(name: str) -> str:
+    """The name, or the name with one of its letters come out as a stray symbol."""
+    variants = [re.escape(name)] + [
+        re.escape(name[:i]) + _GLYPH_ARTIFACT + re.escape(name[i + 1:]) for i, c in enumerate(name) if c.isalpha()
+    ]
+    return "|".join(variants)
+
+
+# Only at a line start or right after another icon or a "/", "|", "•" separator, and glued to
+# a value, so "Phone:" labels or "Email: githubber@x.com" stay untouched
+_ICON_GLYPH_RE = re.compile(
+    r"(?:^|(?<=[^\w\s:,;.@])|(?<=[/|•·] ))(?:"
+    + "|".join(_glyph_pattern(name) for name in sorted(_ICON_GLYPH_NAMES, key=len, reverse=True))
+    + r")(?=[\w+(])",
+    re.MULTILINE | re.IGNORECASE
+)
+_VN_PREFIXES = ("03", "05", "07", "08", "09", "02")
+
+_NAME_LABEL_RE = re.compile(r"^\s*(?:ho va ten|ho ten|ten|full name|name|candidate|ung vien)\s*[:：-]\s*(.+?)\s*$")
+# Lines scanned for an unlabelled name
+_NAME_SCAN_LINES = 12
+_NAME_WORD_RE = re.compile(r"^[^\W\d_][^\W\d_'.-]*$")
+# Headings, job titles and labels that look like capitalised names
+_NOT_NAME_PHRASES = (
+    "cv", "resume", "curriculum vitae", "so yeu ly lich", "thong tin ca nhan", "personal information", "profile",
+    "contact", "lien he", "muc tieu nghe nghiep", "objective", "summary", "hoc van", "education", "kinh nghiem",
+    "experience", "ky nang", "skills", "developer", "engineer", "ky su", "lap trinh vien", "manager", "intern",
+    "thuc tap sinh", "designer", "analyst", "tester", "specialist", "chuyen vien", "nhan vien", "truong phong",
+    "giam doc", "director", "consultant", "architect", "lead", "senior", "junior", "fresher", "backend", "frontend",
+    "fullstack", "devops", "software", "phan mem", "cong ty", "company", "address", "dia chi", "email", "phone",
+    "dien thoai"
+)
+_NOT_NAME_RE = re.compile(r"\b(?:" + "|".join(_NOT_NAME_PHRASES) + r")\b")
+_VN_SURNAMES = frozenset("nguyen tran le pham hoang huynh phan vu vo dang bui do ho ngo duong ly dinh truong mai lam ta trinh cao".split())
+
+
+@dataclass
+class ContactFields:
+    full_name: Optional[str] = None
+    email: Optional[str] = None
+    phone_number: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def extract_email(text: str) -> Optional[str]:
+    match = EMAIL_RE.search(text)
+    return match.group().rstrip(".") if match else None
+
+
+def _valid_phone(raw: str) -> bool:
+    digits = re.sub(r"\D", "", raw)
+    if raw.lstrip("(").startswith("+"):
+        # E.164: country code + subscriber number
+        return 8 <= len(digits) <= 15
+    if digits.startswith("84") and len(digits) in (11, 12):
+        digits = "0" + digits[2:]
+    if digits.startswith("02"):
+        return len(digits) == 11
+    return digits.startswith(_VN_PREFIXES) and len(digits) == 10
+
+
+def extract_phone(text: str) -> Optional[str]:
+    for match in _PHONE_CANDIDATE_RE.finditer(text):
+        raw = match.group().strip(" \t.-")
+        if _valid_phone(raw):
+            return raw
+    return None
+
+
+def _looks_like_name(line: str) -> bool:
+    words = line.split()
+    if not 2 <= len(words) <= 5 or len(line) > 50:
+        return False
+    if not all(_NAME_WORD_RE.match(word) and word[0].isupper() for word in words):
+        return False
+    return not _NOT_NAME_RE.search(normalize_text(line))
+
+
+def extract_name(lines: List[str]) -> Optional[str]:
+    for line in lines:
+        match = _NAME_LABEL_RE.match(normalize_text(line))
+        if match:
+            # Same length after normalisation for Latin text, so the span maps back to the original
+            value = line[match.start(1):match.end(1)].strip()
+            if _looks_like_name(value):
+                return value
+
+    candidates = [line for line in lines[:_NAME_SCAN_LINES] if _looks_like_name(line)]
+    # A Vietnamese family name first is the strongest hint; otherwise the topmost candidate
+    for line in candidates:
+        if normalize_text(line.split()[0]) in _VN_SURNAMES:
+            return line
+    return candidates[0] if candidates else None
+
+
+def extract_contact_fields(text: str) -> ContactFields:
+    lines = [line.strip() for line in (text or "").splitlines() if line.strip()]
+    contact_text = _ICON_GLYPH_RE.sub(" ", text or "")
+    return ContactFields(
+        full_name=extract_name(lines),
+        email=extract_email(contact_text),
+        phone_number=extract_phone(contact_text)
+    )
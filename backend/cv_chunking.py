@@ -0,0 +1,188 @@
+"""
+Section-aware chunking for long CVs.
+
+Long CVs are split on section headings (Experience / Kinh nghiệm, Education /
+Học vấn, ...) and packed into chunks that each fit one parse prompt. Parsed
+chunks are merged back into a single result, and matching gets only the
+sections most relevant to the jobs instead of the first N characters.
+"""
+
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from job_ranking import BM25
+from text_utils import normalize_text, tokenize
+
+CV_CHUNK_CHARS = int(os.getenv("CV_CHUNK_CHARS", "4000"))
+CV_CHUNK_MAX_CHUNKS = int(os.getenv("CV_CHUNK_MAX_CHUNKS", "8"))
+
+# Normalised (accent-free, lower-case) heading keywords, EN + VI
+_HEADINGS = (
+    "summary", "profile", "objective", "about me", "career objective", "professional summary",
+    "muc tieu", "gioi thieu", "tom tat", "thong tin ca nhan", "personal information", "contact",
+    "experience", "work experience", "employment", "work history", "professional experience",
+    "kinh nghiem", "kinh nghiem lam viec", "qua trinh cong tac",
+    "education", "hoc van", "trinh do hoc van", "qua trinh hoc tap",
+    "skills", "technical skills", "ky nang", "ky nang chuyen mon",
+    "projects", "du an", "du an tieu bieu", "personal projects",
+    "certifications", "certificates", "chung chi", "bang cap", "licenses",
+    "awards", "achievements", "giai thuong", "thanh tich", "hoat dong", "activities",
+    "languages", "ngoai ngu", "interests", "so thich", "references", "nguoi tham chieu",
+)
+_HEADING_RE = re.compile(
+    r"^[\W\d_]*(?:" + "|".join(re.escape(h) for h in sorted(_HEADINGS, key=len, reverse=True)) + r")\b[\W_]*$"
+)
+_MAX_HEADING_LEN = 50
+
+# Fields merged by concatenation; everything else keeps the first non-empty value
+_CONCAT_FIELDS = ("experience", "education")
+
+
+@dataclass
+class Section:
+    heading: str
+    text: str
+
+
+def split_sections(cv_text: str) -> List[Section]:
+    """Split on heading lines. Text before the first heading is the "header" section."""
+    sections: List[Section] = []
+    heading = "header"
+    buffer: List[str] = []
+    for line in cv_text.splitlines():
+        stripped = line.strip()
+        if stripped and len(stripped) <= _MAX_HEADING_LEN and _HEADING_RE.match(normalize_text(stripped)):
+            if any(b.strip() for b in buffer):
+                sections.append(Section(heading, "\n".join(buffer).strip("\n")))
+            heading = stripped
+            buffer = [line]
+        else:
+            buffer.append(line)
+    if any(b.strip() for b in buffer):
+        sections.append(Section(heading, "\n".join(buffer).strip("\n")))
+    return sections
+
+
+def _split_oversized(text: str, max_chars: int) -> List[str]:
+    """Break one section on line boundaries (hard-cut lines that are themselves too long)."""
+    pieces: List[str] = []
+    current = ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if len(current) + len(line) > max_chars and current:
+            pieces.append(current)
+            current = ""
+        current += line
+    if current.strip():
+        pieces.append(current)
+    return pieces
+
+
+def chunk_cv(cv_text: str, max_chars: int = CV_CHUNK_CHARS) -> List[str]:
+    """Greedily pack whole sections into chunks of at most `max_chars`."""
+    if len(cv_text) <= max_chars:
+        return [cv_text]
+
+    chunks: List[str] = []
+    current = ""
+    for section in split_sections(cv_text):
+        parts = _split_oversized(section.text, max_chars) if len(section.text) > max_chars else [section.text]
+        for part in parts:
+            candidate = f"{current}\n\n{part}" if current else part
+            if len(candidate) <= max_chars:
+                current = candidate
+            else:
+                chunks.append(current)
+                current = part
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _dedupe_paragraphs(values: Sequence[str]) -> str:
+    merged: List[str] = []
+    seen_norm: List[str] = []
+    for value in values:
+        norm = normalize_text(value).strip()
+        if not norm or any(norm in prev for prev in seen_norm):
+            continue
+        # A later, fuller version replaces an earlier fragment
+        for i, prev in enumerate(seen_norm):
+            if prev in norm:
+                merged[i], seen_norm[i] = value.strip(), norm
+                break
+        else:
+            merged.append(value.strip())
+            seen_norm.append(norm)
+    return "\n\n".join(merged)
+
+
+def merge_parsed_chunks(results: Sequence[Dict]) -> Dict:
+    """Merge per-chunk parse results: first non-empty scalars, concatenated experience/education, deduped skills."""
+    if len(results) == 1:
+        return dict(results[0])
+
+    merged: Dict = {}
+    for result in results:
+        for key, value in result.items():
+            if key in _CONCAT_FIELDS or key == "skills":
+                continue
+            if merged.get(key) in (None, "", []) and value not in (None, "", []):
+                merged[key] = value
+
+    for key in _CONCAT_FIELDS:
+        values = [r.get(key) for r in results if isinstance(r.get(key), str) and r.get(key).strip()]
+        merged[key] = _dedupe_paragraphs(values) or None
+
+    skills: List[str] = []
+    seen = set()
+    for result in results:
+        for skill in result.get("skills") or []:
+            if not isinstance(skill, str):
+                continue
+            key = re.sub(r"[\s._-]", "", normalize_text(skill))
+            if key and key not in seen:
+                seen.add(key)
+                skills.append(skill.strip())
+    merged["skills"] = skills
+
+    for key in ("full_name", "email", "phone_number", "address", "university", "summary"):
+        merged.setdefault(key, None)
+    return merged
+
+
+def select_relevant_text(cv_text: str, query_texts: Sequence[str], budget: int) -> Optional[str]:
+    """
+    Pick the CV sections most relevant to `query_texts` (job descriptions) within `budget` chars,
+    always keeping the header (name/contact/summary). Sections keep their original order.
+    Returns None when the CV already fits the budget.
+    """
+    if len(cv_text) <= budget:
+        return None
+
+    sections = split_sections(cv_text)
+    pieces: List[str] = []
+    for section in sections:
+        pieces.extend(_split_oversized(section.text, budget) if len(section.text) > budget else [section.text])
+
+    query = tokenize(" ".join(query_texts))
+    scores = BM25([tokenize(piece) for piece in pieces]).scores(query)
+    order = sorted(range(1, len(pieces)), key=lambda i: -scores[i])
+
+    chosen = {0}
+    used = min(len(pieces[0]), budget)
+    for i in order:
+        cost = len(pieces[i]) + 2
+        if used + cost <= budget:
+            chosen.add(i)
+            used += cost
+
+    excerpt = "\n\n".join(pieces[i] for i in sorted(chosen))
+    return excerpt[:budget]
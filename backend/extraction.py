@@ -0,0 +1,222 @@
+"""
+CV text extraction stage.
+
+PyPDF2 / python-docx parsing is CPU bound and holds the GIL, so it runs in a
+bounded ProcessPoolExecutor instead of on the event loop. Each PDF page gets
+its own time budget; a document that blows it is aborted and, if a worker
+hangs past the overall deadline, the pool is torn down and recreated. A
+ProcessPoolExecutor cannot lose one worker without breaking, so the other
+documents in flight are resubmitted instead of failed: to the new pool after
+a hang, or each to a one-off process after a crash (any of them may have
+caused it, and only that one crashes again).
+
+Large uploads are not sent to the worker as bytes: the API spools them to a
+temp file and passes its path (SpooledFile); PDFs are then read through a
+read-only mmap and DOCX archives straight from the file.
+"""
+
+import asyncio
+import io
+import mmap
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+
+import PyPDF2
+from docx import Document
+from fastapi import HTTPException
+
+CV_EXTRACT_WORKERS = int(os.getenv("CV_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+CV_EXTRACT_MAX_PENDING = int(os.getenv("CV_EXTRACT_MAX_PENDING", "32"))
+CV_EXTRACT_PAGE_TIMEOUT = float(os.getenv("CV_EXTRACT_PAGE_TIMEOUT", "5"))
+CV_EXTRACT_TIMEOUT = float(os.getenv("CV_EXTRACT_TIMEOUT", "60"))
+# Runs on the shared pool for a document whose pool was torn down under it by another document's
+# hang; after that (or after a worker crash) it runs once more in a process of its own
+CV_EXTRACT_POOL_RETRIES = 2
+
+SUPPORTED_CV_EXTENSIONS = ('.pdf', '.doc', '.docx')
+
+
+class ExtractionTimeout(Exception):
+    """Raised inside a worker when a single page exceeds its time budget."""
+
+
+class ExtractionError(Exception):
+    """Raised inside a worker when the document cannot be read."""
+
+
+@dataclass(frozen=True)
+class SpooledFile:
+    """An upload spooled to disk; workers open it by path instead of receiving the bytes."""
+    path: str
+
+
+@contextmanager
+def _open_document(content: Union[bytes, SpooledFile], memory_map: bool) -> Iterator[BinaryIO]:
+    if not isinstance(content, SpooledFile):
+        yield io.BytesIO(content)
+        return
+    with open(content.path, "rb") as f:
+        # zipfile (DOCX) needs seekable(), which mmap lacks; it reads members lazily from the file anyway
+        if not memory_map:
+            yield f
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            yield view
+
+
+class _PageDeadline(BaseException):
+    """BaseException so PyPDF2's broad `except Exception` blocks cannot swallow it."""
+
+
+def _on_page_timeout(signum, frame):
+    raise _PageDeadline()
+
+
+def _extract_pdf(stream: BinaryIO, page_timeout: float) -> Tuple[str, List[Tuple[int, int]]]:
+    pdf_reader = PyPDF2.PdfReader(stream)
+    # Workers run tasks on their main thread, so SIGALRM can interrupt a slow page
+    use_alarm = hasattr(signal, "setitimer") and page_timeout > 0
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_page_timeout)
+
+    cv_text = ""
+    page_stats = []
+    for page_num, page in enumerate(pdf_reader.pages):
+        try:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, page_timeout)
+            text = page.extract_text()
+        except _PageDeadline:
+            raise ExtractionTimeout(f"Page {page_num + 1} took longer than {page_timeout:g}s to extract") from None
+        finally:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        if text:
+            cv_text += text + "\n"
+            page_stats.append((page_num + 1, len(text)))
+    return cv_text, page_stats
+
+
+def _extract_docx(stream: BinaryIO) -> Tuple[str, List[Tuple[int, int]]]:
+    doc = Document(stream)
+    cv_text = "\n".join([p.text for p in doc.paragraphs if p.text.strip()])
+    return cv_text, []
+
+
+def cv_extension(filename: Optional[str]) -> str:
+    """Lower-cased extension of an uploaded file name ("CV.PDF" -> ".pdf"); "" when it has none."""
+    return os.path.splitext(filename or "")[1].lower()
+
+
+def extract_text_sync(filename: str, content: Union[bytes, SpooledFile], page_timeout: float = CV_EXTRACT_PAGE_TIMEOUT) -> Tuple[str, List[Tuple[int, int]]]:
+    """Extract plain text from a PDF/DOCX. Returns (text, [(page_number, chars), ...])."""
+    try:
+        extension = cv_extension(filename)
+        if extension == '.pdf':
+            with _open_document(content, memory_map=True) as stream:
+                return _extract_pdf(stream, page_timeout)
+        if extension in ('.doc', '.docx'):
+            with _open_document(content, memory_map=False) as stream:
+                return _extract_docx(stream)
+        return "", []
+    except ExtractionTimeout:
+        raise
+    except Exception as e:
+        # Third-party parser exceptions are not always picklable across processes
+        raise ExtractionError(str(e)) from None
+
+
+class ExtractionPool:
+    """Bounded process pool with a queue-depth limit (503 when full)."""
+
+    def __init__(self, workers: int = CV_EXTRACT_WORKERS, max_pending: int = CV_EXTRACT_MAX_PENDING):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Bumped on every reset, so a task can tell a pool it saw break from its replacement
+        self._generation = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    @staticmethod
+    def _terminate(executor: ProcessPoolExecutor) -> None:
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _reset(self) -> None:
+        """Kill every worker (a hung one cannot be cancelled) and start fresh on next use."""
+        executor, self._executor = self._executor, None
+        self._generation += 1
+        if executor is not None:
+            self._terminate(executor)
+
+    async def _run(self, executor: ProcessPoolExecutor, filename: str, content: Union[bytes, SpooledFile]) -> Tuple[str, List[Tuple[int, int]]]:
+        future = asyncio.get_running_loop().run_in_executor(executor, extract_text_sync, filename, content, CV_EXTRACT_PAGE_TIMEOUT)
+        return await asyncio.wait_for(future, timeout=CV_EXTRACT_TIMEOUT)
+
+    async def _run_isolated(self, filename: str, content: Union[bytes, SpooledFile]) -> Tuple[str, List[Tuple[int, int]]]:
+        """One document in a process of its own: if it crashes or hangs, nothing else is affected."""
+        executor = ProcessPoolExecutor(max_workers=1)
+        try:
+            return await self._run(executor, filename, content)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=422, detail=f"CV extraction exceeded {CV_EXTRACT_TIMEOUT:g}s and was aborted")
+        finally:
+            self._terminate(executor)
+
+    async def _extract(self, filename: str, content: Union[bytes, SpooledFile]) -> Tuple[str, List[Tuple[int, int]]]:
+        for _ in range(CV_EXTRACT_POOL_RETRIES):
+            generation = self._generation
+            try:
+                return await self._run(self._get_executor(), filename, content)
+            except asyncio.TimeoutError:
+                self._reset()
+                raise HTTPException(status_code=422, detail=f"CV extraction exceeded {CV_EXTRACT_TIMEOUT:g}s and was aborted")
+            except BrokenProcessPool:
+                if self._generation != generation:
+                    # Torn down because another document hung; the pool is already replaced
+                    continue
+                # A worker crashed and any document in flight may have caused it: replace the pool and
+                # run this one on its own, so only the culprit fails again
+                self._reset()
+                return await self._run_isolated(filename, content)
+        return await self._run_isolated(filename, content)
+
+    async def extract(self, filename: str, content: Union[bytes, SpooledFile]) -> Tuple[str, List[Tuple[int, int]]]:
+        if self.pending >= self.max_pending:
+            raise HTTPException(
+                status_code=503,
+                detail="CV extraction queue is full, please retry shortly",
+                headers={"Retry-After": "5"}
+            )
+
+        self.pending += 1
+        try:
+            return await self._extract(filename, content)
+        except ExtractionTimeout as e:
+            raise HTTPException(status_code=422, detail=f"CV extraction aborted: {str(e)}")
+        except ExtractionError as e:
+            raise HTTPException(status_code=400, detail=f"Could not read CV file: {str(e)}")
+        except BrokenProcessPool:
+            raise HTTPException(
+                status_code=503,
+                detail="CV extraction worker crashed, please retry",
+                headers={"Retry-After": "1"}
+            )
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,295 @@
+"""
+Persistent background job queue for long parse / match requests.
+
+Jobs live in a SQLite table, so queued work survives restarts and is shared by
+every worker process on the host. A pool of asyncio workers claims jobs by
+priority lane (interactive before bulk), holding a lease that is renewed while
+the job runs; a job whose lease expires (crashed process) is picked up again.
+Identical submissions while a job is still queued or running return that job.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+from log_config import logger, request_id_var
+from metrics import current_endpoint
+
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", "86400"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+
+PRIORITIES = {"interactive": 0, "bulk": 10}
+_PRIORITY_NAMES = {value: name for name, value in PRIORITIES.items()}
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TERMINAL = (SUCCEEDED, FAILED)
+
+# (params, data) -> JSON-serialisable result; raise HTTPException to fail with a status code
+JobHandler = Callable[[dict, Optional[bytes]], Awaitable[Any]]
+
+
+class JobStore:
+    """SQLite-backed job table. All methods are blocking; JobQueue runs them in a thread."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, priority INTEGER NOT NULL, status TEXT NOT NULL, "
+            "dedup_key TEXT, params TEXT NOT NULL, data BLOB, result TEXT, error TEXT, status_code INTEGER, "
+            "attempts INTEGER NOT NULL DEFAULT 0, worker TEXT, lease_until REAL, "
+            "created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_claim ON jobs(status, priority, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_dedup ON jobs(dedup_key, status)")
+
+    def submit(self, kind: str, params: dict, data: Optional[bytes], priority: int, dedup_key: Optional[str]) -> tuple:
+        """Insert a job, or return the in-flight one with the same dedup_key. -> (job_id, deduplicated)"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if dedup_key:
+                    row = self._conn.execute(
+                        "SELECT id, priority FROM jobs WHERE dedup_key = ? AND status IN (?, ?) LIMIT 1",
+                        (dedup_key, QUEUED, RUNNING)
+                    ).fetchone()
+                    if row is not None:
+                        # An interactive duplicate of a queued bulk job moves it to the faster lane
+                        if priority < row["priority"]:
+                            self._conn.execute("UPDATE jobs SET priority = ? WHERE id = ?", (priority, row["id"]))
+                        self._conn.execute("COMMIT")
+                        return row["id"], True
+                job_id = uuid.uuid4().hex
+                self._conn.execute(
+                    "INSERT INTO jobs (id, kind, priority, status, dedup_key, params, data, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, kind, priority, QUEUED, dedup_key, json.dumps(params, ensure_ascii=False), data, time.time())
+                )
+                self._conn.execute("COMMIT")
+                return job_id, False
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def claim(self, worker: str) -> Optional[sqlite3.Row]:
+        """Take the next queued job (or one whose lease expired), highest priority first."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? OR (status = ? AND lease_until < ?) "
+                    "ORDER BY priority, created_at LIMIT 1",
+                    (QUEUED, RUNNING, now)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                if row["attempts"] >= JOB_MAX_ATTEMPTS:
+                    # Keeps crashing whatever runs it: give up instead of looping forever
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, status_code = 500, finished_at = ?, data = NULL WHERE id = ?",
+                        (FAILED, f"Gave up after {row['attempts']} attempts", now, row["id"])
+                    )
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, lease_until = ?, attempts = attempts + 1, started_at = ? WHERE id = ?",
+                    (RUNNING, worker, now + JOB_LEASE_SECONDS, now, row["id"])
+                )
+                self._conn.execute("COMMIT")
+                return row
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def renew(self, job_id: str, worker: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = ?",
+                (time.time() + JOB_LEASE_SECONDS, job_id, worker, RUNNING)
+            )
+
+    def finish(self, job_id: str, worker: str, result: Any = None, error: Optional[str] = None, status_code: int = 200) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, status_code = ?, finished_at = ?, lease_until = NULL, data = NULL "
+                "WHERE id = ? AND worker = ?",
+                (
+                    FAILED if error is not None else SUCCEEDED,
+                    None if result is None else json.dumps(result, ensure_ascii=False),
+                    error, status_code, time.time(), job_id, worker
+                )
+            )
+
+    def release(self, worker: str) -> int:
+        """Put this worker's running jobs back in the queue (graceful shutdown)."""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, lease_until = NULL, attempts = MAX(attempts - 1, 0) "
+                "WHERE worker = ? AND status = ?",
+                (QUEUED, worker, RUNNING)
+            ).rowcount
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, priority, status, result, error, status_code, attempts, created_at, started_at, finished_at "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            job = dict(row)
+            if job["status"] == QUEUED:
+                job["queue_position"] = self._conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = ? AND (priority < ? OR (priority = ? AND created_at < ?))",
+                    (QUEUED, row["priority"], row["priority"], row["created_at"])
+                ).fetchone()[0]
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {status: n for status, n in self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")}
+
+    def purge(self, older_than: float) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (SUCCEEDED, FAILED, older_than)
+            ).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JobQueue:
+    """Async facade: submit / get jobs and run the local worker pool."""
+
+    def __init__(self, store: JobStore, workers: int = JOB_WORKERS):
+        self.store = store
+        self.workers = max(1, workers)
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._handlers: Dict[str, JobHandler] = {}
+        self._tasks = []
+        self._wakeup = asyncio.Event()
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self._handlers[kind] = handler
+
+    async def submit(self, kind: str, params: dict, data: Optional[bytes] = None, priority: str = "interactive", dedup_key: Optional[str] = None) -> tuple:
+        if kind not in self._handlers:
+            raise ValueError(f"No handler for job kind {kind!r}")
+        if priority not in PRIORITIES:
+            raise HTTPException(status_code=422, detail=f"priority must be one of {', '.join(PRIORITIES)}")
+        job_id, deduplicated = await asyncio.to_thread(self.store.submit, kind, params, data, PRIORITIES[priority], dedup_key)
+        self._wakeup.set()
+        return job_id, deduplicated
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is not None:
+            job["priority"] = _PRIORITY_NAMES.get(job["priority"], job["priority"])
+        return job
+
+    async def stats(self) -> dict:
+        return {"workers": self.workers, "jobs": await asyncio.to_thread(self.store.counts)}
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._janitor()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        released = await asyncio.to_thread(self.store.release, self.worker_id)
+        if released:
+            logger.info("📥 Re-queued running jobs on shutdown", extra={"jobs": released})
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                row = await asyncio.to_thread(self.store.claim, self.worker_id)
+                if row is not None:
+                    await self._run(row)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # e.g. "database is locked": keep the worker alive, the job's lease brings it back
+                logger.exception("❌ Job worker error")
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+                continue
+            # Woken early by a local submit; other processes' submits are seen on the next poll
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self, row: sqlite3.Row) -> None:
+        job_id, kind = row["id"], row["kind"]
+        endpoint_token = current_endpoint.set(f"job:{kind}")
+        request_token = request_id_var.set(job_id[:16])
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        started = time.monotonic()
+        try:
+            try:
+                handler = self._handlers.get(kind)
+                if handler is None:
+                    raise HTTPException(status_code=500, detail=f"No handler for job kind {kind!r}")
+                outcome = (await handler(json.loads(row["params"]), row["data"]), None, 200)
+            except HTTPException as e:
+                outcome = (None, str(e.detail), e.status_code)
+                logger.warning("⚠️ Job failed", extra={"job_id": job_id, "kind": kind, "status_code": e.status_code, "error": str(e.detail)})
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                outcome = (None, str(e), 500)
+                logger.exception("❌ Job crashed", extra={"job_id": job_id, "kind": kind})
+            # A store error here reaches _worker; the job stays running until its lease expires and is run again
+            await asyncio.to_thread(self.store.finish, job_id, self.worker_id, *outcome)
+            if outcome[1] is None:
+                logger.info("✅ Job finished", extra={"job_id": job_id, "kind": kind, "seconds": round(time.monotonic() - started, 2)})
+        finally:
+            heartbeat.cancel()
+            request_id_var.reset(request_token)
+            current_endpoint.reset(endpoint_token)
+
+    async def _heartbeat(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                await asyncio.to_thread(self.store.renew, job_id, self.worker_id)
+            except sqlite3.Error:
+                # Retried on the next beat, well within the lease
+                logger.exception("❌ Job lease renewal failed", extra={"job_id": job_id})
+
+    async def _janitor(self) -> None:
+        while True:
+            try:
+                purged = await asyncio.to_thread(self.store.purge, time.time() - JOB_RESULT_TTL)
+                if purged:
+                    logger.info("🧹 Purged finished jobs", extra={"jobs": purged})
+            except sqlite3.Error:
+                logger.exception("❌ Purging finished jobs failed")
+            await asyncio.sleep(min(JOB_RESULT_TTL, 3600))
@@ -0,0 +1,134 @@
+"""
+Cheap local CV -> job ranking (Okapi BM25) used to pre-filter jobs before the LLM.
+
+Jobs are the documents (title weighted, requirements, mandatory requirements,
+description); the query is the set of distinct terms in the parsed CV fields
+plus the raw CV text.
+"""
+
+import math
+import os
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from text_utils import tokenize
+
+MATCH_PREFILTER_TOP_K = int(os.getenv("MATCH_PREFILTER_TOP_K", "10"))
+
+
+class BM25:
+    def __init__(self, documents: Sequence[List[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_freqs = [Counter(doc) for doc in documents]
+        self.doc_lens = [len(doc) for doc in documents]
+        self.avg_len = (sum(self.doc_lens) / len(documents)) if documents else 0.0
+
+        df: Counter = Counter()
+        for freqs in self.doc_freqs:
+            df.update(freqs.keys())
+        n = len(documents)
+        self.idf: Dict[str, float] = {
+            term: math.log(1 + (n - count + 0.5) / (count + 0.5)) for term, count in df.items()
+        }
+
+    def scores(self, query_terms: Sequence[str]) -> List[float]:
+        terms = [t for t in set(query_terms) if t in self.idf]
+        results = []
+        for freqs, length in zip(self.doc_freqs, self.doc_lens):
+            norm = self.k1 * (1 - self.b + self.b * length / self.avg_len) if self.avg_len else self.k1
+            score = 0.0
+            for term in terms:
+                tf = freqs.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            results.append(score)
+        return results
+
+
+def job_document(job) -> List[str]:
+    # Title counted twice: it is the strongest single signal for relevance
+    return (
+        tokenize(job.title) * 2
+        + tokenize(job.requirements or "")
+        + tokenize(job.mandatory_requirements or "")
+        + tokenize(job.description or "")
+    )
+
+
+def cv_query(cv_data, cv_text: str) -> List[str]:
+    parts = [
+        cv_data.education or "",
+        cv_data.university or "",
+        cv_data.experience or "",
+        " ".join(getattr(cv_data, "skills", None) or []),
+        getattr(cv_data, "summary", None) or "",
+        cv_text or "",
+    ]
+    return tokenize(" ".join(parts))
+
+
+def rank_jobs(jobs: Sequence, cv_data, cv_text: str) -> List[Tuple[object, float]]:
+    """All jobs with their BM25 score, best first (stable for ties)."""
+    if not jobs:
+        return []
+    bm25 = BM25([job_document(job) for job in jobs])
+    scores = bm25.scores(cv_query(cv_data, cv_text))
+    order = sorted(range(len(jobs)), key=lambda i: -scores[i])
+    return [(jobs[i], scores[i]) for i in order]
+
+
+def local_relevance(jobs: Sequence, cv_data, cv_text: str) -> Dict[str, float]:
+    """job id -> BM25 score relative to the best job (0..1)."""
+    ranked = rank_jobs(jobs, cv_data, cv_text)
+    top_score = (ranked[0][1] if ranked else 0.0) or 1.0
+    return {job.id: score / top_score for job, score in ranked}
+
+
+def prefilter_jobs(
+    jobs: Sequence,
+    cv_data,
+    cv_text: str,
+    top_k: Optional[int] = None,
+    primary_job_id: Optional[str] = None,
+) -> Tuple[List, List[dict]]:
+    """
+    Split jobs into (shortlist for the LLM, pre-screened match entries).
+
+    The primary job is always kept in the shortlist. Pre-screened entries carry
+    `pre_screened: True`, `match_score: None` (not scored by the AI, so not on its
+    0-100 scale) and the local relevance as `prefilter_score`, 0-100 relative to
+    the best local score.
+    """
+    k = MATCH_PREFILTER_TOP_K if top_k is None else top_k
+    if k <= 0 or len(jobs) <= k:
+        return list(jobs), []
+
+    ranked = rank_jobs(jobs, cv_data, cv_text)
+    shortlist = ranked[:k]
+    rest = ranked[k:]
+
+    if primary_job_id and all(job.id != primary_job_id for job, _ in shortlist):
+        for i, (job, score) in enumerate(rest):
+            if job.id == primary_job_id:
+                rest.append(shortlist[-1])
+                shortlist[-1] = rest.pop(i)
+                break
+        rest.sort(key=lambda pair: -pair[1])
+
+    top_score = ranked[0][1] or 1.0
+    pre_screened = [
+        {
+            "job_id": job.id,
+            "job_title": job.title,
+            "match_score": None,
+            "prefilter_score": int(round(100 * score / top_score)),
+            "local_score": round(score, 4),
+            "pre_screened": True,
+            "strengths": [],
+            "weaknesses": [],
+            "recommendation": "Chưa được AI đánh giá chi tiết - điểm từ bước sàng lọc cục bộ (pre-screened)."
+        }
+        for job, score in rest
+    ]
+    return [job for job, _ in shortlist], pre_screened
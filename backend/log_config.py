@@ -0,0 +1,197 @@
+"""
+Structured, non-blocking logging.
+
+Records are enqueued by the request path and written to stdout by a background
+listener thread, so a slow log pipe never stalls the event loop. Output is one
+JSON object per line (LOG_FORMAT=text for local development) carrying the
+request id; emails, phone numbers and name/contact fields are redacted unless
+LOG_REDACT_PII=false. Verbose per-CV statistics are logged with
+`extra={"sample": True}`; only a LOG_SAMPLE_RATE fraction of those records is kept.
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+LOG_REDACT_PII = os.getenv("LOG_REDACT_PII", "true").lower() in ("1", "true", "yes")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+REQUEST_ID_HEADER = "x-request-id"
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+logger = logging.getLogger("cv_api")
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RESERVED = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime", "request_id", "sample"}
+
+# CV file names usually carry the candidate's name ("CV - Nguyễn Văn A.pdf")
+_PII_KEYS = {"full_name", "name", "candidate", "email", "phone", "phone_number", "address", "file_name", "filename"}
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+# Vietnamese mobile/landline numbers and +country-code international numbers
+_PHONE_RE = re.compile(r"(?<!\d)(?:\+\d{1,3}[\s.-]?|0)\d{2,3}(?:[\s.-]?\d){6,8}(?!\d)")
+_REDACTED = "[redacted]"
+
+
+def redact(value: Any) -> Any:
+    if isinstance(value, str):
+        return _PHONE_RE.sub(_REDACTED, _EMAIL_RE.sub(_REDACTED, value))
+    if isinstance(value, dict):
+        return {k: (_REDACTED if k in _PII_KEYS and v else redact(v)) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(v) for v in value]
+    return value
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in record.__dict__.items() if key not in _RESERVED and not key.startswith("_")}
+
+
+class JSONFormatter(logging.Formatter):
+    def __init__(self, redact_pii: bool = LOG_REDACT_PII):
+        super().__init__()
+        self.redact_pii = redact_pii
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        if self.redact_pii:
+            entry = redact(entry)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self, redact_pii: bool = LOG_REDACT_PII):
+        super().__init__()
+        self.redact_pii = redact_pii
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = _extra_fields(record)
+        message = record.getMessage()
+        if self.redact_pii:
+            message, fields = redact(message), redact(fields)
+        line = f"{time.strftime('%H:%M:%S', time.localtime(record.created))} {record.levelname:<7} [{getattr(record, 'request_id', '-')}] {message}"
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+class ContextFilter(logging.Filter):
+    """Stamp the request id and apply sampling in the caller's context, before the record is queued."""
+
+    def __init__(self, sample_rate: float = LOG_SAMPLE_RATE):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "sample", False) and random.random() >= self.sample_rate:
+            return False
+        record.request_id = request_id_var.get()
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records when the queue is full instead of blocking."""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve message/traceback now; JSON formatting and redaction happen on the listener thread
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging() -> None:
+    """Install the queue handler on the app logger (idempotent)."""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JSONFormatter())
+
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+
+    logger.handlers[:] = [handler]
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestIDMiddleware:
+    """Pure ASGI middleware: take X-Request-ID from the client (or generate one) and echo it back."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == REQUEST_ID_HEADER.encode():
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex[:16]
+        token = request_id_var.set(request_id)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
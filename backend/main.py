@@ -1,31 +1,98 @@
 
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from starlette.formparsers import MultiPartParser
+from typing import AsyncIterator, Dict, List, Literal, Optional, Sequence, Tuple, Type, Union
+import asyncio
 import os
+import time
 from dotenv import load_dotenv
-import io
 import json
-import requests
-import PyPDF2
-from docx import Document
+import httpx
+
+from batch import CV_BATCH_CONCURRENCY, CV_BATCH_MAX_TOTAL_BYTES, read_batch_uploads, stream_batch_results
+from cache import ResultCache, build_cache_backend, content_key
+from candidate_ranking import MATCH_CANDIDATES_MAX, MATCH_CANDIDATES_SHORTLIST, Candidate, PreScore, pre_screened_entry, prescore_candidates
+from contact_extraction import extract_contact_fields
+from cv_chunking import CV_CHUNK_CHARS, CV_CHUNK_MAX_CHUNKS, chunk_cv, merge_parsed_chunks, select_relevant_text
+from extraction import SUPPORTED_CV_EXTENSIONS, ExtractionPool, SpooledFile, cv_extension
+from job_ranking import local_relevance, prefilter_jobs
+from mandatory_check import FAIL, NONE, PASS, MandatoryCheckResult, check_mandatory_requirements
+from job_queue import JOB_QUEUE_PATH, TERMINAL, JobQueue, JobStore
+from log_config import RequestIDMiddleware, logger, setup_logging, shutdown_logging
+from model_routing import FALLBACK_STATUSES, ModelRoute, get_route
+from resilience import OPENROUTER_RETRY_DEADLINE, CircuitOpenError
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, LLM_COALESCED, LLM_JSON_RECOVERIES, LLM_REQUESTS, MODEL_FALLBACKS, REGISTRY, MetricsMiddleware, current_endpoint, record_llm_failure, record_llm_usage, stage_timer
+from openrouter_client import OpenRouterClient
+from prompt_budget import BudgetReport, fit_jobs
+from prompts import PARSE_CV_SKILLS_LOCAL_NOTE, PROMPTS
+from singleflight import SingleFlight
+from skill_extraction import SKILL_EXTRACTION, SkillOntology, apply_skill_extraction
+from streaming import SSE_HEADERS, JSONFieldStream, MarkdownFenceStripper, sse_event
+from structured_output import JobDescriptionOutput, JobMatchOutput, MatchAnalysisOutput, ParsedCVOutput, build_repair_messages, json_schema_format, parse_json_tolerant, prune_incomplete, validate_output
+from token_count import count_tokens
+from uploads import CV_UPLOAD_MAX_BYTES, CV_UPLOAD_SPOOL_BYTES, CVUpload, UploadLimitMiddleware, read_cv_upload
+from vector_index import VECTOR_INDEX_DIR, VectorIndex, cv_fields, job_fields
 
 load_dotenv()
+setup_logging()
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+# Point at a local stand-in (python -m bench.fake_openrouter) for load tests
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
 
 if not OPENROUTER_API_KEY:
     raise ValueError("OPENROUTER_API_KEY not found in environment variables")
 
+# One pooled client per process, shared by all endpoints
+openrouter_client = OpenRouterClient(OPENROUTER_BASE_URL, OPENROUTER_API_KEY)
+# PDF/DOCX text extraction runs off the event loop in a bounded process pool
+extraction_pool = ExtractionPool()
+# Parsed CVs keyed on file bytes + prompt version + model (CV_CACHE_BACKEND=memory|sqlite|none)
+parse_cv_cache = ResultCache("parse_cv", build_cache_backend("CV_CACHE", "cv_cache.sqlite3"))
+# Generated interview questions / job descriptions keyed on request fields + model (GENERATE_CACHE_BACKEND=memory|sqlite|none)
+generate_cache = ResultCache("generate", build_cache_backend("GENERATE_CACHE", "generate_cache.sqlite3"))
+# Async parse / match jobs (SQLite-backed, survives restarts); handlers are registered with the job endpoints
+job_queue = JobQueue(JobStore(JOB_QUEUE_PATH))
+# Identical concurrent OpenRouter calls (double clicks, several users on one candidate) share one request
+LLM_SINGLE_FLIGHT = os.getenv("LLM_SINGLE_FLIGHT", "true").lower() in ("1", "true", "yes")
+llm_single_flight = SingleFlight()
+# Ask for JSON-schema constrained output (response_format); turn off for models that reject it
+LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "true").lower() in ("1", "true", "yes")
+# Canonical skills + aliases (skill_ontology.json), matched locally to normalise / complete the parsed skills
+skill_ontology = SkillOntology.load()
+# Hashed n-gram vectors of stored CVs and jobs for LLM-free similarity search (memory-mapped in VECTOR_INDEX_DIR)
+cv_index = VectorIndex(VECTOR_INDEX_DIR, "cvs")
+job_index = VectorIndex(VECTOR_INDEX_DIR, "jobs")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    PROMPTS.check_budgets()
+    job_queue.start()
+    yield
+    await job_queue.stop()
+    await openrouter_client.aclose()
+    extraction_pool.shutdown()
+    cv_index.close()
+    job_index.close()
+    shutdown_logging()
+
 app = FastAPI(
     title="CV Management API",
     description="API for parsing CVs and matching with jobs using OpenRouter AI",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# 413 for oversized CV uploads before their body is read (inside CORS so browsers can read it)
+app.add_middleware(UploadLimitMiddleware, paths=["/api/parse-cv", "/api/jobs/parse-cv"], max_bytes=CV_UPLOAD_MAX_BYTES)
+app.add_middleware(UploadLimitMiddleware, paths=["/api/parse-cv/batch"], max_bytes=CV_BATCH_MAX_TOTAL_BYTES)
+# Multipart files stay in memory up to the spool threshold, then go to a temp file
+MultiPartParser.max_file_size = CV_UPLOAD_SPOOL_BYTES
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -33,6 +100,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Per-endpoint request / stage / token metrics, exposed at GET /metrics
+app.add_middleware(MetricsMiddleware, known_paths=lambda: {route.path for route in app.routes})
+# Outermost: X-Request-ID correlation for logs (added last so it wraps the metrics middleware)
+app.add_middleware(RequestIDMiddleware)
 
 # ==================== MODELS ====================
 
@@ -44,6 +115,8 @@ class CVData(BaseModel):
     university: Optional[str] = None
     education: Optional[str] = None
     experience: Optional[str] = None
+    skills: Optional[List[str]] = None
+    summary: Optional[str] = None
 
 class JobData(BaseModel):
     id: str
@@ -63,6 +136,14 @@ class MatchCVJobsRequest(BaseModel):
     cv_data: CVData
     jobs: List[JobData]
     primary_job_id: Optional[str] = None
+    # Only the top-K jobs by local BM25 rank go to the LLM (None = MATCH_PREFILTER_TOP_K, 0 = off)
+    top_k: Optional[int] = None
+    # "batch" | "per_job" (None = MATCH_MODE)
+    mode: Optional[Literal["batch", "per_job"]] = None
+    # Deterministic mandatory-requirements check before the LLM (None = MATCH_LOCAL_MANDATORY_CHECK)
+    local_mandatory_check: Optional[bool] = None
+    # Jobs that clearly fail a degree / years-of-experience requirement are scored locally, without the LLM
+    skip_llm_on_mandatory_fail: bool = False
 
 class GenerateJobDescriptionRequest(BaseModel):
     title: str
@@ -72,6 +153,10 @@ class GenerateJobDescriptionRequest(BaseModel):
     job_type: Optional[str] = None
     language: str = "vietnamese"
     keywords: Optional[str] = None
+    # Server-Sent Events instead of a single JSON response
+    stream: bool = False
+    # Ignore the cached result and generate a fresh one (which then replaces it)
+    regenerate: bool = False
 
 class GenerateInterviewQuestionsRequest(BaseModel):
     job_id: str
@@ -84,783 +169,847 @@ class GenerateInterviewQuestionsRequest(BaseModel):
     requirements: Optional[str] = None
     mandatory_requirements: Optional[str] = None
     language: str = "vietnamese"
+    # Server-Sent Events instead of a single JSON response
+    stream: bool = False
+    # Ignore the cached result and generate a fresh one (which then replaces it)
+    regenerate: bool = False
+
+class CandidateCV(BaseModel):
+    # Caller's candidate id; indexing the same id again replaces the entry
+    id: str
+    cv_data: CVData
+    cv_text: str = ""
+
+class IndexCVsRequest(BaseModel):
+    candidates: List[CandidateCV]
+
+class IndexJobsRequest(BaseModel):
+    jobs: List[JobData]
+
+class SimilarCVsRequest(BaseModel):
+    # One result list per job, searched in a single batch
+    jobs: List[JobData]
+    top_k: int = 20
+
+class SimilarJobsRequest(BaseModel):
+    cvs: List[CVData]
+    top_k: int = 10
+
+class ExtractSkillsRequest(BaseModel):
+    text: str
+
+class MatchJobCandidatesRequest(BaseModel):
+    job: JobData
+    # Candidates stored with /api/index/cvs
+    candidate_ids: List[str] = []
+    # Parsed CVs sent inline (an id also given in candidate_ids uses this payload)
+    candidates: List[CandidateCV] = []
+    # Rank every CV in the index, plus any inline candidates
+    all_indexed: bool = False
+    # Best candidates by local score that go to the LLM (None = MATCH_CANDIDATES_SHORTLIST)
+    shortlist_size: Optional[int] = None
+    # Deterministic mandatory-requirements check (None = MATCH_LOCAL_MANDATORY_CHECK)
+    local_mandatory_check: Optional[bool] = None
+    # Server-Sent Events: the shortlist first, then each candidate as it is scored
+    stream: bool = False
 
 # ==================== HELPERS ====================
 
-def call_openrouter_api(messages: List[dict], model: str = "openai/gpt-4o-mini", temperature: float = 0.7, max_tokens: int = 4000) -> dict:
+async def call_openrouter_api(messages: List[dict], model: str = "openai/gpt-4o-mini", temperature: float = 0.7, max_tokens: int = 4000, timeout: Optional[float] = None, deadline: Optional[float] = None, response_format: Optional[dict] = None) -> dict:
+    """Non-streaming completion; concurrent identical calls (messages, model, sampling, format) are coalesced."""
+    async def send() -> dict:
+        return await request_openrouter_api(messages, model, temperature, max_tokens, timeout, deadline, response_format)
+    
+    if not LLM_SINGLE_FLIGHT:
+        return await send()
+    key = content_key(
+        "chat", model, repr(temperature), str(max_tokens),
+        json.dumps(messages, sort_keys=True, ensure_ascii=False),
+        json.dumps(response_format, sort_keys=True) if response_format else ""
+    )
+    result, shared = await llm_single_flight.do(key, send)
+    if shared:
+        LLM_COALESCED.inc(endpoint=current_endpoint.get(), model=model)
+    return result
+
+async def request_openrouter_api(messages: List[dict], model: str, temperature: float, max_tokens: int, timeout: Optional[float], deadline: Optional[float], response_format: Optional[dict] = None) -> dict:
     try:
-        response = requests.post(
-            f"{OPENROUTER_BASE_URL}/chat/completions",
-            headers={
-                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "http://localhost:8000",
-                "X-Title": "CV Management System"
-            },
-            json={
-                "model": model,
-                "messages": messages,
-                "temperature": temperature,
-                "max_tokens": max_tokens
-            },
-            timeout=60
-        )
+        with stage_timer("llm", model):
+            response = await openrouter_client.chat_completion(
+                messages=messages,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout=timeout,
+                deadline=deadline,
+                response_format=response_format
+            )
         
         if response.status_code != 200:
-            error_data = response.json()
+            try:
+                error_message = response.json().get('error', {}).get('message', 'Unknown error')
+            except ValueError:
+                error_message = response.text[:200] or 'Unknown error'
+            record_llm_failure(model, str(response.status_code))
             raise HTTPException(
                 status_code=response.status_code,
-                detail=f"OpenRouter API error: {error_data.get('error', {}).get('message', 'Unknown error')}"
+                detail=f"OpenRouter API error: {error_message}"
             )
         
-        return response.json()
+        result = response.json()
+        LLM_REQUESTS.inc(endpoint=current_endpoint.get(), model=model, outcome="success")
+        record_llm_usage(model, result.get('usage'))
+        return result
     
-    except requests.exceptions.Timeout:
+    except CircuitOpenError as e:
+        record_llm_failure(model, "circuit_open")
+        raise HTTPException(status_code=503, detail=f"OpenRouter unavailable: {e}", headers={"Retry-After": str(int(e.retry_after))})
+    except httpx.TimeoutException:
+        record_llm_failure(model, "timeout")
         raise HTTPException(status_code=504, detail="OpenRouter API timeout")
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
+        record_llm_failure(model, type(e).__name__)
         raise HTTPException(status_code=500, detail=f"Request error: {str(e)}")
 
-def extract_json_from_response(content: str) -> dict:
-    try:
-        return json.loads(content)
-    except json.JSONDecodeError:
-        if '```json' in content:
-            content = content.split('```json')[1].split('```')[0].strip()
-        elif '```' in content:
-            content = content.split('```')[1].split('```')[0].strip()
-        
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError as e:
-            raise HTTPException(status_code=500, detail=f"Failed to parse AI response as JSON: {str(e)}")
+def structured_format(output_model: Optional[Type[BaseModel]]) -> Optional[dict]:
+    return json_schema_format(output_model) if output_model is not None and LLM_STRUCTURED_OUTPUT else None
 
-# ==================== ENDPOINTS ====================
+def route_deadline(route: ModelRoute) -> float:
+    """Monotonic time by which the whole route (every model and retry) must have answered."""
+    return time.monotonic() + (route.deadline or OPENROUTER_RETRY_DEADLINE)
 
-@app.get("/")
-async def root():
-    return {"message": "CV Management API", "version": "1.0.0", "status": "running"}
-
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy", "openrouter_configured": bool(OPENROUTER_API_KEY)}
+def route_timeout(model: str) -> HTTPException:
+    record_llm_failure(model, "timeout")
+    return HTTPException(status_code=504, detail="OpenRouter API timeout")
 
-@app.post("/api/parse-cv")
-async def parse_cv(file: UploadFile = File(None), cv_file: UploadFile = File(None)):
+async def call_model_route(route: ModelRoute, messages: List[dict], output_model: Optional[Type[BaseModel]] = None) -> Tuple[dict, str]:
     """
-    ✅ ENHANCED VERSION - Comprehensive CV parsing with improved extraction
-    
-    Improvements:
-    - Experience: Extracted from summary, projects, achievements, not just "Experience" section
-    - Skills: Aggregated from all mentions throughout CV, deduplicated
-    - Education: Includes degrees, certifications, qualifications from all sections
+    Call the route's models in order until one answers; returns (result, model that served it).
+    Every model but the last is cut off after the route's latency budget; the last gets what is
+    left of the route's deadline. With `output_model` the reply is constrained to its JSON schema
+    (LLM_STRUCTURED_OUTPUT).
     """
+    models = route.candidates(messages)
+    response_format = structured_format(output_model)
+    deadline = route_deadline(route)
+    for index, model in enumerate(models):
+        last = index == len(models) - 1
+        limit = route.time_limit(deadline - time.monotonic(), last)
+        try:
+            try:
+                # The read timeout and retry deadline only bound single reads and the gaps between
+                # attempts; this bounds the model's wall-clock time
+                async with asyncio.timeout(limit):
+                    result = await call_openrouter_api(
+                        messages=messages,
+                        model=model,
+                        temperature=route.temperature,
+                        max_tokens=route.max_tokens,
+                        timeout=limit,
+                        deadline=limit,
+                        response_format=response_format
+                    )
+            except TimeoutError:
+                raise route_timeout(model)
+            return result, model
+        except HTTPException as e:
+            if last or e.status_code not in FALLBACK_STATUSES:
+                raise
+            MODEL_FALLBACKS.inc(endpoint=current_endpoint.get(), route=route.name, model=model)
+            logger.warning("↪️ Falling back to the next model", extra={"route": route.name, "model": model, "status": e.status_code})
+
+JSON_REPAIR_ROUTE = get_route("json_repair")
+
+async def parse_llm_json(content: str, output_model: Type[BaseModel], model: str = "") -> Tuple[dict, str]:
+    """
+    Parse and validate an AI reply against `output_model`. Returns (data, status):
+    "ok", "recovered" (truncated; only complete values kept) or "repaired" (fixed by a
+    short repair call that sends the broken reply and the schema, not the original prompt).
+    """
+    with stage_timer("json_repair", model):
+        try:
+            data, recovered = parse_json_tolerant(content)
+            if recovered:
+                data = prune_incomplete(data, output_model)
+            data = validate_output(output_model, data)
+            if recovered:
+                LLM_JSON_RECOVERIES.inc(endpoint=current_endpoint.get(), model=model, outcome="recovered")
+            return data, "recovered" if recovered else "ok"
+        except ValueError as e:
+            error = str(e)
+    
+    logger.warning("🩹 Invalid AI JSON, requesting a repair", extra={"model": model, "schema": output_model.__name__, "error": error[:200]})
+    result, repair_model = await call_model_route(JSON_REPAIR_ROUTE, build_repair_messages(content, output_model, error), output_model)
     try:
-        upload_file = file if file else cv_file
-        
-        if not upload_file:
-            raise HTTPException(status_code=422, detail="No file provided")
-        
-        print(f"\n📄 ===== CV PARSING START (ENHANCED) =====")
-        print(f"📁 File: {upload_file.filename}")
-        
-        if not upload_file.filename.endswith(('.pdf', '.doc', '.docx')):
-            raise HTTPException(status_code=400, detail="Unsupported file format")
-        
-        file_content = await upload_file.read()
-        if not file_content:
-            raise HTTPException(status_code=400, detail="File is empty")
-        
-        print(f"📦 File size: {len(file_content)/1024:.2f} KB")
-        
-        cv_text = ""
-        
-        if upload_file.filename.endswith('.pdf'):
-            print("📖 Parsing PDF...")
-            pdf_file = io.BytesIO(file_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            for page_num, page in enumerate(pdf_reader.pages):
-                text = page.extract_text()
-                if text:
-                    cv_text += text + "\n"
-                    print(f"  ✓ Page {page_num + 1}: {len(text)} chars")
-        
-        elif upload_file.filename.endswith(('.doc', '.docx')):
-            print("📖 Parsing DOCX...")
-            doc_file = io.BytesIO(file_content)
-            doc = Document(doc_file)
-            cv_text = "\n".join([p.text for p in doc.paragraphs if p.text.strip()])
-        
-        if not cv_text.strip():
-            raise HTTPException(status_code=400, detail="Could not extract text from CV")
-        
-        print(f"✅ Extracted {len(cv_text)} characters")
-        
-        ai_input_text = cv_text[:4000] if len(cv_text) > 4000 else cv_text
-        
-        print(f"🤖 Calling OpenRouter AI with ENHANCED prompt...")
-        
-        # ✅ ENHANCED PROMPT - Comprehensive extraction from entire CV
-        messages = [
-            {
-                "role": "system", 
-                "content": """You are an expert CV parser with deep understanding of resume formats and recruitment practices.
-
-CORE PRINCIPLES:
-1. Extract information from ENTIRE CV, not just labeled sections
-2. Look for implicit mentions and context clues
-3. Aggregate information from multiple sources
-4. Deduplicate and organize information logically
-5. Return ONLY valid JSON with no markdown formatting"""
-            },
-            {
-                "role": "user", 
-                "content": f"""Parse this CV comprehensively and extract ALL relevant information from every section:
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-CV CONTENT:
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-{ai_input_text}
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-COMPREHENSIVE EXTRACTION GUIDELINES:
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-1. FULL NAME:
-   - Usually at the very top (first 3-5 lines)
-   - Format: 2-5 capitalized words
-   - Exclude: email, phone, addresses, titles
-   - Example: "JOHN MICHAEL DOE" or "Nguyễn Văn An"
-
-2. CONTACT INFORMATION:
-   📧 EMAIL: xxx@domain.com format
-   📱 PHONE: Various formats (+84, 0, international codes)
-   📍 ADDRESS: Full or partial address, city, country
-
-3. EDUCATION & QUALIFICATIONS - ⚠️ COMPREHENSIVE EXTRACTION:
-   
-   ✅ Extract from ALL these sources:
-   
-   A. Traditional "Education" section:
-      - University/College name and location
-      - Degree (Bachelor's, Master's, PhD, Associate, Diploma)
-      - Major/Field of study
-      - GPA if mentioned
-      - Graduation year or attendance period
-      - Academic achievements, honors
-   
-   B. Certifications & Licenses (often separate section or mixed with education):
-      - Professional certifications (AWS Certified, PMP, Google Analytics, etc.)
-      - Industry certifications (CompTIA, Cisco, Microsoft, etc.)
-      - Language certifications (IELTS, TOEFL, HSK, JLPT)
-      - Training certificates
-      - Online course completions (Coursera, Udemy certificates if mentioned)
-      - Professional licenses (CPA, PE, Medical licenses)
-   
-   C. Scattered qualifications throughout CV:
-      - In Summary/Profile: "MBA graduate", "Certified Developer"
-      - In Experience: "Completed X certification while working"
-      - In Skills: "AWS Certified Solutions Architect"
-      - Footer or header notes about credentials
-   
-   D. Academic background indicators:
-      - Coursework mentions
-      - Research projects
-      - Thesis or dissertation titles
-      - Academic publications
-   
-   COMBINE ALL into comprehensive "education" field:
-   - Start with formal degrees (most recent first)
-   - Then add certifications and licenses
-   - Include completion dates when available
-   - Mention GPA, honors, relevant coursework
-   - Format naturally as a paragraph or organized list
-   
-   Example output:
-   "Bachelor of Science in Computer Science, Stanford University (2018-2022), GPA: 3.8/4.0, Magna Cum Laude. 
-   AWS Certified Solutions Architect Professional (2023). 
-   Google Cloud Professional Data Engineer (2023). 
-   IELTS Academic: 7.5 (2022). 
-   Completed Advanced Machine Learning Specialization, Coursera (2023)."
-
-4. UNIVERSITY (Specific institution name):
-   - Extract the primary university/college name
-   - Example: "Stanford University" or "Đại học Bách Khoa Hà Nội"
-   - If multiple institutions, use the most recent or highest degree institution
-
-5. EXPERIENCE - ⚠️ COMPREHENSIVE EXTRACTION:
-   
-   ✅ Extract from ALL these sources:
-   
-   A. Traditional "Experience" / "Work History" section:
-      - Job titles, company names, dates
-      - Responsibilities and achievements
-      - Technologies and tools used
-      - Team size, leadership roles
-      - Measurable results (increased by X%, reduced by Y)
-   
-   B. Summary/Objective/Profile (top of CV):
-      - Years of experience mentioned: "5+ years in software development"
-      - Industry expertise: "specialized in fintech applications"
-      - Leadership experience: "led cross-functional teams"
-      - Key achievements highlighted
-   
-   C. Projects section:
-      - Personal projects with technologies used
-      - Academic projects demonstrating skills
-      - Freelance work
-      - Open-source contributions
-   
-   D. Achievements/Awards section:
-      - Professional accomplishments
-      - Recognition and awards that indicate experience level
-   
-   E. Volunteer work and internships:
-      - Relevant volunteer experience
-      - Internship experiences
-   
-   COMBINE ALL mentions into ONE comprehensive experience narrative:
-   - Preserve chronological sense where possible
-   - Include summary statements about total years of experience
-   - Mention specific companies, roles, and durations
-   - Highlight key technologies, achievements, and responsibilities
-   - Keep quantifiable results (percentages, numbers, metrics)
-   
-   Example output:
-   "Experienced software engineer with 6+ years building scalable web applications. 
-   Senior Full-Stack Developer at TechCorp Inc. (2021-2024): Led team of 5 developers, 
-   architected microservices handling 1M+ daily requests, reduced API latency by 40%. 
-   Software Developer at StartupXYZ (2018-2021): Developed e-commerce platform using 
-   MERN stack serving 50K+ users, implemented CI/CD pipeline reducing deployment time by 60%. 
-   Personal Projects: Built open-source React component library with 2K+ GitHub stars, 
-   developed mobile app using React Native with 10K+ downloads."
-
-6. SKILLS - ⚠️ COMPREHENSIVE EXTRACTION & AGGREGATION:
-   
-   ✅ Extract from ALL these sources:
-   
-   A. Traditional "Skills" / "Technical Skills" section
-   B. Experience descriptions (technologies mentioned in job descriptions)
-   C. Projects section (frameworks and tools used)
-   D. Education section (programming languages taught, tools learned)
-   E. Summary/Profile (self-described expertise)
-   F. Certifications (implies proficiency in certified technology)
-   G. Tools/Technologies subsections
-   
-   What to capture:
-   - Programming languages: JavaScript, Python, Java, C++, etc.
-   - Frameworks & libraries: React, Vue, Django, Spring Boot, etc.
-   - Databases: MySQL, PostgreSQL, MongoDB, Redis, etc.
-   - Cloud platforms: AWS, Azure, GCP, Heroku, etc.
-   - DevOps tools: Docker, Kubernetes, Jenkins, CI/CD, etc.
-   - Design tools: Figma, Photoshop, Sketch, etc.
-   - Soft skills IF clearly stated: Leadership, Communication, Agile, etc.
-   - Domain expertise: Machine Learning, Data Science, DevOps, etc.
-   - Methodologies: Agile, Scrum, TDD, Microservices, etc.
-   
-   CRITICAL: 
-   - Aggregate ALL skill mentions from entire CV
-   - DEDUPLICATE (remove duplicates)
-   - Normalize similar terms: "nodejs" = "Node.js", "reactjs" = "React"
-   - Return as ARRAY of distinct skill strings
-   - Preserve proper capitalization: "JavaScript" not "javascript"
-   
-   Example output:
-   ["JavaScript", "TypeScript", "React", "Node.js", "Python", "Django", 
-   "PostgreSQL", "MongoDB", "AWS", "Docker", "Kubernetes", "Git", "CI/CD", 
-   "Agile", "Microservices", "REST API", "GraphQL", "Machine Learning", 
-   "TensorFlow", "Leadership", "Team Management"]
-
-7. SUMMARY/PROFILE:
-   - Usually at top of CV
-   - Section headers: "Summary", "Objective", "Profile", "About Me", "Professional Summary"
-   - Brief overview of career (typically 50-200 words)
-   - Career goals, highlights, key strengths
-   - If no explicit summary section exists, leave as null
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-RETURN THIS EXACT JSON STRUCTURE:
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-{{
-  "full_name": "string or null",
-  "email": "string or null",
-  "phone_number": "string or null",
-  "address": "string or null",
-  "university": "string or null",
-  "education": "COMPREHENSIVE education including degrees, certifications, licenses, courses - combined from all sections",
-  "experience": "COMPREHENSIVE experience from ALL sources - summary mentions + work history + projects + achievements",
-  "skills": ["skill1", "skill2", "skill3", ...] or [],
-  "summary": "string or null"
-}}
+        data, _ = parse_json_tolerant(result['choices'][0]['message']['content'])
+        data = validate_output(output_model, data)
+    except ValueError as e:
+        LLM_JSON_RECOVERIES.inc(endpoint=current_endpoint.get(), model=repair_model, outcome="failed")
+        raise HTTPException(status_code=500, detail=f"Failed to parse AI response as JSON: {str(e)}")
+    LLM_JSON_RECOVERIES.inc(endpoint=current_endpoint.get(), model=repair_model, outcome="repaired")
+    return data, "repaired"
+
+async def extract_cv_text(filename: str, file_content: Union[bytes, SpooledFile]) -> str:
+    """Extract CV text in the extraction process pool (raises 503 when the queue is full)."""
+    logger.debug("📖 Parsing %s", "PDF" if cv_extension(filename) == '.pdf' else "DOCX")
+    with stage_timer("extraction"):
+        cv_text, page_stats = await extraction_pool.extract(filename, file_content)
+    
+    if page_stats:
+        logger.info("📄 Page statistics", extra={"sample": True, "page_chars": [chars for _, chars in page_stats]})
+    
+    return cv_text
+
+PARSE_CV_ROUTE = get_route("parse_cv")
+# Bump whenever the parse prompt changes so cached results are not reused
+PARSE_CV_PROMPT_VERSION = (
+    "2.1-chunked"
+    + ("" if PROMPTS.variant == "full" else f"-{PROMPTS.variant}")
+    + ("-skills-local" if SKILL_EXTRACTION == "local" else "")
+)
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-CRITICAL REMINDERS:
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+def build_parse_cv_messages(ai_input_text: str) -> List[dict]:
+    # ✅ ENHANCED PROMPT - Comprehensive extraction from entire CV (text in prompts.py)
+    user_prompt = PROMPTS["parse_cv_user"].render(cv_text=ai_input_text)
+    if SKILL_EXTRACTION == "local":
+        user_prompt += PARSE_CV_SKILLS_LOCAL_NOTE
+    return [
+        {"role": "system", "content": PROMPTS["parse_cv_system"].render()},
+        {"role": "user", "content": user_prompt}
+    ]
+
+def with_local_skills(parsed_data: dict) -> dict:
+    """Skills canonicalised / completed from the ontology; applied on the way out, so the cache keeps the LLM result."""
+    with stage_timer("skill_extraction"):
+        return apply_skill_extraction(parsed_data, parsed_data.get('fullText') or "", skill_ontology)
+
+def parse_cv_cache_key(upload: CVUpload) -> str:
+    # The file's SHA-256 stands in for its bytes, so spooled uploads are never read back whole
+    return content_key(upload.sha256, PARSE_CV_PROMPT_VERSION, ",".join(PARSE_CV_ROUTE.models))
+
+async def parse_cv_content(upload: CVUpload, bypass_cache: bool = False) -> Tuple[dict, str, str]:
+    """
+    Extract text and run the LLM parse for one CV file. Shared by the single and batch endpoints.
+    
+    Returns (parsed_data, cache_status, model) with cache_status one of "hit", "miss", "bypass",
+    "disabled" and model the one(s) that served the parse (comma-separated if chunks fell back).
+    """
+    cache_key = parse_cv_cache_key(upload)
+    cache_status = "bypass" if bypass_cache else ("miss" if parse_cv_cache.enabled else "disabled")
+    
+    cached = await parse_cv_cache.get(cache_key, bypass=bypass_cache)
+    if cached is not None:
+        logger.info("⚡ Cache hit, skipping extraction and AI call", extra={"cache_key": cache_key[:12]})
+        return with_local_skills(cached["data"]), "hit", cached["model"]
+    
+    cv_text = await extract_cv_text(upload.filename, upload.source)
+    
+    if not cv_text.strip():
+        raise HTTPException(status_code=400, detail="Could not extract text from CV")
+    
+    logger.info("✅ Extracted CV text", extra={"chars": len(cv_text)})
+    
+    # Long CVs are split on section boundaries and every chunk is parsed concurrently
+    chunks = chunk_cv(cv_text, CV_CHUNK_CHARS)
+    if len(chunks) > CV_CHUNK_MAX_CHUNKS:
+        logger.warning("⚠️ Too many chunks, only the first %d are parsed", CV_CHUNK_MAX_CHUNKS, extra={"chunks": len(chunks)})
+        chunks = chunks[:CV_CHUNK_MAX_CHUNKS]
+    
+    logger.debug("🤖 Calling OpenRouter AI with ENHANCED prompt", extra={"chunks": len(chunks)})
+    
+    with stage_timer("prompt_build", PARSE_CV_ROUTE.primary):
+        chunk_messages = [build_parse_cv_messages(chunk) for chunk in chunks]
+    
+    results = await asyncio.gather(*[call_model_route(PARSE_CV_ROUTE, messages, ParsedCVOutput) for messages in chunk_messages])
+    served_model = ",".join(dict.fromkeys(model for _, model in results))
+    
+    logger.debug("✅ OpenRouter responded", extra={"model": served_model})
+    
+    chunk_data = await asyncio.gather(*[
+        parse_llm_json(result['choices'][0]['message']['content'], ParsedCVOutput, model) for result, model in results
+    ])
+    parsed_data = merge_parsed_chunks([data for data, _ in chunk_data])
+    parsed_data['fullText'] = cv_text
+    result = with_local_skills(parsed_data)
+    
+    # ✅ Log extraction statistics (sampled; presence flags only, never the contact details themselves)
+    logger.info("📊 Extraction statistics", extra={
+        "sample": True,
+        "has_name": bool(result.get('full_name')),
+        "has_email": bool(result.get('email')),
+        "has_phone": bool(result.get('phone_number')),
+        "skills_count": len(result.get('skills') or []),
+        "skills_from_llm": len(parsed_data.get('skills') or []),
+        "skills_preview": (result.get('skills') or [])[:10],
+        "experience_chars": len(str(result.get('experience') or '')),
+        "education_chars": len(str(result.get('education') or '')),
+        "has_university": bool(result.get('university'))
+    })
+    
+    await parse_cv_cache.set(cache_key, {"data": parsed_data, "model": served_model})
+    return result, cache_status, served_model
+
+def parse_cv_response(filename: str, parsed_data: dict, cache_status: str, model: str) -> dict:
+    return {
+        "success": True,
+        "data": parsed_data,
+        "message": "CV parsed successfully with enhanced comprehensive extraction",
+        "metadata": {
+            "model": model,
+            "filename": filename,
+            "enhanced_prompt": True,
+            "version": PARSE_CV_PROMPT_VERSION,
+            "cache": cache_status,
+            "skill_extraction": SKILL_EXTRACTION,
+            "skill_ontology_version": skill_ontology.version
+        }
+    }
 
-✅ EDUCATION: Include degrees + certifications + licenses + training from ENTIRE CV
-✅ EXPERIENCE: Scan ENTIRE CV including summary, projects, achievements
-✅ SKILLS: Aggregate from ALL sections, deduplicate, normalize
-✅ Preserve original language (Vietnamese or English as written)
-✅ Return valid JSON only, no markdown, no extra text, no explanations
-✅ If field not found after thorough search, use null or []
-✅ Be thorough - scan every section, every paragraph for relevant information"""
-            }
-        ]
-        
-        result = call_openrouter_api(
-            messages=messages, 
-            model="openai/gpt-4o-mini", 
-            temperature=0.3,  # Low temperature for consistency
-            max_tokens=2000
-        )
-        
-        print(f"✅ OpenRouter responded")
-        
-        content = result['choices'][0]['message']['content']
-        parsed_data = extract_json_from_response(content)
-        parsed_data['fullText'] = cv_text
-        
-        # ✅ Log extraction statistics
-        print(f"📊 Extraction Statistics:")
-        print(f"  ├─ Name: {parsed_data.get('full_name', 'N/A')}")
-        print(f"  ├─ Email: {parsed_data.get('email', 'N/A')}")
-        print(f"  ├─ Skills extracted: {len(parsed_data.get('skills', []))} skills")
-        print(f"  ├─ Experience length: {len(str(parsed_data.get('experience', '')))} chars")
-        print(f"  ├─ Education length: {len(str(parsed_data.get('education', '')))} chars")
-        print(f"  └─ University: {parsed_data.get('university', 'N/A')}")
-        
-        if parsed_data.get('skills'):
-            print(f"  └─ Skills preview: {', '.join(parsed_data.get('skills', [])[:10])}...")
-        
-        print(f"===== CV PARSING END (ENHANCED) =====\n")
-        
-        return {
-            "success": True,
-            "data": parsed_data,
-            "message": "CV parsed successfully with enhanced comprehensive extraction",
-            "metadata": {
-                "model": "gpt-4o-mini",
-                "filename": upload_file.filename,
-                "enhanced_prompt": True,
-                "version": "2.0-comprehensive"
-            }
+async def quick_parse_cv(upload: CVUpload, bypass_cache: bool = False, full_parse: bool = True) -> dict:
+    """
+    Contact fields (name, email, phone) and ontology skills straight from the text, without the LLM.
+    
+    A cached full parse is returned as is; otherwise the full parse is queued as a background job
+    (same dedup key as /api/jobs/parse-cv) whose status / events URLs are in the metadata.
+    """
+    started = time.perf_counter()
+    if not bypass_cache:
+        cached = await parse_cv_cache.get(parse_cv_cache_key(upload))
+        if cached is not None:
+            logger.info("⚡ Quick parse served from the full-parse cache")
+            return parse_cv_response(upload.filename, with_local_skills(cached["data"]), "hit", cached["model"])
+    
+    extraction_started = time.perf_counter()
+    cv_text = await extract_cv_text(upload.filename, upload.source)
+    if not cv_text.strip():
+        raise HTTPException(status_code=400, detail="Could not extract text from CV")
+    
+    # Text extraction dominates (PyPDF2 font maps); the local steps below take about half a millisecond
+    local_started = time.perf_counter()
+    with stage_timer("quick_parse"):
+        contacts = extract_contact_fields(cv_text)
+        skills = skill_ontology.extract(cv_text) if SKILL_EXTRACTION != "off" else []
+    local_ms = (time.perf_counter() - local_started) * 1000
+    
+    background = None
+    if full_parse:
+        job_id, deduplicated = await queue_parse_cv_job(upload, bypass_cache)
+        background = {
+            "job_id": job_id,
+            "deduplicated": deduplicated,
+            "status_url": f"/api/jobs/{job_id}",
+            "events_url": f"/api/jobs/{job_id}/events"
         }
     
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"❌ Error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error parsing CV: {str(e)}")
+    logger.info("⚡ Quick parse done", extra={
+        "has_name": bool(contacts.full_name),
+        "has_email": bool(contacts.email),
+        "has_phone": bool(contacts.phone_number),
+        "skills_count": len(skills),
+        "full_parse_queued": background is not None
+    })
+    return {
+        "success": True,
+        "data": {**contacts.to_dict(), "skills": skills, "fullText": cv_text},
+        "message": "Contact fields extracted locally; full parse " + ("queued" if background else "not requested"),
+        "metadata": {
+            "mode": "quick",
+            "filename": upload.filename,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "extraction_ms": round((local_started - extraction_started) * 1000, 1),
+            "local_ms": round(local_ms, 2),
+            "skill_ontology_version": skill_ontology.version,
+            "full_parse": background
+        }
+    }
+
+MATCH_ROUTE = get_route("match")  # ✅ temperature 0.2 cho consistent hơn
+MATCH_SINGLE_ROUTE = get_route("match_single")
+# "batch" = one prompt scoring every job, "per_job" = one concurrent request per job
+MATCH_MODE = os.getenv("MATCH_MODE", "batch")
+MATCH_FANOUT_CONCURRENCY = int(os.getenv("MATCH_FANOUT_CONCURRENCY", "8"))
+# Off by default: it changes match results, so clients opt in (or per request with local_mandatory_check)
+MATCH_LOCAL_MANDATORY_CHECK = os.getenv("MATCH_LOCAL_MANDATORY_CHECK", "false").lower() in ("1", "true", "yes")
+
+# ==================== SYSTEM PROMPT (FIXED VERSION) ====================
+# Static and byte-identical across requests and modes so the shared prefix is reused (text in prompts.py)
+MATCH_SYSTEM_PROMPT = PROMPTS["match_system"].render()
+# When mandatory requirements were already checked locally, BƯỚC 1 only says how to use the verdict
+MATCH_SYSTEM_PROMPT_VERIFIED = PROMPTS["match_system_verified"].render()
+
+def format_mandatory_check(result: MandatoryCheckResult) -> str:
+    """Prompt block with the local verdict for each mandatory clause."""
+    lines = ["🧪 KẾT QUẢ KIỂM TRA BẮT BUỘC (hệ thống đã xác minh):"]
+    for check in result.checks:
+        if check.status == PASS:
+            evidence = "; ".join(f'"{e.text}"' for e in check.evidence[:3])
+            lines.append(f"- {check.requirement} → ĐÁP ỨNG ✅ (bằng chứng: {evidence})")
+        elif check.status == FAIL:
+            lines.append(f"- {check.requirement} → KHÔNG ĐÁP ỨNG ❌ (thiếu: {', '.join(check.missing)})")
+        else:
+            lines.append(f"- {check.requirement} → CHƯA XÁC MINH ⚠️")
+    return "\n".join(lines) + "\n\n"
 
-@app.post("/api/match-cv-jobs")
-async def match_cv_jobs(request: MatchCVJobsRequest):
+def apply_mandatory_verdict(match: dict, result: Optional[MandatoryCheckResult]) -> dict:
     """
-    ✅ OPTIMIZED VERSION: Match CV with multiple job positions using AI analysis
-    🔧 Fixed: Mandatory requirements strict matching logic
+    Attach the local verdict. Only a decisive FAIL (degree / years of experience) is enforced:
+    it caps the score at 50 and is listed in weaknesses. Skill FAILs rest on alias tables and
+    are only reported.
     """
-    try:
-        print(f"\n🎯 ===== CV-JOB MATCHING START =====")
-        print(f"👤 CV: {request.cv_data.full_name}")
-        print(f"📋 Jobs to match: {len(request.jobs)}")
-        if request.primary_job_id:
-            print(f"⭐ Primary job: {request.primary_job_id}")
-        
-        # ==================== BUILD CV CONTEXT ====================
-        cv_context = f"""
-📋 ỨNG VIÊN PROFILE
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-👤 THÔNG TIN CƠ BẢN:
-Họ tên: {request.cv_data.full_name}
-Email: {request.cv_data.email}
-Số điện thoại: {request.cv_data.phone_number or 'Không có'}
-Địa chỉ: {request.cv_data.address or 'Không có'}
-
-🎓 HỌC VẤN:
-Trường: {request.cv_data.university or 'Không có thông tin'}
-Bằng cấp: {request.cv_data.education or 'Không có thông tin'}
-
-💼 KINH NGHIỆM:
-{request.cv_data.experience or 'Không có thông tin'}
-
-📄 CV FULL TEXT (3500 ký tự đầu - dùng để tìm bằng chứng bổ sung):
-{request.cv_text[:3500]}
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-"""
-        
+    if result is None or result.status == NONE:
+        return match
+    match['mandatory_check'] = result.to_dict()
+    if result.decisive_fail:
+        match['match_score'] = min(match.get('match_score', 0) or 0, 50)
+        weaknesses = match.setdefault('weaknesses', [])
+        for check in result.failed:
+            if not any(check.requirement in w for w in weaknesses):
+                weaknesses.insert(0, f"❌ Không đáp ứng yêu cầu bắt buộc: {check.requirement}")
+    return match
+
+def local_mandatory_fail_match(job: JobData, result: MandatoryCheckResult, relevance: float) -> dict:
+    """Entry for a job skipped by the LLM because it clearly fails a mandatory requirement."""
+    missing = "; ".join(check.requirement for check in result.failed)
+    return apply_mandatory_verdict({
+        "job_id": job.id,
+        "job_title": job.title,
+        "match_score": int(round(50 * relevance)),
+        "strengths": [],
+        "weaknesses": [],
+        "recommendation": f"Ứng viên KHÔNG ĐỦ ĐIỀU KIỆN do thiếu yêu cầu bắt buộc: {missing}. Job này được loại ở bước kiểm tra cục bộ, không qua AI đánh giá chi tiết.",
+        "skipped_llm": True
+    }, result)
+
+MATCH_CV_TEXT_CHARS = 3500
+# Max input tokens per match prompt (counted locally); job fields are trimmed to fit, 0 = no limit
+MATCH_INPUT_TOKEN_BUDGET = int(os.getenv("MATCH_INPUT_TOKEN_BUDGET", "12000"))
+
+def build_match_cv_context(cv_data: CVData, cv_text: str, jobs: Sequence[JobData] = ()) -> str:
+    # Long CVs: send the sections most relevant to these jobs instead of the first 3500 chars
+    excerpt = select_relevant_text(
+        cv_text,
+        [" ".join(filter(None, [job.title, job.requirements, job.mandatory_requirements, job.description])) for job in jobs],
+        MATCH_CV_TEXT_CHARS
+    ) if jobs else None
+    if excerpt is None:
+        cv_text_label = f"CV FULL TEXT ({MATCH_CV_TEXT_CHARS} ký tự đầu - dùng để tìm bằng chứng bổ sung)"
+        excerpt = cv_text[:MATCH_CV_TEXT_CHARS]
+    else:
+        cv_text_label = f"CV FULL TEXT (các phần liên quan nhất, tối đa {MATCH_CV_TEXT_CHARS} ký tự - dùng để tìm bằng chứng bổ sung)"
+    
+    return PROMPTS["match_cv_context"].render(
+        full_name=cv_data.full_name,
+        email=cv_data.email,
+        phone_number=cv_data.phone_number or 'Không có',
+        address=cv_data.address or 'Không có',
+        university=cv_data.university or 'Không có thông tin',
+        education=cv_data.education or 'Không có thông tin',
+        experience=cv_data.experience or 'Không có thông tin',
+        cv_text_label=cv_text_label,
+        excerpt=excerpt
+    )
+
+def build_match_job_text(idx: int, job: JobData, primary_job_id: Optional[str], mandatory_check: Optional[MandatoryCheckResult] = None) -> str:
+    is_primary = "⭐ PRIMARY (Ứng viên đã apply)" if job.id == primary_job_id else ""
+    verdict = format_mandatory_check(mandatory_check) if mandatory_check and mandatory_check.status != NONE else ""
+    
+    return PROMPTS["match_job"].render(
+        idx=idx,
+        title=job.title,
+        primary_marker=is_primary,
+        job_id=job.id,
+        level=job.level or 'Không xác định',
+        department=job.department or 'Không xác định',
+        job_type=job.job_type or 'Không xác định',
+        work_location=job.work_location or 'Không xác định',
+        location=job.location or 'Không xác định',
+        description=job.description or 'Không có mô tả',
+        requirements=job.requirements or 'Không có yêu cầu cụ thể',
+        mandatory_requirements=job.mandatory_requirements or 'KHÔNG CÓ yêu cầu bắt buộc',
+        benefits=job.benefits or 'Không có thông tin'
+    ) + verdict
+
+def build_match_user_prompt(cv_context: str, jobs_text: str, job_count: int) -> str:
+    return PROMPTS["match_user"].render(cv_context=cv_context, jobs_text=jobs_text, job_count=job_count)
+
+def build_single_job_user_prompt(cv_context: str, job_text: str) -> str:
+    """Compact per-job prompt for fan-out mode: CV context first so the prefix is shared across jobs."""
+    return PROMPTS["match_single_user"].render(cv_context=cv_context, job_text=job_text)
+
+def fit_match_prompt(cv_context: str, jobs: List[JobData], mode: str, primary_job_id: Optional[str], mandatory_checks: Optional[Dict[str, MandatoryCheckResult]] = None) -> Tuple[List[JobData], BudgetReport]:
+    """
+    Trim low-value job fields so every match prompt fits MATCH_INPUT_TOKEN_BUDGET.
+    Batch mode budgets the one prompt with all jobs, per_job mode each single-job prompt.
+    """
+    system_prompt = MATCH_SYSTEM_PROMPT_VERIFIED if mandatory_checks else MATCH_SYSTEM_PROMPT
+    user_template = PROMPTS["match_single_user" if mode == "per_job" else "match_user"]
+    fixed = count_tokens(system_prompt) + user_template.static_tokens + count_tokens(cv_context)
+    available = MATCH_INPUT_TOKEN_BUDGET - fixed if MATCH_INPUT_TOKEN_BUDGET else float("inf")
+    
+    def render(idx: int, job: JobData) -> str:
+        return build_match_job_text(idx, job, primary_job_id, (mandatory_checks or {}).get(job.id))
+    
+    if mode == "per_job":
+        fitted, trims, input_tokens = [], [], fixed
+        for idx, job in enumerate(jobs, 1):
+            (job,), job_trims = fit_jobs([job], lambda _, j, idx=idx: render(idx, j), available)
+            fitted.append(job)
+            trims.extend(job_trims)
+            input_tokens = max(input_tokens, fixed + count_tokens(render(idx, job)))
+    else:
+        fitted, trims = fit_jobs(jobs, lambda i, j: render(i + 1, j), available)
+        input_tokens = fixed + sum(count_tokens(render(idx, job)) for idx, job in enumerate(fitted, 1))
+    
+    return fitted, BudgetReport(MATCH_INPUT_TOKEN_BUDGET or None, input_tokens, trims)
+
+def failed_job_match(job: JobData, error: str) -> dict:
+    return {
+        "job_id": job.id,
+        "job_title": job.title,
+        "match_score": 0,
+        "strengths": ["Không thể phân tích - vui lòng thử lại"],
+        "weaknesses": ["Lỗi hệ thống"],
+        "recommendation": "Vui lòng thử lại sau.",
+        "error": error
+    }
+
+async def score_jobs_single_prompt(cv_context: str, jobs: List[JobData], primary_job_id: Optional[str], mandatory_checks: Optional[Dict[str, MandatoryCheckResult]] = None) -> Tuple[dict, str]:
+    """Original mode: every job in one completion. Returns (raw analysis dict, serving model)."""
+    with stage_timer("prompt_build", MATCH_ROUTE.primary):
         # ==================== BUILD JOBS CONTEXT ====================
         jobs_text = ""
-        for idx, job in enumerate(request.jobs, 1):
-            is_primary = "⭐ PRIMARY (Ứng viên đã apply)" if job.id == request.primary_job_id else ""
-            
-            jobs_text += f"""
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-JOB #{idx}: {job.title} {is_primary}
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-📌 THÔNG TIN CƠ BẢN:
-ID: {job.id}
-Tên vị trí: {job.title}
-Cấp bậc: {job.level or 'Không xác định'}
-Phòng ban: {job.department or 'Không xác định'}
-Loại hình: {job.job_type or 'Không xác định'}
-Hình thức: {job.work_location or 'Không xác định'}
-Địa điểm: {job.location or 'Không xác định'}
-
-📝 MÔ TẢ CÔNG VIỆC:
-{job.description or 'Không có mô tả'}
+        for idx, job in enumerate(jobs, 1):
+            jobs_text += build_match_job_text(idx, job, primary_job_id, (mandatory_checks or {}).get(job.id))
+        
+        # ==================== BUILD MESSAGES ====================
+        messages = [
+            {"role": "system", "content": MATCH_SYSTEM_PROMPT_VERIFIED if mandatory_checks else MATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": build_match_user_prompt(cv_context, jobs_text, len(jobs))}
+        ]
+    
+    # ==================== CALL OPENROUTER API ====================
+    logger.debug("🤖 Calling OpenRouter AI", extra={"route": MATCH_ROUTE.name, "temperature": MATCH_ROUTE.temperature, "jobs": len(jobs)})
+    
+    result, model = await call_model_route(MATCH_ROUTE, messages, MatchAnalysisOutput)
+    
+    # ==================== EXTRACT & VALIDATE RESPONSE ====================
+    content = result['choices'][0]['message']['content']
+    logger.debug("✅ OpenRouter responded", extra={"model": model, "response_chars": len(content), "finish_reason": result['choices'][0].get('finish_reason')})
+    
+    analysis_data, json_status = await parse_llm_json(content, MatchAnalysisOutput, model)
+    
+    # ✂️ Output cut at max_tokens: keep the complete entries, score the rest one job at a time
+    if json_status == "recovered":
+        scored = {str(match.get('job_id')) for match in analysis_data.get('all_matches') or []}
+        missing = [job for job in jobs if job.id not in scored]
+        if missing:
+            logger.warning("✂️ Truncated match output, scoring missing jobs separately", extra={"model": model, "jobs_recovered": len(jobs) - len(missing), "jobs_missing": len(missing)})
+            rest, rest_model = await score_jobs_fan_out(cv_context, missing, primary_job_id, mandatory_checks)
+            analysis_data['all_matches'] = (analysis_data.get('all_matches') or []) + rest['all_matches']
+            analysis_data['best_match'] = max(analysis_data['all_matches'], key=lambda x: x.get('match_score', 0))
+            # The caller derives it from best_match
+            analysis_data.pop('overall_score', None)
+            model = ",".join(dict.fromkeys(model.split(",") + rest_model.split(",")))
+    
+    return analysis_data, model
 
-✅ YÊU CẦU:
-{job.requirements or 'Không có yêu cầu cụ thể'}
+async def score_single_job(cv_context: str, idx: int, job: JobData, primary_job_id: Optional[str], mandatory_check: Optional[MandatoryCheckResult], verified: bool, semaphore: asyncio.Semaphore) -> Tuple[dict, str]:
+    """One compact match request (one CV, one job). Returns (match dict, serving model)."""
+    with stage_timer("prompt_build", MATCH_SINGLE_ROUTE.primary):
+        job_text = build_match_job_text(idx, job, primary_job_id, mandatory_check)
+        messages = [
+            {"role": "system", "content": MATCH_SYSTEM_PROMPT_VERIFIED if verified else MATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": build_single_job_user_prompt(cv_context, job_text)}
+        ]
+    async with semaphore:
+        result, model = await call_model_route(MATCH_SINGLE_ROUTE, messages, JobMatchOutput)
+    match, _ = await parse_llm_json(result['choices'][0]['message']['content'], JobMatchOutput, model)
+    # Trust our own ids/titles over whatever the model echoed back
+    match['job_id'] = job.id
+    match['job_title'] = job.title
+    return match, model
+
+async def score_jobs_fan_out(cv_context: str, jobs: List[JobData], primary_job_id: Optional[str], mandatory_checks: Optional[Dict[str, MandatoryCheckResult]] = None) -> Tuple[dict, str]:
+    """
+    Fan-out mode: one compact request per job, run concurrently (MATCH_FANOUT_CONCURRENCY).
+    
+    A failed job only degrades its own entry; if every job fails the first error is raised.
+    Returns (analysis dict, serving model(s) comma-separated).
+    """
+    semaphore = asyncio.Semaphore(MATCH_FANOUT_CONCURRENCY)
+    
+    logger.debug("🤖 Calling OpenRouter AI per job", extra={"jobs": len(jobs), "concurrency": MATCH_FANOUT_CONCURRENCY})
+    results = await asyncio.gather(
+        *[
+            score_single_job(cv_context, idx, job, primary_job_id, (mandatory_checks or {}).get(job.id), bool(mandatory_checks), semaphore)
+            for idx, job in enumerate(jobs, 1)
+        ],
+        return_exceptions=True
+    )
+    
+    all_matches = []
+    errors = []
+    models = []
+    for job, result in zip(jobs, results):
+        if isinstance(result, BaseException):
+            detail = result.detail if isinstance(result, HTTPException) else str(result)
+            logger.warning("⚠️ Job scoring failed", extra={"job_id": job.id, "error": str(detail)})
+            errors.append(result)
+            all_matches.append(failed_job_match(job, str(detail)))
+        else:
+            all_matches.append(result[0])
+            models.append(result[1])
+    
+    if len(errors) == len(jobs):
+        raise errors[0]
+    
+    logger.info("✅ Per-job scoring done", extra={"jobs_scored": len(jobs) - len(errors), "jobs": len(jobs)})
+    return {
+        "best_match": max(all_matches, key=lambda x: x.get('match_score', 0)),
+        "all_matches": all_matches
+    }, ",".join(dict.fromkeys(models))
+
+# ==================== CANDIDATE MATCHING HELPERS ====================
+
+def resolve_candidates(request: MatchJobCandidatesRequest) -> Tuple[List[Candidate], List[str]]:
+    """Inline payloads plus stored CVs (with their indexed vectors). Returns (candidates, unknown ids). Blocking."""
+    inline = {candidate.id: candidate for candidate in request.candidates}
+    ids = cv_index.ids() if request.all_indexed else request.candidate_ids
+    stored_ids = [item_id for item_id in dict.fromkeys(ids) if item_id not in inline]
+    metadata = cv_index.get(stored_ids)
+    vectors = cv_index.vectors([item_id for item_id in stored_ids if item_id in metadata])
+
+    candidates = [Candidate(c.id, c.cv_data, c.cv_text) for c in inline.values()]
+    candidates += [
+        Candidate(item_id, CVData(**metadata[item_id]["cv_data"]), metadata[item_id].get("cv_text") or "", vectors.get(item_id))
+        for item_id in stored_ids if item_id in metadata
+    ]
+    return candidates, [item_id for item_id in stored_ids if item_id not in metadata]
+
+async def score_candidate(job: JobData, prescore: PreScore, verified: bool, semaphore: asyncio.Semaphore) -> dict:
+    """LLM match of one shortlisted candidate; a failure only degrades this entry."""
+    candidate, check = prescore.candidate, prescore.mandatory_check
+    try:
+        cv_context = build_match_cv_context(candidate.cv_data, candidate.cv_text, [job])
+        fitted, _ = fit_match_prompt(cv_context, [job], "per_job", job.id, {job.id: check} if check else None)
+        match, model = await score_single_job(cv_context, 1, fitted[0], job.id, check, verified, semaphore)
+        match = apply_mandatory_verdict(match, check)
+        match["model"] = model
+    except Exception as e:
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        logger.warning("⚠️ Candidate scoring failed", extra={"candidate_id": candidate.id, "error": str(detail)})
+        match = failed_job_match(job, str(detail))
+    match.pop("job_id", None)
+    match.pop("job_title", None)
+    return {**prescore.to_dict(), **match}
+
+async def iter_candidate_matches(job: JobData, shortlist: List[PreScore], verified: bool) -> AsyncIterator[dict]:
+    """Score the shortlist concurrently (MATCH_FANOUT_CONCURRENCY), yielding entries in completion order."""
+    semaphore = asyncio.Semaphore(MATCH_FANOUT_CONCURRENCY)
+    tasks = [asyncio.create_task(score_candidate(job, prescore, verified, semaphore)) for prescore in shortlist]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Client went away mid-stream: stop the remaining calls
+        for task in tasks:
+            task.cancel()
+
+def rank_candidate_matches(matches: List[dict]) -> List[dict]:
+    ranked = sorted(matches, key=lambda m: (-(m.get("match_score") or 0), -m["local_score"]))
+    for rank, match in enumerate(ranked, 1):
+        match["rank"] = rank
+    return ranked
+
+def candidate_matches_response(job: JobData, matches: List[dict], pre_screened: List[dict], metadata: dict) -> dict:
+    ranking = rank_candidate_matches(matches)
+    served = [m["model"] for m in ranking if m.get("model")]
+    return {
+        "success": True,
+        "data": {"job_id": job.id, "job_title": job.title, "ranking": ranking, "pre_screened": pre_screened},
+        "message": "Candidate ranking completed",
+        "metadata": {**metadata, "model": ",".join(dict.fromkeys(served)) or None, "candidates_failed": sum(1 for m in ranking if m.get("error"))}
+    }
+
+async def stream_candidate_matches(job: JobData, shortlist: List[PreScore], pre_screened: List[dict], verified: bool, metadata: dict) -> AsyncIterator[str]:
+    """SSE: `shortlist` (local scores), a `match` per scored candidate with the ranking so far, then `done`."""
+    yield sse_event("shortlist", {"job_id": job.id, "shortlist": [prescore.to_dict() for prescore in shortlist], "metadata": metadata})
+    matches: List[dict] = []
+    try:
+        async for match in iter_candidate_matches(job, shortlist, verified):
+            matches.append(match)
+            ranking = rank_candidate_matches(matches)
+            yield sse_event("match", {
+                "match": match,
+                "scored": len(matches),
+                "total": len(shortlist),
+                "ranking": [{"candidate_id": m["candidate_id"], "match_score": m.get("match_score", 0), "rank": m["rank"]} for m in ranking]
+            })
+        yield sse_event("done", candidate_matches_response(job, matches, pre_screened, metadata))
+    except Exception as e:
+        logger.exception("❌ Candidate ranking stream failed")
+        yield sse_error(e)
 
-⚠️⚠️⚠️ YÊU CẦU BẮT BUỘC (MANDATORY):
-{job.mandatory_requirements or 'KHÔNG CÓ yêu cầu bắt buộc'}
-⚠️⚠️⚠️
+# ==================== GENERATION HELPERS ====================
 
-💰 QUYỀN LỢI:
-{job.benefits or 'Không có thông tin'}
+JOB_DESCRIPTION_ROUTE = get_route("job_description")
+INTERVIEW_QUESTIONS_ROUTE = get_route("interview_questions")
+# Bump whenever a generation prompt changes so cached results are not reused
+GENERATE_PROMPT_VERSION = "1.0"
+JOB_DESCRIPTION_FIELDS = ("description", "requirements", "benefits")
 
-"""
-        
-        # ==================== SYSTEM PROMPT (FIXED VERSION) ====================
-        system_prompt = """Bạn là chuyên gia HR và AI Matching với 15 năm kinh nghiệm tuyển dụng IT.
-
-Nhiệm vụ: Phân tích CV và chấm điểm độ phù hợp với TỪNG job trong danh sách.
-
-═══════════════════════════════════════════════════════════════
-📋 QUY TRÌNH CHẤM ĐIỂM CHUẨN (CHO MỖI JOB)
-═══════════════════════════════════════════════════════════════
-
-🔴 BƯỚC 1: KIỂM TRA YÊU CẦU BẮT BUỘC MANDATORY (STRICT MATCHING - KHÔNG SUY LUẬN)
-
-Nếu job có "YÊU CẦU BẮT BUỘC/"MANDATORY REQUIREMENTS"" (mandatory_requirements):
-
-1️ Đọc KỸ từng yêu cầu bắt buộc VÀ PHÂN TÍCH từ khóa bắt buộc:
-   VD: "Tốt nghiệp Cử Nhân Đại Học"
-   → Keywords cần tìm: ["cử nhân", "đại học"]
-   
-   VD: "3+ năm kinh nghiệm Python"
-   → Keywords cần tìm: ["python", "3 năm" hoặc "3+"]
-
-2️ TÌM BẰNG CHỨNG trong CV (THEO THỨ TỰ ƯU TIÊN):
-   
-   🎯 Priority 1: Field "Bằng cấp" (education)
-   - Đây là field QUAN TRỌNG NHẤT cho yêu cầu học vấn
-   - VD: "Cử nhân Công nghệ Thông tin"
-   - VD: "Kỹ sư Điện tử"
-   
-   🎯 Priority 2: Field "Trường" (university)
-   - Chỉ chứa TÊN TRƯỜNG, thường KHÔNG chứa bằng cấp
-   - VD: "Đại học Bách Khoa Hà Nội"
-   - VD: "Học viện Công nghệ Bưu chính Viễn thông"
-   
-   🎯 Priority 3: Field "Kinh nghiệm" (experience)
-   - Dùng cho yêu cầu về số năm kinh nghiệm và skills
-   
-   🎯 Priority 4: Full CV Text (backup - tìm trong đoạn HỌC VẤN/EDUCATION)
-   - Dùng khi các field trên null hoặc thiếu thông tin
-
-3️ QUY TẮC MATCHING:
-   
-   ✅ PASS mandatory nếu:
-   - Tìm thấy TẤT CẢ keywords trong CV
-   - Có BẰNG CHỨNG CỤ THỂ (text chính xác)
-   
-   ❌ FAIL mandatory nếu:
-   - THIẾU BẤT KỲ keyword nào
-   
-   ⚠️ KHÔNG được suy luận:
-     ❌ "Có Đại học" ≠ "Có Cử nhân"
-     ❌ "Có trường top" ≠ "Có bằng"
-     ❌ "Có 1 năm exp" ≠ "Có 3 năm exp"
-     ❌ "Có Node.js" ≠ "Có Python"
-     
-KẾT LUẬN:
-- NẾU ứng viên ĐÁP ỨNG → Tiếp tục chấm trên BASE 100
-- NẾU ứng viên KHÔNG ĐÁP ỨNG → Áp dụng PENALTY -50 điểm NGAY
-
-═══════════════════════════════════════════════════════════════
-
-🔵 BƯỚC 2A: CHẤM ĐIỂM (NẾU PASS MANDATORY/đáp ứng trường bắt buộc hoặc KHÔNG CÓ MANDATORY)
-
-Base: 100 điểm
-
-Phân bổ điểm (Tổng = 100):
-- Kinh nghiệm phù hợp: 0-30 điểm
-- Kỹ năng kỹ thuật: 0-25 điểm
-- Học vấn phù hợp: 0-15 điểm
-- Level/Seniority match: 0-15 điểm
-- Địa điểm phù hợp: 0-10 điểm
-- Kỹ năng mềm: 0-5 điểm
-
-TỔNG: X/100
-
-Strengths: ["Điểm mạnh 1", "Điểm mạnh 2", "Điểm mạnh 3"]
-Weaknesses: ["Điểm yếu 1", "Điểm yếu 2"], Các điểm yếu thông thường (KHÔNG liên quan mandatory)
-Recommendation: "Đánh giá chi tiết 80-120 từ"
-
-═══════════════════════════════════════════════════════════════
-
-🔴 BƯỚC 2B: CHẤM ĐIỂM (NẾU FAIL MANDATORY / không đáp ứng trường bắt buộc)
-
-🚨 ÁP DỤNG PENALTY ngay lập tức: -50 ĐIỂM
- Base điểm giảm: 100 → 50
- Điểm tối đa có thể: 50 (Base mới)
-
-SAU ĐÓ Chấm trên BASE 50 (mỗi component giảm 50%):
-
-- Kinh nghiệm phù hợp: 0-15 điểm (giảm 50%)
-- Kỹ năng kỹ thuật: 0-12 điểm (giảm 50%)
-- Học vấn: 0-8 điểm (giảm 50%)
-- Level phù hợp: 0-8 điểm (giảm 50%)
-- Địa điểm: 0-5 điểm (giảm 50%)
-- Kỹ năng mềm: 0-2 điểm (giảm 50%)
-
-TỔNG: Y/50 (tối đa 50)
-
-⚠️ LƯU Ý QUAN TRỌNG:
-- Điểm yếu: PHẢI có "Ứng viên không đáp ứng yêu cầu bắt buộc: [yêu cầu cụ thể]" + các điểm yếu khác"
-- Recommendation: "Ứng viên có [điểm mạnh] nhưng KHÔNG ĐỦ ĐIỀU KIỆN do thiếu [requirement cụ thể]"
-
-QUAN TRỌNG: Với JOB ⭐ PRIMARY (job ứng viên đã apply):
-- Đánh giá CHI TIẾT HỖN hơn
-- Đây là job ứng viên QUAN TÂM - phải đánh giá kỹ lưỡng
-
-
-═══════════════════════════════════════════════════════════════
-🎯 OUTPUT FORMAT
-═══════════════════════════════════════════════════════════════
-
-Trả về JSON với format:
-
-{
-  "overall_score": <điểm của best_match>,
-  "best_match": {
-    "job_id": "<job_id>",
-    "job_title": "<job_title>",
-    "match_score": <0-100 hoặc 0-50 nếu fail mandatory>,
-    "strengths": ["...", "...", "..."],
-    "weaknesses": ["...", "..."],
-    "recommendation": "..."
-  },
-  "all_matches": [
-    {
-      "job_id": "<job_id>",
-      "job_title": "<job_title>",
-      "match_score": <0-100 hoặc 0-50>,
-      "strengths": ["...", "...", "..."],
-      "weaknesses": ["...", "..."],
-      "recommendation": "..."
-    },
-    ...
-  ]
-}
-
-⚠️ CRITICAL RULES:
-1. Nếu FAIL mandatory → match_score PHẢI ≤ 50
-2. Weaknesses của job fail mandatory PHẢI có: "❌ Không đáp ứng yêu cầu bắt buộc: [requirement]"
-3. KHÔNG được suy luận: "Có Đại học" ≠ "Có Cử nhân"
-4. Phải tìm CHÍNH XÁC từ khóa trong CV
-5. all_matches phải được sắp xếp theo match_score giảm dần
-6. best_match = job có match_score CAO NHẤT
-7. overall_score = best_match.match_score
-
-QUAN TRỌNG: 
-- Job có ⭐ PRIMARY → Đánh giá CHI TIẾT và KỸ LƯỠNG hơn
-- Luôn trả về JSON hợp lệ, không thêm text giải thích bên ngoài"""
-
-        # ==================== USER PROMPT ====================
-        user_prompt = f"""Phân tích CV và matching với các công việc theo QUY TRÌNH CHÍNH XÁC:
-
-{cv_context}
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-CÁC CÔNG VIỆC CẦN MATCHING:
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-{jobs_text}
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-Hãy phân tích và chấm điểm cho TẤT CẢ {len(request.jobs)} jobs trên theo đúng quy trình:
-
-1. Với MỖI JOB: Kiểm tra mandatory TRƯỚC
-2. Nếu PASS hoặc không có mandatory → Base 100
-3. Nếu FAIL mandatory → Penalty -50 → Base 50
-4. Chấm điểm trên base tương ứng
-5. Sắp xếp all_matches theo điểm giảm dần
-6. best_match = job có điểm cao nhất
-
-LƯU Ý:
-- ĐỌC KỸ: Bằng cấp, Trường, Kinh nghiệm, Full text
-- KHÔNG SUY LUẬN: "Có Đại học" ≠ "Có Cử nhân"
-- STRICT MATCH: Phải tìm thấy CHÍNH XÁC từ khóa
-- Nếu mandatory là một kỹ năng bắt buộc phải có thì phải tìm được script trùng khớp trong CV
-- Nếu mandatory là số năm kinh nghiệm thì phải tìm được số năm đúng hoặc lớn hơn trong CV hoặc công các năm dựa theo các công việc đã làm trong mục kinh nghiệm
-- Fail mandatory → PHẢI có "❌ Không đáp ứng..." trong weaknesses
-- Job PRIMARY → Đánh giá kỹ hơn
-
-CHO MỖI CÔNG VIỆC, ÁP DỤNG QUY TRÌNH:
-
-VÍ DỤ MINH HỌA:
-
-Ví dụ 1: Job yêu cầu "Tốt nghiệp Đại học" + Ứng viên có "university: HUST"
-→ Bắt buộc: ĐÁP ỨNG ✅
-→ Base điểm: 100
-→ Tính: 28 (exp) + 23 (skills) + 15 (edu) + 12 (level) + 8 (loc) + 3 (soft) = 89
-→ Kết quả: 89/100
-→ Điểm yếu: ["Thiếu kinh nghiệm quản lý nhóm"]
-
-Ví dụ 2: Job yêu cầu "Tốt nghiệp Đại học" + Ứng viên university: null, education: null
-→ Bắt buộc: KHÔNG ĐÁP ỨNG ❌
-→ Penalty: -50 NGAY LẬP TỨC
-→ Base điểm mới: 50 tối đa
-→ Tính trên base 50: 12 (exp) + 10 (skills) + 0 (edu) + 6 (level) + 4 (loc) + 2 (soft) = 34
-→ Kết quả: 34/50
-→ Điểm yếu: ["Ứng viên không đáp ứng yêu cầu bắt buộc: Tốt nghiệp Đại học", "Thiếu kinh nghiệm cloud"]
+def generation_cache_key(kind: str, request: BaseModel) -> str:
+    """Hash of every request field that shapes the prompt (language included) plus prompt version and models."""
+    fields = request.model_dump(exclude={"stream", "regenerate"})
+    models = ",".join(get_route(kind).models)
+    return content_key(kind, GENERATE_PROMPT_VERSION, models, json.dumps(fields, sort_keys=True, ensure_ascii=False))
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-ĐẶC BIỆT CHÚ Ý VỀ BEST_MATCH:
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+def generation_cache_group(kind: str, language: str, *identity: str) -> str:
+    """Invalidation group for set_versioned: one live entry per job + language, so changed inputs evict the old result."""
+    return ":".join([kind, get_route(kind).primary, language, *identity])
 
-1. best_match PHẢI là job có match_score CAO NHẤT trong all_matches
-2. overall_score PHẢI = best_match.match_score
-3. all_matches PHẢI được sắp xếp theo match_score giảm dần
+def job_description_cache_group(request: GenerateJobDescriptionRequest) -> str:
+    # No job id yet: the position is identified by title / level / department; other fields are details
+    return generation_cache_group("job_description", request.language, *(value.strip().lower() for value in (request.title, request.level, request.department)))
 
-4. Khi viết recommendation cho best_match:
-   - NẾU best_match.job_id == primary_job_id (job ứng viên đã apply):
-     → Viết: "Ứng viên đã apply đúng vị trí phù hợp với hồ sơ. [Điểm mạnh chính]..."
-   
-   - NẾU best_match.job_id != primary_job_id:
-     → Viết: "Ứng viên phù hợp hơn với vị trí [best_match_title] so với vị trí đã apply [primary_job_title]. Lý do: [so sánh cụ thể]..."
+def interview_questions_cache_group(request: GenerateInterviewQuestionsRequest) -> str:
+    # A newer description / requirements evicts the old questions
+    return generation_cache_group("interview_questions", request.language, request.job_id)
 
-5. Đảm bảo recommendation dài 100-150 từ, chi tiết và có bằng chứng cụ thể
+def with_cache_status(response: dict, cache_status: str) -> dict:
+    return {**response, "metadata": {**response["metadata"], "cache": cache_status}}
 
-Trả về ONLY valid JSON theo format đã cho."""
+async def replay_events(*events: str) -> AsyncIterator[str]:
+    for event in events:
+        yield event
 
-        # ==================== BUILD MESSAGES ====================
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
-        
-        # ==================== CALL OPENROUTER API ====================
-        print(f"🤖 Calling OpenRouter AI (gpt-4o-mini, temp=0.2)...")
-        
-        result = call_openrouter_api(
-            messages=messages,
-            model="openai/gpt-4o-mini",
-            temperature=0.2,  # ✅ Giảm xuống 0.2 cho consistent hơn
-            max_tokens=4000
-        )
-        
-        print(f"✅ OpenRouter responded")
-        
-        # ==================== EXTRACT & VALIDATE RESPONSE ====================
-        content = result['choices'][0]['message']['content']
-        print(f"📄 Raw AI response length: {len(content)} chars")
-        
-        analysis_data = extract_json_from_response(content)
-        
-        # Validate response structure
-        if not isinstance(analysis_data, dict):
-            raise ValueError("AI response is not a valid dictionary")
-        
-        # ✅ Ensure best_match exists
-        if not analysis_data.get('best_match'):
-            print(f"⚠️  Missing best_match, creating fallback")
-            analysis_data['best_match'] = {
-                "job_id": request.jobs[0].id,
-                "job_title": request.jobs[0].title,
-                "match_score": 0,
-                "strengths": ["Không thể phân tích - vui lòng thử lại"],
-                "weaknesses": ["Lỗi hệ thống"],
-                "recommendation": "Vui lòng thử lại sau."
-            }
-        
-        # ✅ Ensure all_matches exists
-        if not analysis_data.get('all_matches'):
-            print(f"⚠️  Missing all_matches, creating from best_match")
-            analysis_data['all_matches'] = [analysis_data['best_match']]
-        
-        # ✅ Sort all_matches by score descending
-        analysis_data['all_matches'] = sorted(
-            analysis_data['all_matches'],
-            key=lambda x: x.get('match_score', 0),
-            reverse=True
-        )
-        
-        # ✅ Set best_match as highest score
-        if analysis_data['all_matches']:
-            analysis_data['best_match'] = analysis_data['all_matches'][0]
-        
-        # ✅ Set overall_score
-        if 'overall_score' not in analysis_data:
-            analysis_data['overall_score'] = analysis_data['best_match'].get('match_score', 0)
-        
-        # ==================== LOG RESULTS ====================
-        print(f"✅ Overall score: {analysis_data.get('overall_score', 'N/A')}")
-        print(f"🏆 Best match: {analysis_data['best_match'].get('job_title', 'N/A')} ({analysis_data['best_match'].get('match_score', 0)})")
-        print(f"📊 All matches: {len(analysis_data.get('all_matches', []))}")
-        
-        # ✅ Log scores for all jobs
-        for idx, match in enumerate(analysis_data['all_matches'], 1):
-            score = match.get('match_score', 0)
-            has_fail = any('❌' in w for w in match.get('weaknesses', []))
-            print(f"  {idx}. {match.get('job_title', 'N/A')}: {score} {'(FAIL MANDATORY)' if has_fail and score <= 50 else ''}")
-        
-        print(f"===== CV-JOB MATCHING END =====\n")
-        
-        # ==================== RETURN RESPONSE ====================
-        return {
-            "success": True,
-            "data": analysis_data,
-            "message": "CV-Job matching completed",
-            "metadata": {
-                "model": "gpt-4o-mini",
-                "temperature": 0.2,
-                "jobs_analyzed": len(request.jobs),
-                "primary_job_id": request.primary_job_id
-            }
-        }
-    
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"❌ Error in match_cv_jobs: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error matching CV with jobs: {str(e)}"
-        )
+async def stream_openrouter_api(messages: List[dict], model: str = "openai/gpt-4o-mini", temperature: float = 0.7, max_tokens: int = 4000, timeout: Optional[float] = None, deadline: Optional[float] = None, response_format: Optional[dict] = None) -> AsyncIterator[str]:
+    """Yield content deltas from a streaming (SSE) OpenRouter completion."""
+    try:
+        with stage_timer("llm", model):
+            response = await openrouter_client.stream_chat_completion(
+                messages=messages,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout=timeout,
+                deadline=deadline,
+                response_format=response_format
+            )
+            try:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    try:
+                        error_message = json.loads(body).get('error', {}).get('message', 'Unknown error')
+                    except ValueError:
+                        error_message = body[:200].decode(errors="replace") or 'Unknown error'
+                    record_llm_failure(model, str(response.status_code))
+                    raise HTTPException(
+                        status_code=response.status_code,
+                        detail=f"OpenRouter API error: {error_message}"
+                    )
+
+                async for line in response.aiter_lines():
+                    # Skip blank separators and ": OPENROUTER PROCESSING" keep-alive comments
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        chunk = json.loads(data)
+                    except json.JSONDecodeError:
+                        continue
+                    if chunk.get("error"):
+                        record_llm_failure(model, "stream_error")
+                        raise HTTPException(
+                            status_code=502,
+                            detail=f"OpenRouter API error: {chunk['error'].get('message', 'Unknown error')}"
+                        )
+                    # The final chunk carries token usage
+                    record_llm_usage(model, chunk.get("usage"))
+                    choices = chunk.get("choices") or [{}]
+                    delta = (choices[0].get("delta") or {}).get("content")
+                    if delta:
+                        yield delta
+            finally:
+                await response.aclose()
+
+        LLM_REQUESTS.inc(endpoint=current_endpoint.get(), model=model, outcome="success")
+
+    except CircuitOpenError as e:
+        record_llm_failure(model, "circuit_open")
+        raise HTTPException(status_code=503, detail=f"OpenRouter unavailable: {e}", headers={"Retry-After": str(int(e.retry_after))})
+    except httpx.TimeoutException:
+        record_llm_failure(model, "timeout")
+        raise HTTPException(status_code=504, detail="OpenRouter API timeout")
+    except httpx.HTTPError as e:
+        record_llm_failure(model, type(e).__name__)
+        raise HTTPException(status_code=500, detail=f"Request error: {str(e)}")
 
-@app.post("/api/generate-job-description")
-async def generate_job_description(request: GenerateJobDescriptionRequest):
+async def stream_model_route(route: ModelRoute, messages: List[dict], output_model: Optional[Type[BaseModel]] = None) -> AsyncIterator[Tuple[str, str]]:
     """
-    Generate job description using AI
+    Yield (model, delta) from the first model of the route that starts answering.
+    Falling back is only possible before the first delta has been sent on, so the
+    latency budget and route deadline bound the wait for that first delta.
     """
-    try:
-        print(f"\n📝 ===== GENERATING JOB DESCRIPTION =====")
-        print(f"💼 Title: {request.title}")
-        
-        job_context = f"""Job Position: {request.title}
+    models = route.candidates(messages)
+    response_format = structured_format(output_model)
+    deadline = route_deadline(route)
+    for index, model in enumerate(models):
+        last = index == len(models) - 1
+        limit = route.time_limit(deadline - time.monotonic(), last)
+        stream = stream_openrouter_api(
+            messages=messages,
+            model=model,
+            temperature=route.temperature,
+            max_tokens=route.max_tokens,
+            timeout=limit,
+            deadline=limit,
+            response_format=response_format
+        )
+        started = False
+        try:
+            try:
+                async with asyncio.timeout(limit):
+                    delta = await anext(stream)
+            except StopAsyncIteration:
+                return
+            except TimeoutError:
+                raise route_timeout(model)
+            started = True
+            yield model, delta
+            async for delta in stream:
+                yield model, delta
+            return
+        except HTTPException as e:
+            if started or last or e.status_code not in FALLBACK_STATUSES:
+                raise
+            MODEL_FALLBACKS.inc(endpoint=current_endpoint.get(), route=route.name, model=model)
+            logger.warning("↪️ Falling back to the next model", extra={"route": route.name, "model": model, "status": e.status_code})
+        finally:
+            await stream.aclose()
+
+def sse_error(error: Exception) -> str:
+    if isinstance(error, HTTPException):
+        return sse_event("error", {"status_code": error.status_code, "detail": error.detail})
+    return sse_event("error", {"status_code": 500, "detail": str(error)})
+
+def build_job_description_messages(request: GenerateJobDescriptionRequest) -> List[dict]:
+    job_context = f"""Job Position: {request.title}
 Department: {request.department}
 Level: {request.level}
 Job Type: {request.job_type or 'Full-time'}
 Location: {request.work_location or 'Remote'}"""
-        
-        if request.keywords:
-            job_context += f"\nRequired Skills: {request.keywords}"
-        
-        lang_instruction = "Write the job description in Vietnamese language." if request.language == "vietnamese" else "Write the job description in English language."
-        
-        messages = [
-            {"role": "system", "content": f"You are a professional HR specialist. {lang_instruction} Return ONLY valid JSON."},
-            {"role": "user", "content": f"""Create a detailed job description:
+    
+    if request.keywords:
+        job_context += f"\nRequired Skills: {request.keywords}"
+    
+    lang_instruction = "Write the job description in Vietnamese language." if request.language == "vietnamese" else "Write the job description in English language."
+    
+    return [
+        {"role": "system", "content": f"You are a professional HR specialist. {lang_instruction} Return ONLY valid JSON."},
+        {"role": "user", "content": f"""Create a detailed job description:
 
 {job_context}
 
@@ -870,54 +1019,43 @@ Return JSON:
   "requirements": "• Requirement 1\\n• Requirement 2\\n...",
   "benefits": "• Benefit 1\\n• Benefit 2\\n..."
 }}"""}
-        ]
-        
-        result = call_openrouter_api(messages=messages, model="openai/gpt-4o-mini", temperature=0.7, max_tokens=2000)
-        
-        content = result['choices'][0]['message']['content']
-        job_data = extract_json_from_response(content)
-        
-        if not all(key in job_data for key in ['description', 'requirements', 'benefits']):
-            raise HTTPException(status_code=500, detail="Invalid AI response structure")
-        
-        print(f"✅ Generated job description successfully")
-        print(f"===== JOB DESCRIPTION GENERATION END =====\n")
-        
-        return {
-            "success": True,
-            "data": job_data,
-            "message": "Job description generated successfully",
-            "metadata": {"model": "gpt-4o-mini", "language": request.language}
-        }
-    
-    except HTTPException:
-        raise
+    ]
+
+def job_description_response(request: GenerateJobDescriptionRequest, job_data: dict, model: str) -> dict:
+    if not all(key in job_data for key in JOB_DESCRIPTION_FIELDS):
+        raise HTTPException(status_code=500, detail="Invalid AI response structure")
+
+    return {
+        "success": True,
+        "data": job_data,
+        "message": "Job description generated successfully",
+        "metadata": {"model": model, "language": request.language}
+    }
+
+async def stream_job_description(request: GenerateJobDescriptionRequest, cache_key: str, cache_status: str) -> AsyncIterator[str]:
+    """SSE: one `field` event per top-level JSON field as soon as it is complete, then `done`."""
+    parser = JSONFieldStream()
+    content = ""
+    model = JOB_DESCRIPTION_ROUTE.primary
+    try:
+        async for model, delta in stream_model_route(JOB_DESCRIPTION_ROUTE, build_job_description_messages(request), JobDescriptionOutput):
+            content += delta
+            for key, value in parser.feed(delta):
+                yield sse_event("field", {"key": key, "value": value})
+
+        job_data, _ = await parse_llm_json(content, JobDescriptionOutput, model)
+        response = job_description_response(request, job_data, model)
+        await generate_cache.set_versioned(job_description_cache_group(request), cache_key, response)
+        yield sse_event("done", with_cache_status(response, cache_status))
+        logger.info("✅ Streamed job description", extra={"chars": len(content)})
+
     except Exception as e:
-        print(f"❌ Error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error generating job description: {str(e)}")
+        logger.error("❌ Error streaming job description: %s", e)
+        yield sse_error(e)
 
-@app.post("/api/generate-interview-questions")
-async def generate_interview_questions(request: GenerateInterviewQuestionsRequest):
-    """
-    ✅ NEW ENDPOINT - Generate interview questions based on job description using AI
-    
-    This endpoint analyzes the job requirements and generates comprehensive interview questions
-    categorized by:
-    - Technical Knowledge
-    - Soft Skills
-    - Situational Questions
-    - Career Goals & Motivation
-    
-    Returns markdown-formatted questions ready for use in interviews.
-    """
-    try:
-        print(f"\n💬 ===== GENERATING INTERVIEW QUESTIONS =====")
-        print(f"📋 Job: {request.job_title} ({request.job_id})")
-        print(f"🏢 Department: {request.department}")
-        print(f"📊 Level: {request.level}")
-        
-        # Build comprehensive job context
-        job_context = f"""━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+def build_interview_questions_messages(request: GenerateInterviewQuestionsRequest) -> List[dict]:
+    # Build comprehensive job context
+    job_context = f"""━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 JOB INFORMATION:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
@@ -945,29 +1083,29 @@ MANDATORY REQUIREMENTS (MUST VERIFY):
 
 {request.mandatory_requirements or 'None'}
 """
-        
-        # Determine language instruction
-        if request.language == "vietnamese":
-            lang_instruction = "Write ALL interview questions in Vietnamese language with professional tone."
-            category_names = {
-                "technical": "## 📚 Phần 1: Kiến thức chuyên môn (Technical Knowledge)",
-                "soft": "## 🤝 Phần 2: Kỹ năng mềm (Soft Skills)",
-                "situational": "## 💡 Phần 3: Tình huống thực tế (Situational Questions)",
-                "motivation": "## 🎯 Phần 4: Định hướng & Động lực (Career Goals & Motivation)"
-            }
-        else:
-            lang_instruction = "Write ALL interview questions in English language with professional tone."
-            category_names = {
-                "technical": "## 📚 Part 1: Technical Knowledge",
-                "soft": "## 🤝 Part 2: Soft Skills",
-                "situational": "## 💡 Part 3: Situational Questions",
-                "motivation": "## 🎯 Part 4: Career Goals & Motivation"
-            }
-        
-        messages = [
-            {
-                "role": "system", 
-                "content": f"""You are an expert HR interviewer and recruitment specialist with deep knowledge of:
+    
+    # Determine language instruction
+    if request.language == "vietnamese":
+        lang_instruction = "Write ALL interview questions in Vietnamese language with professional tone."
+        category_names = {
+            "technical": "## 📚 Phần 1: Kiến thức chuyên môn (Technical Knowledge)",
+            "soft": "## 🤝 Phần 2: Kỹ năng mềm (Soft Skills)",
+            "situational": "## 💡 Phần 3: Tình huống thực tế (Situational Questions)",
+            "motivation": "## 🎯 Phần 4: Định hướng & Động lực (Career Goals & Motivation)"
+        }
+    else:
+        lang_instruction = "Write ALL interview questions in English language with professional tone."
+        category_names = {
+            "technical": "## 📚 Part 1: Technical Knowledge",
+            "soft": "## 🤝 Part 2: Soft Skills",
+            "situational": "## 💡 Part 3: Situational Questions",
+            "motivation": "## 🎯 Part 4: Career Goals & Motivation"
+        }
+    
+    return [
+        {
+            "role": "system", 
+            "content": f"""You are an expert HR interviewer and recruitment specialist with deep knowledge of:
 - Technical competency assessment
 - Behavioral interviewing techniques
 - STAR method questioning
@@ -989,10 +1127,10 @@ IMPORTANT GUIDELINES:
 - Make questions specific to the job title and department
 - Include scenario-based questions relevant to actual job responsibilities
 - If mandatory requirements exist, create questions to verify them"""
-            },
-            {
-                "role": "user", 
-                "content": f"""Based on the following job information, create a comprehensive set of 12-15 interview questions:
+        },
+        {
+            "role": "user", 
+            "content": f"""Based on the following job information, create a comprehensive set of 12-15 interview questions:
 
 {job_context}
 
@@ -1051,68 +1189,708 @@ CRITICAL REQUIREMENTS:
 ✅ Start directly with the heading "# Câu hỏi phỏng vấn..."
 
 Begin your response now:"""
-            }
-        ]
+        }
+    ]
+
+def clean_interview_questions(content: str) -> str:
+    content = content.strip()
+
+    # Clean up any potential markdown code blocks
+    if content.startswith('```markdown'):
+        content = content.replace('```markdown', '', 1)
+    if content.startswith('```'):
+        content = content.replace('```', '', 1)
+    if content.endswith('```'):
+        content = content.rsplit('```', 1)[0]
+
+    return content.strip()
+
+def interview_questions_response(request: GenerateInterviewQuestionsRequest, content: str, model: str) -> dict:
+    # Count questions (approximate by counting question marks)
+    question_count = content.count('?')
+
+    return {
+        "success": True,
+        "data": {
+            "questions": content,
+            "job_id": request.job_id,
+            "job_title": request.job_title,
+            "department": request.department,
+            "level": request.level
+        },
+        "message": "Interview questions generated successfully",
+        "metadata": {
+            "model": model,
+            "language": request.language,
+            "question_count": question_count,
+            "character_count": len(content)
+        }
+    }
+
+async def stream_interview_questions(request: GenerateInterviewQuestionsRequest, cache_key: str, cache_status: str) -> AsyncIterator[str]:
+    """SSE: markdown `delta` events with the code fences stripped, then `done` with the full response."""
+    stripper = MarkdownFenceStripper()
+    content = ""
+    model = INTERVIEW_QUESTIONS_ROUTE.primary
+    try:
+        async for model, delta in stream_model_route(INTERVIEW_QUESTIONS_ROUTE, build_interview_questions_messages(request)):
+            text = stripper.feed(delta)
+            if text:
+                content += text
+                yield sse_event("delta", {"content": text})
+
+        text = stripper.finish()
+        if text:
+            content += text
+            yield sse_event("delta", {"content": text})
+
+        response = interview_questions_response(request, content, model)
+        await generate_cache.set_versioned(interview_questions_cache_group(request), cache_key, response)
+        yield sse_event("done", with_cache_status(response, cache_status))
+        logger.info("✅ Streamed interview questions", extra={"chars": len(content)})
+
+    except Exception as e:
+        logger.error("❌ Error streaming interview questions: %s", e)
+        yield sse_error(e)
+
+# ==================== ENDPOINTS ====================
+
+@app.get("/")
+async def root():
+    return {"message": "CV Management API", "version": "1.0.0", "status": "running"}
+
+@app.get("/health")
+async def health_check():
+    return {
+        "status": "healthy",
+        "openrouter_configured": bool(OPENROUTER_API_KEY),
+        "openrouter_circuits": openrouter_client.resilience.stats()
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition: request / stage latency histograms, token, cache and failure counters."""
+    return Response(REGISTRY.render(), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    return {"parse_cv": parse_cv_cache.stats(), "generate": generate_cache.stats()}
+
+@app.get("/api/prompts")
+async def prompt_stats():
+    """Active prompt variant with the static token count, budget and prefix hash of every template."""
+    return PROMPTS.stats()
+
+@app.get("/api/skills/ontology")
+async def skill_ontology_stats():
+    """Loaded skill ontology: version, sizes and categories."""
+    return skill_ontology.stats()
+
+@app.post("/api/skills/extract")
+async def extract_skills(request: ExtractSkillsRequest):
+    """Ontology skills in free text (a CV, a job post), with categories and match spans. No LLM call."""
+    with stage_timer("skill_extraction"):
+        matches = skill_ontology.find(request.text)
+    skills = list(dict.fromkeys(match.name for match in matches))
+    return {
+        "success": True,
+        "data": {
+            "skills": skills,
+            "skill_categories": skill_ontology.categorize(skills),
+            "matches": [match.to_dict() for match in matches]
+        },
+        "metadata": {"ontology_version": skill_ontology.version}
+    }
+
+@app.post("/api/parse-cv")
+async def parse_cv(
+    file: UploadFile = File(None),
+    cv_file: UploadFile = File(None),
+    bypass_cache: bool = Query(False, description="Skip the parsed-CV cache lookup and re-run extraction + AI"),
+    mode: Literal["full", "quick"] = Query("full", description="quick = contact fields + skills without the AI, full parse queued in the background"),
+    full_parse: bool = Query(True, description="quick mode: queue the full AI parse as a background job")
+):
+    """
+    ✅ ENHANCED VERSION - Comprehensive CV parsing with improved extraction
+    
+    Improvements:
+    - Experience: Extracted from summary, projects, achievements, not just "Experience" section
+    - Skills: Aggregated from all mentions throughout CV, deduplicated
+    - Education: Includes degrees, certifications, qualifications from all sections
+    - Cache: Identical files (SHA-256 of bytes + prompt version + model) are served from cache
+    - Quick mode: name / email / phone / skills extracted locally in milliseconds, full parse as a background job
+    - Uploads: size-capped (413), spooled to disk past CV_UPLOAD_SPOOL_BYTES and memory-mapped by the parser
+    """
+    upload = None
+    try:
+        upload_file = file if file else cv_file
         
-        print(f"🤖 Calling OpenRouter AI for interview questions...")
+        if not upload_file:
+            raise HTTPException(status_code=422, detail="No file provided")
         
-        result = call_openrouter_api(
-            messages=messages, 
-            model="openai/gpt-4o-mini", 
-            temperature=0.7,  # Balanced creativity for diverse questions
-            max_tokens=2500   # Enough for comprehensive questions
-        )
+        logger.info("📄 CV parsing start", extra={"file_type": cv_extension(upload_file.filename)})
+        
+        if cv_extension(upload_file.filename) not in SUPPORTED_CV_EXTENSIONS:
+            raise HTTPException(status_code=400, detail="Unsupported file format")
+        
+        upload = await read_cv_upload(upload_file)
+        if not upload.size:
+            raise HTTPException(status_code=400, detail="File is empty")
+        
+        logger.debug("📦 File read", extra={"size_kb": round(upload.size / 1024, 2), "sha256": upload.sha256[:12], "spooled": upload.path is not None})
+        
+        if mode == "quick":
+            return await quick_parse_cv(upload, bypass_cache=bypass_cache, full_parse=full_parse)
+        
+        parsed_data, cache_status, served_model = await parse_cv_content(upload, bypass_cache=bypass_cache)
+        
+        logger.info("📄 CV parsing end", extra={"cache": cache_status})
+        
+        return parse_cv_response(upload_file.filename, parsed_data, cache_status, served_model)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("❌ Error parsing CV")
+        raise HTTPException(status_code=500, detail=f"Error parsing CV: {str(e)}")
+    finally:
+        if upload is not None:
+            upload.close()
+
+@app.post("/api/parse-cv/batch")
+async def parse_cv_batch(
+    files: List[UploadFile] = File(...),
+    concurrency: Optional[int] = Query(None, ge=1, description=f"Parallel parses, capped at CV_BATCH_CONCURRENCY ({CV_BATCH_CONCURRENCY})"),
+    bypass_cache: bool = Query(False)
+):
+    """
+    Parse many CVs (PDF/DOCX files and/or .zip archives of them) in one request.
+    
+    Streams NDJSON: one {"type": "result", ...} line per file as soon as it finishes
+    (same `data` as /api/parse-cv), then a final {"type": "summary", ...} line.
+    A bad file only fails its own line.
+    """
+    batch = await read_batch_uploads(files)
+    limit = min(concurrency or CV_BATCH_CONCURRENCY, CV_BATCH_CONCURRENCY)
+    
+    logger.info("📚 CV batch parsing", extra={"files": len(batch.items), "bytes": batch.total_bytes, "concurrency": limit})
+    
+    async def parse_item(upload: CVUpload) -> dict:
+        parsed_data, cache_status, served_model = await parse_cv_content(upload, bypass_cache=bypass_cache)
+        return {"data": parsed_data, "cache": cache_status, "model": served_model}
+    
+    return StreamingResponse(
+        stream_batch_results(batch, parse_item, limit),
+        media_type="application/x-ndjson"
+    )
+
+@app.post("/api/match-cv-jobs")
+async def match_cv_jobs(request: MatchCVJobsRequest):
+    """
+    ✅ OPTIMIZED VERSION: Match CV with multiple job positions using AI analysis
+    🔧 Fixed: Mandatory requirements strict matching logic
+    
+    mode="batch" scores all jobs in one prompt; mode="per_job" fans out one request
+    per job (latency ~ one job, a bad answer only affects that job).
+    """
+    try:
+        mode = request.mode or MATCH_MODE
         
-        print(f"✅ OpenRouter responded successfully")
+        logger.info("🎯 CV-job matching start", extra={"jobs": len(request.jobs), "mode": mode, "primary_job_id": request.primary_job_id})
         
-        content = result['choices'][0]['message']['content'].strip()
+        # ==================== LOCAL PRE-FILTER ====================
+        with stage_timer("prefilter"):
+            llm_jobs, pre_screened = prefilter_jobs(
+                request.jobs,
+                request.cv_data,
+                request.cv_text,
+                top_k=request.top_k,
+                primary_job_id=request.primary_job_id
+            )
+        if pre_screened:
+            logger.info("🔎 Pre-filter", extra={"jobs_to_ai": len(llm_jobs), "pre_screened": len(pre_screened)})
         
-        # Clean up any potential markdown code blocks
-        if content.startswith('```markdown'):
-            content = content.replace('```markdown', '', 1)
-        if content.startswith('```'):
-            content = content.replace('```', '', 1)
-        if content.endswith('```'):
-            content = content.rsplit('```', 1)[0]
+        # ==================== LOCAL MANDATORY CHECK ====================
+        use_local_check = MATCH_LOCAL_MANDATORY_CHECK if request.local_mandatory_check is None else request.local_mandatory_check
+        mandatory_checks: Dict[str, MandatoryCheckResult] = {}
+        local_fail_matches = []
+        if use_local_check:
+            with stage_timer("mandatory_check"):
+                mandatory_checks = {
+                    job.id: check_mandatory_requirements(job.mandatory_requirements, request.cv_data, request.cv_text)
+                    for job in llm_jobs
+                }
+            statuses = {job.id: mandatory_checks[job.id].status for job in llm_jobs if mandatory_checks[job.id].status != NONE}
+            if statuses:
+                logger.debug("🧪 Mandatory check", extra={"statuses": statuses})
+            
+            if request.skip_llm_on_mandatory_fail:
+                skipped = [job for job in llm_jobs if mandatory_checks[job.id].decisive_fail]
+                if skipped:
+                    relevance = local_relevance(request.jobs, request.cv_data, request.cv_text)
+                    local_fail_matches = [
+                        local_mandatory_fail_match(job, mandatory_checks[job.id], relevance.get(job.id, 0.0))
+                        for job in skipped
+                    ]
+                    llm_jobs = [job for job in llm_jobs if not mandatory_checks[job.id].decisive_fail]
+                    logger.info("⏭️ Skipping AI for jobs that fail mandatory requirements", extra={"jobs": len(skipped)})
         
-        content = content.strip()
+        # ==================== BUILD CV CONTEXT ====================
+        with stage_timer("prompt_build", MATCH_ROUTE.primary):
+            cv_context = build_match_cv_context(request.cv_data, request.cv_text, llm_jobs)
         
-        # Count questions (approximate by counting question marks)
-        question_count = content.count('?')
+        # ==================== INPUT TOKEN BUDGET ====================
+        with stage_timer("prompt_budget", MATCH_ROUTE.primary):
+            llm_jobs, budget_report = fit_match_prompt(cv_context, llm_jobs, mode, request.primary_job_id, mandatory_checks or None)
+        if budget_report.trims:
+            logger.info("✂️ Trimmed job fields to fit the input token budget", extra={
+                "budget": budget_report.budget,
+                "input_tokens": budget_report.input_tokens,
+                "trims": len(budget_report.trims)
+            })
+        if budget_report.over_budget:
+            logger.warning("⚠️ Match prompt still over the input token budget", extra={"budget": budget_report.budget, "input_tokens": budget_report.input_tokens})
         
-        print(f"📊 Generated {len(content)} characters")
-        print(f"❓ Approximate question count: {question_count}")
-        print(f"===== INTERVIEW QUESTIONS GENERATION END =====\n")
+        if not llm_jobs:
+            analysis_data, served_model = {"all_matches": []}, None
+        elif mode == "per_job":
+            analysis_data, served_model = await score_jobs_fan_out(cv_context, llm_jobs, request.primary_job_id, mandatory_checks or None)
+        else:
+            analysis_data, served_model = await score_jobs_single_prompt(cv_context, llm_jobs, request.primary_job_id, mandatory_checks or None)
+        
+        # ✅ Enforce local mandatory verdicts on AI-scored jobs, add locally-failed jobs
+        if mandatory_checks:
+            for match in analysis_data.get('all_matches') or []:
+                apply_mandatory_verdict(match, mandatory_checks.get(str(match.get('job_id'))))
+            if analysis_data.get('best_match'):
+                apply_mandatory_verdict(analysis_data['best_match'], mandatory_checks.get(str(analysis_data['best_match'].get('job_id'))))
+        if local_fail_matches:
+            analysis_data['all_matches'] = (analysis_data.get('all_matches') or []) + local_fail_matches
+            if not llm_jobs:
+                analysis_data['best_match'] = max(local_fail_matches, key=lambda x: x.get('match_score', 0))
+        
+        # ✅ Ensure best_match exists
+        if not analysis_data.get('best_match'):
+            logger.warning("⚠️ Missing best_match, creating fallback")
+            fallback_job = (llm_jobs or request.jobs)[0]
+            analysis_data['best_match'] = {
+                "job_id": fallback_job.id,
+                "job_title": fallback_job.title,
+                "match_score": 0,
+                "strengths": ["Không thể phân tích - vui lòng thử lại"],
+                "weaknesses": ["Lỗi hệ thống"],
+                "recommendation": "Vui lòng thử lại sau."
+            }
         
+        # ✅ Ensure all_matches exists
+        if not analysis_data.get('all_matches'):
+            logger.warning("⚠️ Missing all_matches, creating from best_match")
+            analysis_data['all_matches'] = [analysis_data['best_match']]
+        
+        # ✅ Sort all_matches by score descending
+        analysis_data['all_matches'] = sorted(
+            analysis_data['all_matches'],
+            key=lambda x: x.get('match_score', 0),
+            reverse=True
+        )
+        
+        # ✅ Set best_match as highest score
+        if analysis_data['all_matches']:
+            analysis_data['best_match'] = analysis_data['all_matches'][0]
+        
+        # ✅ Pre-screened jobs go after every AI-scored job (best_match stays AI-scored)
+        analysis_data['all_matches'].extend(pre_screened)
+        
+        # ✅ Set overall_score
+        if 'overall_score' not in analysis_data:
+            analysis_data['overall_score'] = analysis_data['best_match'].get('match_score', 0)
+        
+        # ==================== LOG RESULTS ====================
+        logger.info("🏆 CV-job matching end", extra={
+            "overall_score": analysis_data.get('overall_score'),
+            "best_job_id": analysis_data['best_match'].get('job_id'),
+            "best_score": analysis_data['best_match'].get('match_score', 0),
+            "matches": len(analysis_data.get('all_matches', []))
+        })
+        # ✅ Scores for all jobs (sampled: one line per match list can be long)
+        logger.info("📊 Match scores", extra={
+            "sample": True,
+            "scores": {str(match.get('job_id')): match.get('match_score') for match in analysis_data['all_matches']}
+        })
+        
+        # ==================== RETURN RESPONSE ====================
         return {
             "success": True,
-            "data": {
-                "questions": content,
-                "job_id": request.job_id,
-                "job_title": request.job_title,
-                "department": request.department,
-                "level": request.level
-            },
-            "message": "Interview questions generated successfully",
+            "data": analysis_data,
+            "message": "CV-Job matching completed",
             "metadata": {
-                "model": "gpt-4o-mini", 
-                "language": request.language,
-                "question_count": question_count,
-                "character_count": len(content)
+                "model": served_model,
+                "temperature": MATCH_ROUTE.temperature,
+                "mode": mode,
+                "jobs_analyzed": len(request.jobs),
+                "jobs_ai_scored": len(llm_jobs),
+                "jobs_pre_screened": len(pre_screened),
+                "local_mandatory_check": use_local_check,
+                "jobs_skipped_mandatory_fail": len(local_fail_matches),
+                "primary_job_id": request.primary_job_id,
+                "prompt_budget": budget_report.to_dict()
             }
         }
     
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error generating interview questions: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error in match_cv_jobs")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error matching CV with jobs: {str(e)}"
+        )
+
+@app.post("/api/match-job-candidates")
+async def match_job_candidates(request: MatchJobCandidatesRequest):
+    """
+    Rank many candidates for one job: every candidate is pre-scored locally (BM25 +
+    vector similarity + mandatory check) in one pass, and only the best
+    `shortlist_size` are scored by the LLM, concurrently, one request each.
+    """
+    if not (request.candidate_ids or request.candidates or request.all_indexed):
+        raise HTTPException(status_code=422, detail="No candidates provided")
+
+    with stage_timer("candidate_load"):
+        candidates, missing_ids = await asyncio.to_thread(resolve_candidates, request)
+    if not candidates:
+        raise HTTPException(status_code=404, detail="No candidates found")
+    if len(candidates) > MATCH_CANDIDATES_MAX:
+        raise HTTPException(status_code=413, detail=f"More than {MATCH_CANDIDATES_MAX} candidates")
+
+    use_local_check = MATCH_LOCAL_MANDATORY_CHECK if request.local_mandatory_check is None else request.local_mandatory_check
+    with stage_timer("prescore"):
+        prescored = await asyncio.to_thread(prescore_candidates, request.job, candidates, cv_index.embedder, use_local_check)
+    size = MATCH_CANDIDATES_SHORTLIST if request.shortlist_size is None else max(0, request.shortlist_size)
+    shortlist = prescored[:size]
+    pre_screened = [pre_screened_entry(prescore) for prescore in prescored[size:]]
+    logger.info("🔎 Candidate pre-scoring", extra={
+        "job_id": request.job.id,
+        "candidates": len(candidates),
+        "shortlist": len(shortlist),
+        "missing_ids": len(missing_ids)
+    })
+
+    metadata = {
+        "temperature": MATCH_SINGLE_ROUTE.temperature,
+        "candidates_analyzed": len(candidates),
+        "candidates_ai_scored": len(shortlist),
+        "candidates_pre_screened": len(pre_screened),
+        "local_mandatory_check": use_local_check,
+        "missing_ids": missing_ids
+    }
+    if request.stream:
+        return StreamingResponse(
+            stream_candidate_matches(request.job, shortlist, pre_screened, use_local_check, metadata),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS
+        )
+
+    matches = [match async for match in iter_candidate_matches(request.job, shortlist, use_local_check)]
+    if matches and all(match.get("error") for match in matches):
+        raise HTTPException(status_code=502, detail=f"Error matching candidates: {matches[0]['error']}")
+    response = candidate_matches_response(request.job, matches, pre_screened, metadata)
+    if response["data"]["ranking"]:
+        best = response["data"]["ranking"][0]
+        logger.info("🏆 Candidate ranking end", extra={"job_id": request.job.id, "best_candidate_id": best["candidate_id"], "best_score": best.get("match_score", 0)})
+    return response
+
+@app.post("/api/generate-job-description")
+async def generate_job_description(request: GenerateJobDescriptionRequest):
+    """
+    Generate job description using AI
+
+    With `stream: true` the response is Server-Sent Events: `field` events as
+    each of description / requirements / benefits completes, then `done`
+    (same body as the non-streaming response) or `error`.
+    Identical requests are served from cache, one entry per position + language: changing
+    the keywords, location or job type replaces it, and `regenerate: true` forces a new one.
+    """
+    try:
+        logger.info("📝 Generating job description", extra={"title": request.title, "language": request.language, "stream": request.stream})
+
+        cache_key = generation_cache_key("job_description", request)
+        cache_status = "bypass" if request.regenerate else ("miss" if generate_cache.enabled else "disabled")
+
+        cached = await generate_cache.get(cache_key, bypass=request.regenerate)
+        if cached is not None:
+            logger.info("⚡ Cache hit, skipping AI call", extra={"cache_key": cache_key[:12]})
+            response = with_cache_status(cached, "hit")
+            if request.stream:
+                events = [sse_event("field", {"key": key, "value": value}) for key, value in cached["data"].items()]
+                return StreamingResponse(replay_events(*events, sse_event("done", response)), media_type="text/event-stream", headers=SSE_HEADERS)
+            return response
+
+        if request.stream:
+            return StreamingResponse(stream_job_description(request, cache_key, cache_status), media_type="text/event-stream", headers=SSE_HEADERS)
+        
+        with stage_timer("prompt_build", JOB_DESCRIPTION_ROUTE.primary):
+            messages = build_job_description_messages(request)
+        
+        result, model = await call_model_route(JOB_DESCRIPTION_ROUTE, messages, JobDescriptionOutput)
+        
+        content = result['choices'][0]['message']['content']
+        job_data, _ = await parse_llm_json(content, JobDescriptionOutput, model)
+        response = job_description_response(request, job_data, model)
+        await generate_cache.set_versioned(job_description_cache_group(request), cache_key, response)
+        
+        logger.info("✅ Generated job description")
+        
+        return with_cache_status(response, cache_status)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("❌ Error generating job description")
+        raise HTTPException(status_code=500, detail=f"Error generating job description: {str(e)}")
+
+@app.post("/api/generate-interview-questions")
+async def generate_interview_questions(request: GenerateInterviewQuestionsRequest):
+    """
+    ✅ NEW ENDPOINT - Generate interview questions based on job description using AI
+    
+    This endpoint analyzes the job requirements and generates comprehensive interview questions
+    categorized by:
+    - Technical Knowledge
+    - Soft Skills
+    - Situational Questions
+    - Career Goals & Motivation
+    
+    Returns markdown-formatted questions ready for use in interviews.
+    With `stream: true` the markdown is relayed as Server-Sent Events
+    (`delta` ... `done` | `error`) while the model is still writing.
+    Results are cached per job + language; changing the job's description or
+    requirements invalidates them, and `regenerate: true` forces a new set.
+    """
+    try:
+        logger.info("💬 Generating interview questions", extra={"job_id": request.job_id, "job_title": request.job_title, "job_level": request.level, "stream": request.stream})
+
+        cache_key = generation_cache_key("interview_questions", request)
+        cache_status = "bypass" if request.regenerate else ("miss" if generate_cache.enabled else "disabled")
+
+        cached = await generate_cache.get(cache_key, bypass=request.regenerate)
+        if cached is not None:
+            logger.info("⚡ Cache hit, skipping AI call", extra={"cache_key": cache_key[:12]})
+            response = with_cache_status(cached, "hit")
+            if request.stream:
+                events = (sse_event("delta", {"content": cached["data"]["questions"]}), sse_event("done", response))
+                return StreamingResponse(replay_events(*events), media_type="text/event-stream", headers=SSE_HEADERS)
+            return response
+
+        if request.stream:
+            return StreamingResponse(stream_interview_questions(request, cache_key, cache_status), media_type="text/event-stream", headers=SSE_HEADERS)
+        
+        with stage_timer("prompt_build", INTERVIEW_QUESTIONS_ROUTE.primary):
+            messages = build_interview_questions_messages(request)
+        
+        logger.debug("🤖 Calling OpenRouter AI for interview questions")
+        
+        # Route defaults: temperature 0.7 for diverse questions, 2500 tokens for a comprehensive set
+        result, model = await call_model_route(INTERVIEW_QUESTIONS_ROUTE, messages)
+        
+        content = clean_interview_questions(result['choices'][0]['message']['content'])
+        response = interview_questions_response(request, content, model)
+        await generate_cache.set_versioned(interview_questions_cache_group(request), cache_key, response)
+        
+        logger.info("✅ Generated interview questions", extra={"chars": len(content), "question_count": response['metadata']['question_count']})
+        
+        return with_cache_status(response, cache_status)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("❌ Error generating interview questions")
         raise HTTPException(
             status_code=500, 
             detail=f"Error generating interview questions: {str(e)}"
         )
 
+# ==================== VECTOR INDEX ====================
+
+def similarity_results(hits: List[Tuple[str, float]], metadata: Dict[str, dict], label: str) -> List[dict]:
+    return [
+        {"id": item_id, label: (metadata.get(item_id) or {}).get(label), "similarity": round(score, 4)}
+        for item_id, score in hits
+    ]
+
+@app.post("/api/index/cvs")
+async def index_cvs(request: IndexCVsRequest):
+    """Add or replace parsed CVs in the similarity index (the CV payload is kept for later matching)."""
+    items = [
+        (candidate.id, cv_fields(candidate.cv_data), {"full_name": candidate.cv_data.full_name, "cv_data": candidate.cv_data.model_dump(), "cv_text": candidate.cv_text})
+        for candidate in request.candidates
+    ]
+    with stage_timer("vector_index"):
+        indexed = await asyncio.to_thread(cv_index.upsert, items)
+    logger.info("🧭 CVs indexed", extra={"indexed": indexed, "total": len(cv_index)})
+    return {"success": True, "indexed": indexed, "total": len(cv_index)}
+
+@app.delete("/api/index/cvs/{cv_id}")
+async def delete_indexed_cv(cv_id: str):
+    if not await asyncio.to_thread(cv_index.delete, [cv_id]):
+        raise HTTPException(status_code=404, detail="CV not found in index")
+    return {"success": True, "deleted": cv_id, "total": len(cv_index)}
+
+@app.post("/api/index/jobs")
+async def index_jobs(request: IndexJobsRequest):
+    """Add or replace jobs in the similarity index, keyed on job id."""
+    items = [(job.id, job_fields(job), {"title": job.title, "job": job.model_dump()}) for job in request.jobs]
+    with stage_timer("vector_index"):
+        indexed = await asyncio.to_thread(job_index.upsert, items)
+    logger.info("🧭 Jobs indexed", extra={"indexed": indexed, "total": len(job_index)})
+    return {"success": True, "indexed": indexed, "total": len(job_index)}
+
+@app.delete("/api/index/jobs/{job_id}")
+async def delete_indexed_job(job_id: str):
+    if not await asyncio.to_thread(job_index.delete, [job_id]):
+        raise HTTPException(status_code=404, detail="Job not found in index")
+    return {"success": True, "deleted": job_id, "total": len(job_index)}
+
+@app.post("/api/index/cvs/search")
+async def search_similar_cvs(request: SimilarCVsRequest):
+    """Stored CVs closest to each job by cosine similarity (no LLM; a first pass, not a match score)."""
+    with stage_timer("vector_search"):
+        hits = await asyncio.to_thread(cv_index.search_fields, [job_fields(job) for job in request.jobs], request.top_k)
+        metadata = await asyncio.to_thread(cv_index.get, list({item_id for result in hits for item_id, _ in result}))
+    return {
+        "success": True,
+        "data": [
+            {"job_id": job.id, "candidates": similarity_results(result, metadata, "full_name")}
+            for job, result in zip(request.jobs, hits)
+        ]
+    }
+
+@app.post("/api/index/jobs/search")
+async def search_similar_jobs(request: SimilarJobsRequest):
+    """Stored jobs closest to each CV by cosine similarity."""
+    with stage_timer("vector_search"):
+        hits = await asyncio.to_thread(job_index.search_fields, [cv_fields(cv) for cv in request.cvs], request.top_k)
+        metadata = await asyncio.to_thread(job_index.get, list({item_id for result in hits for item_id, _ in result}))
+    return {
+        "success": True,
+        "data": [
+            {"email": cv.email, "jobs": similarity_results(result, metadata, "title")}
+            for cv, result in zip(request.cvs, hits)
+        ]
+    }
+
+@app.get("/api/index/stats")
+async def vector_index_stats():
+    return {"cvs": cv_index.stats(), "jobs": job_index.stats()}
+
+# ==================== BACKGROUND JOBS ====================
+
+async def run_parse_cv_job(params: dict, data: Optional[bytes]) -> dict:
+    parsed_data, cache_status, served_model = await parse_cv_content(CVUpload.from_bytes(params["filename"], data), bypass_cache=params["bypass_cache"])
+    return parse_cv_response(params["filename"], parsed_data, cache_status, served_model)
+
+async def run_match_cv_jobs_job(params: dict, data: Optional[bytes]) -> dict:
+    return await match_cv_jobs(MatchCVJobsRequest(**params))
+
+job_queue.register("parse_cv", run_parse_cv_job)
+job_queue.register("match_cv_jobs", run_match_cv_jobs_job)
+
+async def queue_parse_cv_job(upload: CVUpload, bypass_cache: bool = False, priority: str = "interactive") -> Tuple[str, bool]:
+    # The job store keeps its own copy of the file, so this is the one place an upload is read whole
+    return await job_queue.submit(
+        "parse_cv",
+        {"filename": upload.filename, "bypass_cache": bypass_cache},
+        data=await asyncio.to_thread(upload.read),
+        priority=priority,
+        dedup_key=content_key("parse_cv", upload.sha256, upload.filename, str(bypass_cache))
+    )
+
+def job_submitted_response(job_id: str, deduplicated: bool) -> JSONResponse:
+    return JSONResponse(status_code=202, content={
+        "success": True,
+        "job_id": job_id,
+        "deduplicated": deduplicated,
+        "status_url": f"/api/jobs/{job_id}",
+        "events_url": f"/api/jobs/{job_id}/events"
+    })
+
+@app.post("/api/jobs/parse-cv", status_code=202)
+async def submit_parse_cv_job(
+    file: UploadFile = File(None),
+    cv_file: UploadFile = File(None),
+    bypass_cache: bool = Query(False),
+    priority: str = Query("interactive", description="interactive | bulk")
+):
+    """Queue a /api/parse-cv run; returns a job id at once. The job result is the /api/parse-cv response."""
+    upload_file = file if file else cv_file
+    if not upload_file:
+        raise HTTPException(status_code=422, detail="No file provided")
+    if cv_extension(upload_file.filename) not in SUPPORTED_CV_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Unsupported file format")
+    upload = await read_cv_upload(upload_file)
+    try:
+        if not upload.size:
+            raise HTTPException(status_code=400, detail="File is empty")
+        job_id, deduplicated = await queue_parse_cv_job(upload, bypass_cache, priority)
+    finally:
+        upload.close()
+    logger.info("📥 Parse job queued", extra={"job_id": job_id, "deduplicated": deduplicated, "priority": priority})
+    return job_submitted_response(job_id, deduplicated)
+
+@app.post("/api/jobs/match-cv-jobs", status_code=202)
+async def submit_match_cv_jobs_job(request: MatchCVJobsRequest, priority: str = Query("interactive", description="interactive | bulk")):
+    """Queue a /api/match-cv-jobs run (no proxy timeout for large job lists); poll or subscribe for the result."""
+    params = request.model_dump()
+    job_id, deduplicated = await job_queue.submit(
+        "match_cv_jobs",
+        params,
+        priority=priority,
+        dedup_key=content_key("match_cv_jobs", json.dumps(params, sort_keys=True, ensure_ascii=False))
+    )
+    logger.info("📥 Match job queued", extra={"job_id": job_id, "deduplicated": deduplicated, "priority": priority, "jobs": len(request.jobs)})
+    return job_submitted_response(job_id, deduplicated)
+
+@app.get("/api/jobs/stats")
+async def job_stats():
+    return await job_queue.stats()
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job status: queued (with queue_position) | running | succeeded (with result) | failed (with error, status_code)."""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """SSE: a `status` event whenever the job's status changes, then `done` with the finished job."""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events() -> AsyncIterator[str]:
+        current, last_state, last_sent = job, None, time.monotonic()
+        while True:
+            state = (current["status"], current.get("queue_position"))
+            if current["status"] in TERMINAL:
+                yield sse_event("done", current)
+                return
+            if state != last_state:
+                yield sse_event("status", {key: value for key, value in current.items() if key != "result"})
+                last_state, last_sent = state, time.monotonic()
+            elif time.monotonic() - last_sent > 15:
+                # Comment line keeps idle proxies from closing the stream
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+            await asyncio.sleep(0.5)
+            current = await job_queue.get(job_id)
+            if current is None:
+                yield sse_event("error", {"status_code": 404, "detail": "Job not found"})
+                return
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))  # Đọc PORT từ Railway
@@ -0,0 +1,349 @@
+"""
+Deterministic mandatory-requirements checker.
+
+Runs the strict keyword rules from the match prompt locally: each clause of
+`mandatory_requirements` is classified (degree / years of experience / skill),
+its keywords are looked up in education -> university -> experience -> CV text
+(accent-insensitive, with skill aliases), and years of experience are summed
+from job date ranges. Every verdict carries evidence spans into the source text.
+Clauses that cannot be decided by keywords are left UNVERIFIED for the LLM.
+"""
+
+import re
+from dataclasses import asdict, dataclass, field
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from text_utils import normalize_text, normalize_with_offsets
+
+PASS = "PASS"
+FAIL = "FAIL"
+UNVERIFIED = "UNVERIFIED"
+NONE = "NONE"
+
+# Degree keyword -> accepted spellings (normalised). Strict: "dai hoc" does not imply "cu nhan".
+DEGREE_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "cử nhân": ("cu nhan", "bachelor", "b.sc", "bsc", "b.eng", "beng"),
+    "kỹ sư": ("ky su", "b.eng", "beng", "engineer's degree", "engineering degree"),
+    "thạc sĩ": ("thac si", "master", "msc", "m.sc", "mba"),
+    "tiến sĩ": ("tien si", "phd", "ph.d", "doctorate"),
+    "đại học": ("dai hoc", "university"),
+    "cao đẳng": ("cao dang", "college", "associate degree"),
+    "trung cấp": ("trung cap",),
+}
+
+# Canonical skill -> accepted spellings (normalised)
+SKILL_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "Python": ("python",),
+    "Java": ("java",),
+    "JavaScript": ("javascript", "js", "es6"),
+    "TypeScript": ("typescript", "ts"),
+    "Node.js": ("node.js", "nodejs", "node js"),
+    "React": ("react", "reactjs", "react.js"),
+    "Vue": ("vue", "vuejs", "vue.js"),
+    "Angular": ("angular", "angularjs"),
+    "PHP": ("php",),
+    "Laravel": ("laravel",),
+    "Django": ("django",),
+    "Flask": ("flask",),
+    "FastAPI": ("fastapi",),
+    "Spring": ("spring", "spring boot", "springboot"),
+    ".NET": (".net", "dotnet", "asp.net"),
+    "C#": ("c#", "csharp"),
+    "C++": ("c++", "cpp"),
+    "Golang": ("golang",),
+    "Ruby": ("ruby", "rails", "ruby on rails"),
+    "Kotlin": ("kotlin",),
+    "Swift": ("swift",),
+    "Flutter": ("flutter",),
+    "React Native": ("react native",),
+    "SQL": ("sql",),
+    "MySQL": ("mysql",),
+    "PostgreSQL": ("postgresql", "postgres"),
+    "MongoDB": ("mongodb", "mongo"),
+    "Redis": ("redis",),
+    "Docker": ("docker",),
+    "Kubernetes": ("kubernetes", "k8s"),
+    "AWS": ("aws", "amazon web services"),
+    "Azure": ("azure",),
+    "GCP": ("gcp", "google cloud"),
+    "Git": ("git",),
+    "Linux": ("linux",),
+    "HTML": ("html", "html5"),
+    "CSS": ("css", "css3"),
+    "Excel": ("excel",),
+    "Photoshop": ("photoshop",),
+    "Figma": ("figma",),
+    "AutoCAD": ("autocad",),
+    "IELTS": ("ielts",),
+    "TOEIC": ("toeic",),
+    "TOEFL": ("toefl",),
+    "JLPT": ("jlpt",),
+    "Tiếng Anh": ("tieng anh", "english"),
+    "Tiếng Nhật": ("tieng nhat", "japanese"),
+    "Tiếng Trung": ("tieng trung", "chinese"),
+}
+
+# Where to look, in priority order (mirrors the match prompt)
+DEGREE_FIELDS = ("education", "university", "cv_text")
+SKILL_FIELDS = ("experience", "education", "skills", "cv_text")
+
+_CLAUSE_SPLIT_RE = re.compile(r"(?:\r?\n|;|•|●|▪|(?:^|\s)[-*+]\s)+", re.MULTILINE)
+_YEARS_REQ_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*\+?\s*(?:nam|years?|yrs?)\b")
+_YEARS_CLAIM_RE = re.compile(
+    r"(\d+(?:[.,]\d+)?)\s*\+?\s*(?:nam|years?|yrs?)\s*(?:of\s+)?(?:kinh\s+nghiem|experience|exp\b|lam\s+viec)"
+    r"|(?:kinh\s+nghiem|experience)\s*[:\-]?\s*(\d+(?:[.,]\d+)?)\s*\+?\s*(?:nam|years?|yrs?)\b"
+)
+_MONTHS = {m: i for i, m in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1)}
+_DATE = (
+    r"(?:(?P<{p}m>\d{{1,2}})\s*[/.\-]\s*|(?P<{p}mn>jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+"
+    r"|thang\s+(?P<{p}mv>\d{{1,2}})\s*[/,]?\s*(?:nam\s+)?)?(?P<{p}y>(?:19|20)\d{{2}})"
+)
+_DATE_RANGE_RE = re.compile(
+    _DATE.format(p="s") + r"\s*(?:-|–|—|~|to|until|den|toi)\s*"
+    r"(?:" + _DATE.format(p="e") + r"|(?P<present>present|now|current|nay|hien\s+tai|hien\s+nay|bay\s+gio))"
+)
+_EDUCATION_CONTEXT_RE = re.compile(r"dai hoc|university|truong|college|hoc vien|gpa|education|hoc van|cao dang|sinh vien|student")
+
+
+@dataclass
+class Evidence:
+    field: str
+    start: int
+    end: int
+    text: str
+
+
+@dataclass
+class RequirementCheck:
+    requirement: str
+    kind: str                       # "degree" | "experience" | "skill" | "other"
+    status: str                     # PASS | FAIL | UNVERIFIED
+    keywords: List[str] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+    evidence: List[Evidence] = field(default_factory=list)
+    required_years: Optional[float] = None
+    found_years: Optional[float] = None
+
+
+@dataclass
+class MandatoryCheckResult:
+    status: str                     # PASS | FAIL | UNVERIFIED | NONE (job has no mandatory requirements)
+    checks: List[RequirementCheck] = field(default_factory=list)
+    years_of_experience: float = 0.0
+
+    @property
+    def failed(self) -> List[RequirementCheck]:
+        return [c for c in self.checks if c.status == FAIL]
+
+    @property
+    def decisive_fail(self) -> bool:
+        """FAIL on a structured clause (degree / years), safe to act on without the LLM."""
+        return any(c.kind in ("degree", "experience") for c in self.failed)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _alias_search(alias: str, norm_text: str):
+    """
+    Whole-word search that keeps "java" out of "javascript", "react" out of "react.js"-style
+    suffixes and "js" out of "node.js" (same token boundaries as skill_extraction).
+    """
+    return re.search(r"(?<![a-z0-9+#.])" + re.escape(alias) + r"(?![a-z0-9+#]|\.[a-z0-9])", norm_text)
+
+
+def _mentions(alias: str, norm_text: str) -> bool:
+    return _alias_search(alias, norm_text) is not None
+
+
+class _Source:
+    """One searchable CV field: normalised text plus offsets back to the original."""
+
+    def __init__(self, name: str, text: str):
+        self.name = name
+        self.text = text or ""
+        self.norm, self.offsets = normalize_with_offsets(self.text)
+
+    def find(self, alias: str) -> Optional[Evidence]:
+        match = _alias_search(alias, self.norm)
+        if not match:
+            return None
+        return self.evidence(match.start(), match.end())
+
+    def evidence(self, norm_start: int, norm_end: int) -> Evidence:
+        start = self.offsets[norm_start]
+        end = self.offsets[norm_end - 1] + 1
+        return Evidence(self.name, start, end, self.text[start:end])
+
+
+def _split_clauses(requirements: str) -> List[str]:
+    return [c.strip(" .,:") for c in _CLAUSE_SPLIT_RE.split(requirements) if c and c.strip(" .,:")]
+
+
+def _find_keyword(aliases: Sequence[str], sources: Dict[str, _Source], fields: Sequence[str]) -> Optional[Evidence]:
+    for name in fields:
+        source = sources.get(name)
+        if not source or not source.norm:
+            continue
+        for alias in aliases:
+            found = source.find(alias)
+            if found:
+                return found
+    return None
+
+
+def _month_of(match, prefix: str) -> int:
+    if match.group(prefix + "m"):
+        return min(max(int(match.group(prefix + "m")), 1), 12)
+    if match.group(prefix + "mn"):
+        return _MONTHS[match.group(prefix + "mn")]
+    if match.group(prefix + "mv"):
+        return min(max(int(match.group(prefix + "mv")), 1), 12)
+    return 1
+
+
+def estimate_years_of_experience(sources: Dict[str, _Source], today: Optional[date] = None) -> Tuple[float, List[Evidence]]:
+    """
+    Max of explicit claims ("5+ năm kinh nghiệm") and the merged total of job
+    date ranges. Ranges come from the experience field, or from CV text lines
+    that do not look like education.
+    """
+    today = today or date.today()
+    evidence: List[Evidence] = []
+
+    claimed = 0.0
+    for name in ("experience", "summary", "cv_text"):
+        source = sources.get(name)
+        if not source:
+            continue
+        for match in _YEARS_CLAIM_RE.finditer(source.norm):
+            value = float((match.group(1) or match.group(2)).replace(",", "."))
+            if value < 50 and value > claimed:
+                claimed = value
+                evidence.append(source.evidence(match.start(), match.end()))
+
+    intervals = []
+    range_sources = [sources["experience"]] if sources.get("experience") and sources["experience"].norm else []
+    if not range_sources and sources.get("cv_text"):
+        range_sources = [sources["cv_text"]]
+    for source in range_sources:
+        for match in _DATE_RANGE_RE.finditer(source.norm):
+            if source.name == "cv_text":
+                # Skip school periods: look at this line and the one above it (institution name)
+                line_start = source.norm.rfind("\n", 0, max(source.norm.rfind("\n", 0, match.start()), 0)) + 1
+                line_end = source.norm.find("\n", match.end())
+                context = source.norm[line_start:line_end if line_end != -1 else len(source.norm)]
+                if _EDUCATION_CONTEXT_RE.search(context):
+                    continue
+            start = int(match.group("sy")) * 12 + _month_of(match, "s") - 1
+            if match.group("present"):
+                end = today.year * 12 + today.month - 1
+            else:
+                end = int(match.group("ey")) * 12 + _month_of(match, "e") - 1
+            if end >= start:
+                intervals.append((start, end + 1 if match.group("em") or match.group("emn") or match.group("emv") or match.group("present") else end))
+                evidence.append(source.evidence(match.start(), match.end()))
+
+    months = 0
+    for start, end in sorted(_merge_intervals(intervals)):
+        months += end - start
+    from_ranges = round(months / 12, 1)
+
+    return max(claimed, from_ranges), evidence
+
+
+def _merge_intervals(intervals: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _skills_in(norm_clause: str) -> List[Tuple[str, Tuple[str, ...]]]:
+    found = []
+    for canonical, aliases in SKILL_ALIASES.items():
+        if any(_mentions(alias, norm_clause) for alias in aliases):
+            found.append((canonical, aliases))
+    # "React Native" also contains "React": keep the longer one only
+    names = {name for name, _ in found}
+    return [(n, a) for n, a in found if not any(n != other and normalize_text(n) in normalize_text(other) for other in names)]
+
+
+def check_clause(clause: str, sources: Dict[str, _Source], years: float, years_evidence: List[Evidence]) -> RequirementCheck:
+    norm_clause = normalize_text(clause)
+    check = RequirementCheck(requirement=clause, kind="other", status=UNVERIFIED)
+    # "Python hoặc Java": any one keyword is enough, otherwise every keyword is required
+    any_of = re.search(r"\b(?:hoac|or)\b", norm_clause) is not None
+    found_any = False
+
+    years_match = _YEARS_REQ_RE.search(norm_clause)
+    if years_match:
+        check.kind = "experience"
+        check.required_years = float(years_match.group(1).replace(",", "."))
+        check.found_years = years
+        check.keywords.append(f"{check.required_years:g}+ năm")
+        found_any = True
+        if years >= check.required_years:
+            check.evidence.extend(years_evidence)
+        else:
+            check.missing.append(f"{check.required_years:g}+ năm kinh nghiệm (tìm thấy {years:g} năm)")
+
+    keyword_hits = []
+    for keyword, aliases in DEGREE_ALIASES.items():
+        if any(_mentions(a, norm_clause) for a in aliases):
+            keyword_hits.append(("degree", keyword, aliases, DEGREE_FIELDS))
+    for skill, aliases in _skills_in(norm_clause):
+        keyword_hits.append(("skill", skill, aliases, SKILL_FIELDS))
+
+    keyword_missing = []
+    for kind, keyword, aliases, fields in keyword_hits:
+        if check.kind == "other":
+            check.kind = kind
+        check.keywords.append(keyword)
+        found_any = True
+        evidence = _find_keyword(aliases, sources, fields)
+        if evidence:
+            check.evidence.append(evidence)
+        else:
+            keyword_missing.append(keyword)
+
+    if keyword_missing and not (any_of and len(keyword_missing) < len(keyword_hits)):
+        check.missing.extend(keyword_missing)
+
+    if found_any:
+        check.status = FAIL if check.missing else PASS
+    return check
+
+
+def check_mandatory_requirements(
+    mandatory_requirements: Optional[str],
+    cv_data,
+    cv_text: str,
+    today: Optional[date] = None,
+) -> MandatoryCheckResult:
+    if not mandatory_requirements or not mandatory_requirements.strip():
+        return MandatoryCheckResult(status=NONE)
+
+    sources = {
+        "education": _Source("education", cv_data.education or ""),
+        "university": _Source("university", cv_data.university or ""),
+        "experience": _Source("experience", cv_data.experience or ""),
+        "skills": _Source("skills", ", ".join(getattr(cv_data, "skills", None) or [])),
+        "summary": _Source("summary", getattr(cv_data, "summary", None) or ""),
+        "cv_text": _Source("cv_text", cv_text or ""),
+    }
+    years, years_evidence = estimate_years_of_experience(sources, today=today)
+
+    checks = [check_clause(clause, sources, years, years_evidence) for clause in _split_clauses(mandatory_requirements)]
+    if any(c.status == FAIL for c in checks):
+        status = FAIL
+    elif checks and all(c.status == PASS for c in checks):
+        status = PASS
+    else:
+        status = UNVERIFIED
+    return MandatoryCheckResult(status=status, checks=checks, years_of_experience=years)
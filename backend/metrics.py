@@ -0,0 +1,241 @@
+"""
+Minimal Prometheus metrics (text exposition format, no extra dependency).
+
+Stage timings, LLM token usage, cache and failure counters are recorded from
+anywhere in the request path; the endpoint label comes from a contextvar set
+by `MetricsMiddleware`, so helpers deep in the call stack don't need it passed in.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds: sub-ms cache hits up to multi-minute LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+current_endpoint: ContextVar[str] = ContextVar("metrics_endpoint", default="background")
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}" for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> ([count per bucket (+Inf last)], sum)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = self.header()
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_number(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.histogram(
+    "cv_request_duration_seconds", "Total request time, including streamed bodies", ("endpoint", "method", "status")
+)
+STAGE_DURATION = REGISTRY.histogram(
+    "cv_stage_duration_seconds", "Time per pipeline stage (extraction, prompt_build, llm, json_repair)", ("stage", "endpoint", "model")
+)
+LLM_TOKENS = REGISTRY.counter(
+    "cv_llm_tokens_total", "Tokens reported in the OpenRouter usage field", ("endpoint", "model", "type")
+)
+LLM_REQUESTS = REGISTRY.counter(
+    "cv_llm_requests_total", "OpenRouter calls by outcome", ("endpoint", "model", "outcome")
+)
+LLM_RETRIES = REGISTRY.counter(
+    "cv_llm_retries_total", "OpenRouter calls retried after a transient failure", ("endpoint", "model")
+)
+LLM_HEDGES = REGISTRY.counter(
+    "cv_llm_hedges_total", "Hedged second attempts sent after the first exceeded the p95 latency", ("endpoint", "model")
+)
+LLM_COALESCED = REGISTRY.counter(
+    "cv_llm_coalesced_total", "Calls served by an identical in-flight OpenRouter request (single-flight)", ("endpoint", "model")
+)
+LLM_FAILURES = REGISTRY.counter(
+    "cv_llm_failures_total", "OpenRouter calls that failed (HTTP status, timeout, transport error)", ("endpoint", "model", "reason")
+)
+MODEL_FALLBACKS = REGISTRY.counter(
+    "cv_model_fallbacks_total", "Calls that gave up on a model and moved to the route's next one", ("endpoint", "route", "model")
+)
+LLM_JSON_RECOVERIES = REGISTRY.counter(
+    "cv_llm_json_recoveries_total", "AI answers that needed recovery: truncated output salvaged or a JSON repair call", ("endpoint", "model", "outcome")
+)
+CACHE_EVENTS = REGISTRY.counter(
+    "cv_cache_events_total", "Result cache lookups and writes", ("cache", "event")
+)
+
+
+@contextmanager
+def stage_timer(stage: str, model: str = ""):
+    """Time a pipeline stage under the current endpoint."""
+    with STAGE_DURATION.time(stage=stage, endpoint=current_endpoint.get(), model=model):
+        yield
+
+
+def record_llm_usage(model: str, usage: Optional[dict]) -> None:
+    if not usage:
+        return
+    endpoint = current_endpoint.get()
+    for kind in ("prompt", "completion"):
+        tokens = usage.get(f"{kind}_tokens")
+        if tokens:
+            LLM_TOKENS.inc(tokens, endpoint=endpoint, model=model, type=kind)
+
+
+def record_llm_failure(model: str, reason: str) -> None:
+    endpoint = current_endpoint.get()
+    LLM_FAILURES.inc(endpoint=endpoint, model=model, reason=reason)
+    LLM_REQUESTS.inc(endpoint=endpoint, model=model, outcome="error")
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware: labels everything in the request with its route path
+    and times the whole response, until the last chunk of a streamed body.
+    """
+
+    def __init__(self, app, known_paths: Optional[Callable[[], Iterable[str]]] = None):
+        self.app = app
+        # Resolved on the first request, once every route has been registered
+        self._known_paths_factory = known_paths
+        self._known_paths: Optional[set] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if self._known_paths is None and self._known_paths_factory is not None:
+            self._known_paths = set(self._known_paths_factory())
+        path = scope.get("path", "")
+        # Unknown paths share one label so scanners can't blow up cardinality
+        endpoint = path if self._known_paths is None or path in self._known_paths else "other"
+        token = current_endpoint.set(endpoint)
+        status = {"code": 500}
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                endpoint=endpoint,
+                method=scope.get("method", ""),
+                status=str(status["code"])
+            )
+            current_endpoint.reset(token)
@@ -0,0 +1,109 @@
+"""
+Per-endpoint model routing.
+
+Each LLM call site names a route: a primary model, ordered fallbacks, sampling
+settings and budgets. A model is skipped when its estimated cost exceeds the
+route's cost budget, and abandoned for the next one once it has used up the
+latency budget or answered with a retryable error (rate limit, 5xx, timeout,
+open circuit). The route as a whole has a deadline; the last model gets what
+the earlier ones left of it. Every route is overridable from the environment:
+
+    MODEL_ROUTE_PARSE_CV=openai/gpt-4o-mini,google/gemini-2.0-flash-001
+    MODEL_ROUTE_PARSE_CV_LATENCY_BUDGET=30
+    MODEL_ROUTE_PARSE_CV_DEADLINE=90
+    MODEL_ROUTE_PARSE_CV_MAX_COST=0.01
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# USD per 1M (prompt, completion) tokens; MODEL_PRICES='{"model": [in, out]}' adds or overrides entries
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "openai/gpt-4o-mini": (0.15, 0.60),
+    "openai/gpt-4o": (2.50, 10.00),
+    "google/gemini-2.0-flash-001": (0.10, 0.40),
+    "anthropic/claude-3.5-haiku": (0.80, 4.00),
+}
+MODEL_PRICES.update({model: tuple(price) for model, price in json.loads(os.getenv("MODEL_PRICES", "{}")).items()})
+
+# Upstream answers that justify trying the next model (the request itself is fine)
+FALLBACK_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+_CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class ModelRoute:
+    name: str
+    models: List[str]
+    temperature: float
+    max_tokens: int
+    # Seconds spent on one model (all its retries) before falling back
+    latency_budget: Optional[float] = None
+    # Seconds for the whole route, every model included (None = OPENROUTER_RETRY_DEADLINE)
+    deadline: Optional[float] = None
+    # Estimated USD per call; models over budget are skipped unless none fits
+    max_cost: Optional[float] = None
+
+    @property
+    def primary(self) -> str:
+        return self.models[0]
+
+    def candidates(self, messages: List[dict]) -> List[str]:
+        """Models to try, in order, after the cost budget is applied."""
+        if self.max_cost is None:
+            return list(self.models)
+        affordable = [m for m in self.models if (estimate_cost(m, messages, self.max_tokens) or 0.0) <= self.max_cost]
+        return affordable or [self.primary]
+
+    def time_limit(self, remaining: float, last: bool) -> float:
+        """Seconds the next model may use, given what is left of the route's deadline."""
+        if last or self.latency_budget is None:
+            return max(remaining, 0.0)
+        return max(min(self.latency_budget, remaining), 0.0)
+
+
+def estimate_cost(model: str, messages: List[dict], max_tokens: int) -> Optional[float]:
+    """Upper-bound USD cost of one call (prompt estimated from characters, completion at max_tokens)."""
+    price = MODEL_PRICES.get(model)
+    if price is None:
+        return None
+    prompt_tokens = sum(len(m.get("content") or "") for m in messages) / _CHARS_PER_TOKEN
+    return (prompt_tokens * price[0] + max_tokens * price[1]) / 1_000_000
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def load_route(name: str, models: str, temperature: float, max_tokens: int, latency_budget: Optional[float] = None, max_cost: Optional[float] = None, deadline: Optional[float] = None) -> ModelRoute:
+    prefix = f"MODEL_ROUTE_{name.upper()}"
+    return ModelRoute(
+        name=name,
+        models=[m.strip() for m in os.getenv(prefix, models).split(",") if m.strip()],
+        temperature=_env_float(f"{prefix}_TEMPERATURE", temperature),
+        max_tokens=int(_env_float(f"{prefix}_MAX_TOKENS", max_tokens)),
+        latency_budget=_env_float(f"{prefix}_LATENCY_BUDGET", latency_budget),
+        max_cost=_env_float(f"{prefix}_MAX_COST", max_cost),
+        deadline=_env_float(f"{prefix}_DEADLINE", deadline),
+    )
+
+
+ROUTES: Dict[str, ModelRoute] = {
+    route.name: route for route in (
+        load_route("parse_cv", "openai/gpt-4o-mini,google/gemini-2.0-flash-001", 0.3, 2000, latency_budget=30),
+        load_route("match", "openai/gpt-4o-mini,google/gemini-2.0-flash-001", 0.2, 4000, latency_budget=45),
+        load_route("match_single", "openai/gpt-4o-mini,google/gemini-2.0-flash-001", 0.2, 1000, latency_budget=20),
+        load_route("job_description", "openai/gpt-4o-mini,google/gemini-2.0-flash-001", 0.7, 2000, latency_budget=30),
+        load_route("interview_questions", "openai/gpt-4o-mini,google/gemini-2.0-flash-001", 0.7, 2500, latency_budget=30),
+        # Syntax-only fix-ups of malformed replies: small prompt, deterministic
+        load_route("json_repair", "openai/gpt-4o-mini,google/gemini-2.0-flash-001", 0.0, 4000, latency_budget=20),
+    )
+}
+
+
+def get_route(name: str) -> ModelRoute:
+    return ROUTES[name]
@@ -0,0 +1,125 @@
+"""
+Shared async OpenRouter client.
+
+One httpx.AsyncClient per process with a keep-alive HTTP/2 connection pool,
+reused by every endpoint so LLM calls never block the event loop. Every call
+goes through the retry / rate limit / circuit breaker policy in `resilience`.
+"""
+
+import os
+from typing import List, Optional
+
+import httpx
+
+from resilience import ResilientCaller
+
+OPENROUTER_MAX_CONNECTIONS = int(os.getenv("OPENROUTER_MAX_CONNECTIONS", "200"))
+OPENROUTER_MAX_KEEPALIVE = int(os.getenv("OPENROUTER_MAX_KEEPALIVE", "50"))
+OPENROUTER_KEEPALIVE_EXPIRY = float(os.getenv("OPENROUTER_KEEPALIVE_EXPIRY", "30"))
+OPENROUTER_CONNECT_TIMEOUT = float(os.getenv("OPENROUTER_CONNECT_TIMEOUT", "10"))
+OPENROUTER_POOL_TIMEOUT = float(os.getenv("OPENROUTER_POOL_TIMEOUT", "30"))
+OPENROUTER_TIMEOUT = float(os.getenv("OPENROUTER_TIMEOUT", "60"))
+OPENROUTER_HTTP2 = os.getenv("OPENROUTER_HTTP2", "true").lower() in ("1", "true", "yes")
+
+
+class OpenRouterClient:
+    """Lazily-created pooled client for the OpenRouter chat completions API."""
+
+    def __init__(self, base_url: str, api_key: str):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self._client: Optional[httpx.AsyncClient] = None
+        self.resilience = ResilientCaller()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=OPENROUTER_HTTP2,
+                limits=httpx.Limits(
+                    max_connections=OPENROUTER_MAX_CONNECTIONS,
+                    max_keepalive_connections=OPENROUTER_MAX_KEEPALIVE,
+                    keepalive_expiry=OPENROUTER_KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(
+                    OPENROUTER_TIMEOUT,
+                    connect=OPENROUTER_CONNECT_TIMEOUT,
+                    pool=OPENROUTER_POOL_TIMEOUT,
+                ),
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json",
+                    "HTTP-Referer": "http://localhost:8000",
+                    "X-Title": "CV Management System"
+                },
+            )
+        return self._client
+
+    @staticmethod
+    def _timeout(timeout: Optional[float]) -> httpx.Timeout:
+        return httpx.Timeout(
+            timeout or OPENROUTER_TIMEOUT,
+            connect=OPENROUTER_CONNECT_TIMEOUT,
+            pool=OPENROUTER_POOL_TIMEOUT,
+        )
+
+    async def chat_completion(
+        self,
+        messages: List[dict],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        response_format: Optional[dict] = None,
+    ) -> httpx.Response:
+        """
+        POST /chat/completions with retries (and hedging, when enabled).
+        `timeout` overrides the read timeout of each attempt, `deadline` the retry deadline.
+        """
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if response_format:
+            payload["response_format"] = response_format
+        return await self.resilience.call(
+            lambda: self._get_client().post("/chat/completions", json=payload, timeout=self._timeout(timeout)),
+            model,
+            hedge=True,
+            deadline=deadline,
+        )
+
+    async def stream_chat_completion(
+        self,
+        messages: List[dict],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        response_format: Optional[dict] = None,
+    ) -> httpx.Response:
+        """
+        Streaming (SSE) /chat/completions. Retries happen before the first byte
+        only; the caller reads the body and must `await response.aclose()`.
+        """
+        client = self._get_client()
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True
+        }
+        if response_format:
+            payload["response_format"] = response_format
+        request = client.build_request("POST", "/chat/completions", json=payload, timeout=self._timeout(timeout))
+        return await self.resilience.call(lambda: client.send(request, stream=True), model, deadline=deadline)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
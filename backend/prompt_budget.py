@@ -0,0 +1,115 @@
+"""
+Token-budget aware assembly of the match prompt.
+
+The CV context and the static instructions are fixed; the job blocks have to
+fit in what is left of the input budget. When they do not, job fields are
+trimmed in order of value to the scoring: benefits and location text are
+dropped first, then descriptions and finally requirements are cut down,
+always the longest ones first. Title, id and `mandatory_requirements` are
+never touched.
+"""
+
+from dataclasses import asdict, dataclass
+from typing import Callable, List, Optional, Sequence, Tuple, TypeVar
+
+from pydantic import BaseModel
+
+from token_count import count_tokens, truncate_tokens
+
+# Shown to the model in place of a dropped field
+OMITTED = "(đã lược bỏ để giới hạn độ dài prompt)"
+
+# (field, action): "drop" removes the field, "shorten" cuts the longest values down to a common cap
+TRIM_ORDER: Tuple[Tuple[str, str], ...] = (
+    ("benefits", "drop"),
+    ("location", "drop"),
+    ("work_location", "drop"),
+    ("description", "shorten"),
+    ("requirements", "shorten"),
+)
+# A shortened field keeps at least this many tokens
+MIN_FIELD_TOKENS = 40
+
+Job = TypeVar("Job", bound=BaseModel)
+
+
+@dataclass
+class Trim:
+    job_id: str
+    field: str
+    action: str
+    tokens_before: int
+    tokens_after: int
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class BudgetReport:
+    budget: Optional[int]
+    # Estimated input tokens of the (largest) prompt after trimming
+    input_tokens: int
+    trims: List[Trim]
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.input_tokens > self.budget
+
+    def to_dict(self) -> dict:
+        return {
+            "input_token_budget": self.budget,
+            "input_tokens": self.input_tokens,
+            "over_budget": self.over_budget,
+            "trimmed": [trim.to_dict() for trim in self.trims]
+        }
+
+
+def _shorten_cap(lengths: Sequence[int], excess: int) -> int:
+    """Largest per-value token cap that removes at least `excess` tokens (water-filling from the top)."""
+    low, high = MIN_FIELD_TOKENS, max(lengths)
+    while low < high:
+        cap = (low + high + 1) // 2
+        if sum(max(0, n - cap) for n in lengths) >= excess:
+            low = cap
+        else:
+            high = cap - 1
+    return low
+
+
+def fit_jobs(jobs: Sequence[Job], render: Callable[[int, Job], str], available: int) -> Tuple[List[Job], List[Trim]]:
+    """
+    Trim job fields until the rendered job blocks fit in `available` tokens.
+    `render(index, job)` returns the prompt text of one job. Returns (jobs, trims);
+    the jobs may still be over budget once every trimmable field is used up.
+    """
+    jobs = list(jobs)
+    sizes = [count_tokens(render(i, job)) for i, job in enumerate(jobs)]
+    trims: List[Trim] = []
+    omitted_tokens = count_tokens(OMITTED)
+
+    for field, action in TRIM_ORDER:
+        excess = sum(sizes) - available
+        if excess <= 0:
+            break
+        values = [getattr(job, field) or "" for job in jobs]
+        lengths = [count_tokens(value) for value in values]
+        cap = _shorten_cap(lengths, excess) if action == "shorten" and any(lengths) else None
+
+        # Longest values first, so a drop stops as soon as the budget is met
+        for i in sorted(range(len(jobs)), key=lambda i: -lengths[i]):
+            if sum(sizes) <= available or not values[i]:
+                break
+            if action == "drop":
+                if lengths[i] <= omitted_tokens:
+                    break
+                new_value = OMITTED
+            elif lengths[i] > cap:
+                new_value = truncate_tokens(values[i], cap)
+            else:
+                break
+            jobs[i] = jobs[i].model_copy(update={field: new_value})
+            sizes[i] = count_tokens(render(i, jobs[i]))
+            trims.append(Trim(str(jobs[i].id), field, "dropped" if action == "drop" else "shortened", lengths[i], count_tokens(new_value)))
+
+    return jobs, trims
@@ -0,0 +1,116 @@
+"""
+Precompiled prompt templates.
+
+A template is source text with `$name` / `${name}` placeholders (string.Template
+syntax, so the JSON examples in prompts need no brace escaping). It is split
+once, at import, into literal and placeholder segments; rendering is a join.
+The static part of every template is measured in tokens and checked against
+its budget, and `compact()` derives the decoration-free variant.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass, field
+from string import Template
+from typing import Dict, List, Optional, Tuple
+
+from log_config import logger
+from token_count import count_tokens, tokenizer_name
+
+# Lines made only of box-drawing rules, e.g. "━━━━" / "════"
+_RULE_LINE_RE = re.compile(r"^[ \t]*[━═─—-]{3,}[ \t]*$", re.MULTILINE)
+# Emoji used as section icons only; ✅ ❌ ⚠️ ⭐ 🧪 carry meaning in the match prompts and are kept
+_DECORATIVE_RE = re.compile(r"(?:📋|📌|📝|💰|💼|🎓|👤|📄|🎯|📧|📱|📍|🔵|🔴|🚨|🤖)️? ?")
+_REPEATED_MARK_RE = re.compile(r"(⚠️){2,}")
+_LONE_MARK_RE = re.compile(r"^⚠️\n", re.MULTILINE)
+_INDENT_RE = re.compile(r"^[ \t]{2,}", re.MULTILINE)
+_TRAILING_SPACE_RE = re.compile(r"[ \t]+$", re.MULTILINE)
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+def compact_text(text: str) -> str:
+    """Drop rules, icon emoji, indentation and blank-line runs; wording is untouched."""
+    text = _RULE_LINE_RE.sub("", text)
+    text = _DECORATIVE_RE.sub("", text)
+    text = _REPEATED_MARK_RE.sub(r"\1", text)
+    text = _LONE_MARK_RE.sub("", text)
+    text = _INDENT_RE.sub(" ", text)
+    text = _TRAILING_SPACE_RE.sub("", text)
+    return _BLANK_LINES_RE.sub("\n\n", text)
+
+
+@dataclass
+class PromptTemplate:
+    name: str
+    source: str
+    # Max tokens for the static (non-placeholder) text; exceeding it is logged at startup
+    budget: Optional[int] = None
+    # (literal, placeholder name or None) pairs
+    segments: List[Tuple[str, Optional[str]]] = field(init=False, repr=False)
+    static_tokens: int = field(init=False)
+
+    def __post_init__(self):
+        self.segments = []
+        position = 0
+        for match in Template.pattern.finditer(self.source):
+            if match.group("invalid") is not None:
+                raise ValueError(f"Invalid placeholder in prompt template {self.name!r} at {match.start()}")
+            literal = self.source[position:match.start()]
+            name = match.group("named") or match.group("braced")
+            if name is None:  # "$$" escape
+                literal += "$"
+            self.segments.append((literal, name))
+            position = match.end()
+        self.segments.append((self.source[position:], None))
+        self.static_tokens = count_tokens("".join(literal for literal, _ in self.segments))
+
+    @property
+    def placeholders(self) -> List[str]:
+        return [name for _, name in self.segments if name]
+
+    @property
+    def is_static(self) -> bool:
+        return not self.placeholders
+
+    def render(self, **values) -> str:
+        return "".join(literal + (str(values[name]) if name else "") for literal, name in self.segments)
+
+    def compact(self) -> "PromptTemplate":
+        return PromptTemplate(self.name, compact_text(self.source), self.budget)
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "static_tokens": self.static_tokens,
+            "budget": self.budget,
+            "within_budget": self.budget is None or self.static_tokens <= self.budget,
+            "placeholders": self.placeholders,
+            # Changes whenever the cached prefix would stop matching
+            "sha256": hashlib.sha256(self.source.encode("utf-8")).hexdigest()[:16]
+        }
+
+
+class PromptSet:
+    """The templates of one variant ("full" / "compact"), looked up by name."""
+
+    def __init__(self, variant: str, templates: List[PromptTemplate]):
+        self.variant = variant
+        self.templates: Dict[str, PromptTemplate] = {template.name: template for template in templates}
+
+    def __getitem__(self, name: str) -> PromptTemplate:
+        return self.templates[name]
+
+    def check_budgets(self) -> None:
+        for template in self.templates.values():
+            if template.budget is not None and template.static_tokens > template.budget:
+                logger.warning("⚠️ Prompt template over its token budget", extra={
+                    "template": template.name, "variant": self.variant,
+                    "static_tokens": template.static_tokens, "budget": template.budget
+                })
+
+    def stats(self) -> dict:
+        return {
+            "variant": self.variant,
+            "tokenizer": tokenizer_name(),
+            "templates": [template.stats() for template in self.templates.values()]
+        }
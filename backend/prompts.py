@@ -0,0 +1,569 @@
+"""
+Prompt text for CV parsing and CV-job matching, as precompiled templates.
+
+PROMPT_VARIANT=full sends the original prompts. "compact" drops the rules and
+icon decoration and moves the parse guidelines from after the CV into the
+system message, so every parse request starts with the same long static
+prefix that provider-side prompt caching can reuse. Compare the two with
+`python -m bench.prompt_equivalence` before switching.
+"""
+
+import os
+
+from prompt_templates import PromptSet, PromptTemplate, compact_text
+
+PROMPT_VARIANT = os.getenv("PROMPT_VARIANT", "full")
+
+# ==================== PARSE CV ====================
+
+PARSE_CV_SYSTEM = """You are an expert CV parser with deep understanding of resume formats and recruitment practices.
+
+CORE PRINCIPLES:
+1. Extract information from ENTIRE CV, not just labeled sections
+2. Look for implicit mentions and context clues
+3. Aggregate information from multiple sources
+4. Deduplicate and organize information logically
+5. Return ONLY valid JSON with no markdown formatting"""
+
+PARSE_CV_INTRO = """Parse this CV comprehensively and extract ALL relevant information from every section:"""
+
+PARSE_CV_CONTENT_HEADER = """━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+CV CONTENT:
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+"""
+
+PARSE_CV_GUIDELINES = """━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+COMPREHENSIVE EXTRACTION GUIDELINES:
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+1. FULL NAME:
+   - Usually at the very top (first 3-5 lines)
+   - Format: 2-5 capitalized words
+   - Exclude: email, phone, addresses, titles
+   - Example: "JOHN MICHAEL DOE" or "Nguyễn Văn An"
+
+2. CONTACT INFORMATION:
+   📧 EMAIL: xxx@domain.com format
+   📱 PHONE: Various formats (+84, 0, international codes)
+   📍 ADDRESS: Full or partial address, city, country
+
+3. EDUCATION & QUALIFICATIONS - ⚠️ COMPREHENSIVE EXTRACTION:
+   
+   ✅ Extract from ALL these sources:
+   
+   A. Traditional "Education" section:
+      - University/College name and location
+      - Degree (Bachelor's, Master's, PhD, Associate, Diploma)
+      - Major/Field of study
+      - GPA if mentioned
+      - Graduation year or attendance period
+      - Academic achievements, honors
+   
+   B. Certifications & Licenses (often separate section or mixed with education):
+      - Professional certifications (AWS Certified, PMP, Google Analytics, etc.)
+      - Industry certifications (CompTIA, Cisco, Microsoft, etc.)
+      - Language certifications (IELTS, TOEFL, HSK, JLPT)
+      - Training certificates
+      - Online course completions (Coursera, Udemy certificates if mentioned)
+      - Professional licenses (CPA, PE, Medical licenses)
+   
+   C. Scattered qualifications throughout CV:
+      - In Summary/Profile: "MBA graduate", "Certified Developer"
+      - In Experience: "Completed X certification while working"
+      - In Skills: "AWS Certified Solutions Architect"
+      - Footer or header notes about credentials
+   
+   D. Academic background indicators:
+      - Coursework mentions
+      - Research projects
+      - Thesis or dissertation titles
+      - Academic publications
+   
+   COMBINE ALL into comprehensive "education" field:
+   - Start with formal degrees (most recent first)
+   - Then add certifications and licenses
+   - Include completion dates when available
+   - Mention GPA, honors, relevant coursework
+   - Format naturally as a paragraph or organized list
+   
+   Example output:
+   "Bachelor of Science in Computer Science, Stanford University (2018-2022), GPA: 3.8/4.0, Magna Cum Laude. 
+   AWS Certified Solutions Architect Professional (2023). 
+   Google Cloud Professional Data Engineer (2023). 
+   IELTS Academic: 7.5 (2022). 
+   Completed Advanced Machine Learning Specialization, Coursera (2023)."
+
+4. UNIVERSITY (Specific institution name):
+   - Extract the primary university/college name
+   - Example: "Stanford University" or "Đại học Bách Khoa Hà Nội"
+   - If multiple institutions, use the most recent or highest degree institution
+
+5. EXPERIENCE - ⚠️ COMPREHENSIVE EXTRACTION:
+   
+   ✅ Extract from ALL these sources:
+   
+   A. Traditional "Experience" / "Work History" section:
+      - Job titles, company names, dates
+      - Responsibilities and achievements
+      - Technologies and tools used
+      - Team size, leadership roles
+      - Measurable results (increased by X%, reduced by Y)
+   
+   B. Summary/Objective/Profile (top of CV):
+      - Years of experience mentioned: "5+ years in software development"
+      - Industry expertise: "specialized in fintech applications"
+      - Leadership experience: "led cross-functional teams"
+      - Key achievements highlighted
+   
+   C. Projects section:
+      - Personal projects with technologies used
+      - Academic projects demonstrating skills
+      - Freelance work
+      - Open-source contributions
+   
+   D. Achievements/Awards section:
+      - Professional accomplishments
+      - Recognition and awards that indicate experience level
+   
+   E. Volunteer work and internships:
+      - Relevant volunteer experience
+      - Internship experiences
+   
+   COMBINE ALL mentions into ONE comprehensive experience narrative:
+   - Preserve chronological sense where possible
+   - Include summary statements about total years of experience
+   - Mention specific companies, roles, and durations
+   - Highlight key technologies, achievements, and responsibilities
+   - Keep quantifiable results (percentages, numbers, metrics)
+   
+   Example output:
+   "Experienced software engineer with 6+ years building scalable web applications. 
+   Senior Full-Stack Developer at TechCorp Inc. (2021-2024): Led team of 5 developers, 
+   architected microservices handling 1M+ daily requests, reduced API latency by 40%. 
+   Software Developer at StartupXYZ (2018-2021): Developed e-commerce platform using 
+   MERN stack serving 50K+ users, implemented CI/CD pipeline reducing deployment time by 60%. 
+   Personal Projects: Built open-source React component library with 2K+ GitHub stars, 
+   developed mobile app using React Native with 10K+ downloads."
+
+6. SKILLS - ⚠️ COMPREHENSIVE EXTRACTION & AGGREGATION:
+   
+   ✅ Extract from ALL these sources:
+   
+   A. Traditional "Skills" / "Technical Skills" section
+   B. Experience descriptions (technologies mentioned in job descriptions)
+   C. Projects section (frameworks and tools used)
+   D. Education section (programming languages taught, tools learned)
+   E. Summary/Profile (self-described expertise)
+   F. Certifications (implies proficiency in certified technology)
+   G. Tools/Technologies subsections
+   
+   What to capture:
+   - Programming languages: JavaScript, Python, Java, C++, etc.
+   - Frameworks & libraries: React, Vue, Django, Spring Boot, etc.
+   - Databases: MySQL, PostgreSQL, MongoDB, Redis, etc.
+   - Cloud platforms: AWS, Azure, GCP, Heroku, etc.
+   - DevOps tools: Docker, Kubernetes, Jenkins, CI/CD, etc.
+   - Design tools: Figma, Photoshop, Sketch, etc.
+   - Soft skills IF clearly stated: Leadership, Communication, Agile, etc.
+   - Domain expertise: Machine Learning, Data Science, DevOps, etc.
+   - Methodologies: Agile, Scrum, TDD, Microservices, etc.
+   
+   CRITICAL: 
+   - Aggregate ALL skill mentions from entire CV
+   - DEDUPLICATE (remove duplicates)
+   - Normalize similar terms: "nodejs" = "Node.js", "reactjs" = "React"
+   - Return as ARRAY of distinct skill strings
+   - Preserve proper capitalization: "JavaScript" not "javascript"
+   
+   Example output:
+   ["JavaScript", "TypeScript", "React", "Node.js", "Python", "Django", 
+   "PostgreSQL", "MongoDB", "AWS", "Docker", "Kubernetes", "Git", "CI/CD", 
+   "Agile", "Microservices", "REST API", "GraphQL", "Machine Learning", 
+   "TensorFlow", "Leadership", "Team Management"]
+
+7. SUMMARY/PROFILE:
+   - Usually at top of CV
+   - Section headers: "Summary", "Objective", "Profile", "About Me", "Professional Summary"
+   - Brief overview of career (typically 50-200 words)
+   - Career goals, highlights, key strengths
+   - If no explicit summary section exists, leave as null
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+RETURN THIS EXACT JSON STRUCTURE:
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+{
+  "full_name": "string or null",
+  "email": "string or null",
+  "phone_number": "string or null",
+  "address": "string or null",
+  "university": "string or null",
+  "education": "COMPREHENSIVE education including degrees, certifications, licenses, courses - combined from all sections",
+  "experience": "COMPREHENSIVE experience from ALL sources - summary mentions + work history + projects + achievements",
+  "skills": ["skill1", "skill2", "skill3", ...] or [],
+  "summary": "string or null"
+}
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+CRITICAL REMINDERS:
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+✅ EDUCATION: Include degrees + certifications + licenses + training from ENTIRE CV
+✅ EXPERIENCE: Scan ENTIRE CV including summary, projects, achievements
+✅ SKILLS: Aggregate from ALL sections, deduplicate, normalize
+✅ Preserve original language (Vietnamese or English as written)
+✅ Return valid JSON only, no markdown, no extra text, no explanations
+✅ If field not found after thorough search, use null or []
+✅ Be thorough - scan every section, every paragraph for relevant information"""
+
+# Appended to the parse user message when SKILL_EXTRACTION=local: skills come from the local ontology, so the model skips them
+PARSE_CV_SKILLS_LOCAL_NOTE = """
+
+⚠️ SKILLS: return "skills": [] - skills are extracted separately by the system. Do not list them."""
+
+# ==================== MATCH CV - JOBS ====================
+
+# Kept byte-identical across requests and modes so the shared prefix is reused
+MATCH_SYSTEM = """Bạn là chuyên gia HR và AI Matching với 15 năm kinh nghiệm tuyển dụng IT.
+
+Nhiệm vụ: Phân tích CV và chấm điểm độ phù hợp với TỪNG job trong danh sách.
+
+═══════════════════════════════════════════════════════════════
+📋 QUY TRÌNH CHẤM ĐIỂM CHUẨN (CHO MỖI JOB)
+═══════════════════════════════════════════════════════════════
+
+🔴 BƯỚC 1: KIỂM TRA YÊU CẦU BẮT BUỘC MANDATORY (STRICT MATCHING - KHÔNG SUY LUẬN)
+
+Nếu job có "YÊU CẦU BẮT BUỘC/"MANDATORY REQUIREMENTS"" (mandatory_requirements):
+
+1️ Đọc KỸ từng yêu cầu bắt buộc VÀ PHÂN TÍCH từ khóa bắt buộc:
+   VD: "Tốt nghiệp Cử Nhân Đại Học"
+   → Keywords cần tìm: ["cử nhân", "đại học"]
+   
+   VD: "3+ năm kinh nghiệm Python"
+   → Keywords cần tìm: ["python", "3 năm" hoặc "3+"]
+
+2️ TÌM BẰNG CHỨNG trong CV (THEO THỨ TỰ ƯU TIÊN):
+   
+   🎯 Priority 1: Field "Bằng cấp" (education)
+   - Đây là field QUAN TRỌNG NHẤT cho yêu cầu học vấn
+   - VD: "Cử nhân Công nghệ Thông tin"
+   - VD: "Kỹ sư Điện tử"
+   
+   🎯 Priority 2: Field "Trường" (university)
+   - Chỉ chứa TÊN TRƯỜNG, thường KHÔNG chứa bằng cấp
+   - VD: "Đại học Bách Khoa Hà Nội"
+   - VD: "Học viện Công nghệ Bưu chính Viễn thông"
+   
+   🎯 Priority 3: Field "Kinh nghiệm" (experience)
+   - Dùng cho yêu cầu về số năm kinh nghiệm và skills
+   
+   🎯 Priority 4: Full CV Text (backup - tìm trong đoạn HỌC VẤN/EDUCATION)
+   - Dùng khi các field trên null hoặc thiếu thông tin
+
+3️ QUY TẮC MATCHING:
+   
+   ✅ PASS mandatory nếu:
+   - Tìm thấy TẤT CẢ keywords trong CV
+   - Có BẰNG CHỨNG CỤ THỂ (text chính xác)
+   
+   ❌ FAIL mandatory nếu:
+   - THIẾU BẤT KỲ keyword nào
+   
+   ⚠️ KHÔNG được suy luận:
+     ❌ "Có Đại học" ≠ "Có Cử nhân"
+     ❌ "Có trường top" ≠ "Có bằng"
+     ❌ "Có 1 năm exp" ≠ "Có 3 năm exp"
+     ❌ "Có Node.js" ≠ "Có Python"
+     
+KẾT LUẬN:
+- NẾU ứng viên ĐÁP ỨNG → Tiếp tục chấm trên BASE 100
+- NẾU ứng viên KHÔNG ĐÁP ỨNG → Áp dụng PENALTY -50 điểm NGAY
+
+═══════════════════════════════════════════════════════════════
+
+🔵 BƯỚC 2A: CHẤM ĐIỂM (NẾU PASS MANDATORY/đáp ứng trường bắt buộc hoặc KHÔNG CÓ MANDATORY)
+
+Base: 100 điểm
+
+Phân bổ điểm (Tổng = 100):
+- Kinh nghiệm phù hợp: 0-30 điểm
+- Kỹ năng kỹ thuật: 0-25 điểm
+- Học vấn phù hợp: 0-15 điểm
+- Level/Seniority match: 0-15 điểm
+- Địa điểm phù hợp: 0-10 điểm
+- Kỹ năng mềm: 0-5 điểm
+
+TỔNG: X/100
+
+Strengths: ["Điểm mạnh 1", "Điểm mạnh 2", "Điểm mạnh 3"]
+Weaknesses: ["Điểm yếu 1", "Điểm yếu 2"], Các điểm yếu thông thường (KHÔNG liên quan mandatory)
+Recommendation: "Đánh giá chi tiết 80-120 từ"
+
+═══════════════════════════════════════════════════════════════
+
+🔴 BƯỚC 2B: CHẤM ĐIỂM (NẾU FAIL MANDATORY / không đáp ứng trường bắt buộc)
+
+🚨 ÁP DỤNG PENALTY ngay lập tức: -50 ĐIỂM
+ Base điểm giảm: 100 → 50
+ Điểm tối đa có thể: 50 (Base mới)
+
+SAU ĐÓ Chấm trên BASE 50 (mỗi component giảm 50%):
+
+- Kinh nghiệm phù hợp: 0-15 điểm (giảm 50%)
+- Kỹ năng kỹ thuật: 0-12 điểm (giảm 50%)
+- Học vấn: 0-8 điểm (giảm 50%)
+- Level phù hợp: 0-8 điểm (giảm 50%)
+- Địa điểm: 0-5 điểm (giảm 50%)
+- Kỹ năng mềm: 0-2 điểm (giảm 50%)
+
+TỔNG: Y/50 (tối đa 50)
+
+⚠️ LƯU Ý QUAN TRỌNG:
+- Điểm yếu: PHẢI có "Ứng viên không đáp ứng yêu cầu bắt buộc: [yêu cầu cụ thể]" + các điểm yếu khác"
+- Recommendation: "Ứng viên có [điểm mạnh] nhưng KHÔNG ĐỦ ĐIỀU KIỆN do thiếu [requirement cụ thể]"
+
+QUAN TRỌNG: Với JOB ⭐ PRIMARY (job ứng viên đã apply):
+- Đánh giá CHI TIẾT HỖN hơn
+- Đây là job ứng viên QUAN TÂM - phải đánh giá kỹ lưỡng
+
+
+═══════════════════════════════════════════════════════════════
+🎯 OUTPUT FORMAT
+═══════════════════════════════════════════════════════════════
+
+Trả về JSON với format:
+
+{
+  "overall_score": <điểm của best_match>,
+  "best_match": {
+    "job_id": "<job_id>",
+    "job_title": "<job_title>",
+    "match_score": <0-100 hoặc 0-50 nếu fail mandatory>,
+    "strengths": ["...", "...", "..."],
+    "weaknesses": ["...", "..."],
+    "recommendation": "..."
+  },
+  "all_matches": [
+    {
+      "job_id": "<job_id>",
+      "job_title": "<job_title>",
+      "match_score": <0-100 hoặc 0-50>,
+      "strengths": ["...", "...", "..."],
+      "weaknesses": ["...", "..."],
+      "recommendation": "..."
+    },
+    ...
+  ]
+}
+
+⚠️ CRITICAL RULES:
+1. Nếu FAIL mandatory → match_score PHẢI ≤ 50
+2. Weaknesses của job fail mandatory PHẢI có: "❌ Không đáp ứng yêu cầu bắt buộc: [requirement]"
+3. KHÔNG được suy luận: "Có Đại học" ≠ "Có Cử nhân"
+4. Phải tìm CHÍNH XÁC từ khóa trong CV
+5. all_matches phải được sắp xếp theo match_score giảm dần
+6. best_match = job có match_score CAO NHẤT
+7. overall_score = best_match.match_score
+
+QUAN TRỌNG: 
+- Job có ⭐ PRIMARY → Đánh giá CHI TIẾT và KỸ LƯỠNG hơn
+- Luôn trả về JSON hợp lệ, không thêm text giải thích bên ngoài"""
+
+# When mandatory requirements were already checked locally, BƯỚC 1 only needs to say how to use the verdict
+_MANDATORY_STEP_START = MATCH_SYSTEM.index("🔴 BƯỚC 1:")
+_MANDATORY_STEP_END = MATCH_SYSTEM.index("KẾT LUẬN:")
+MATCH_SYSTEM_VERIFIED = MATCH_SYSTEM[:_MANDATORY_STEP_START] + """🔴 BƯỚC 1: YÊU CẦU BẮT BUỘC (MANDATORY) - ĐÃ ĐƯỢC HỆ THỐNG KIỂM TRA
+
+Mỗi job có mục "🧪 KẾT QUẢ KIỂM TRA BẮT BUỘC" (hệ thống đã đối chiếu từ khóa CHÍNH XÁC với CV):
+- ĐÁP ỨNG ✅ / KHÔNG ĐÁP ỨNG ❌: dùng NGUYÊN kết quả, KHÔNG đánh giá lại
+- CHƯA XÁC MINH ⚠️: tự kiểm tra yêu cầu đó trong CV theo từ khóa CHÍNH XÁC, KHÔNG suy luận
+  ("Có Đại học" ≠ "Có Cử nhân", "Có 1 năm exp" ≠ "Có 3 năm exp")
+
+""" + MATCH_SYSTEM[_MANDATORY_STEP_END:]
+
+MATCH_CV_CONTEXT = """
+📋 ỨNG VIÊN PROFILE
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+👤 THÔNG TIN CƠ BẢN:
+Họ tên: ${full_name}
+Email: ${email}
+Số điện thoại: ${phone_number}
+Địa chỉ: ${address}
+
+🎓 HỌC VẤN:
+Trường: ${university}
+Bằng cấp: ${education}
+
+💼 KINH NGHIỆM:
+${experience}
+
+📄 ${cv_text_label}:
+${excerpt}
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+"""
+
+MATCH_JOB = """
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+JOB #${idx}: ${title} ${primary_marker}
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+📌 THÔNG TIN CƠ BẢN:
+ID: ${job_id}
+Tên vị trí: ${title}
+Cấp bậc: ${level}
+Phòng ban: ${department}
+Loại hình: ${job_type}
+Hình thức: ${work_location}
+Địa điểm: ${location}
+
+📝 MÔ TẢ CÔNG VIỆC:
+${description}
+
+✅ YÊU CẦU:
+${requirements}
+
+⚠️⚠️⚠️ YÊU CẦU BẮT BUỘC (MANDATORY):
+${mandatory_requirements}
+⚠️⚠️⚠️
+
+💰 QUYỀN LỢI:
+${benefits}
+
+"""
+
+MATCH_USER = """Phân tích CV và matching với các công việc theo QUY TRÌNH CHÍNH XÁC:
+
+${cv_context}
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+CÁC CÔNG VIỆC CẦN MATCHING:
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+${jobs_text}
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+Hãy phân tích và chấm điểm cho TẤT CẢ ${job_count} jobs trên theo đúng quy trình:
+
+1. Với MỖI JOB: Kiểm tra mandatory TRƯỚC
+2. Nếu PASS hoặc không có mandatory → Base 100
+3. Nếu FAIL mandatory → Penalty -50 → Base 50
+4. Chấm điểm trên base tương ứng
+5. Sắp xếp all_matches theo điểm giảm dần
+6. best_match = job có điểm cao nhất
+
+LƯU Ý:
+- ĐỌC KỸ: Bằng cấp, Trường, Kinh nghiệm, Full text
+- KHÔNG SUY LUẬN: "Có Đại học" ≠ "Có Cử nhân"
+- STRICT MATCH: Phải tìm thấy CHÍNH XÁC từ khóa
+- Nếu mandatory là một kỹ năng bắt buộc phải có thì phải tìm được script trùng khớp trong CV
+- Nếu mandatory là số năm kinh nghiệm thì phải tìm được số năm đúng hoặc lớn hơn trong CV hoặc công các năm dựa theo các công việc đã làm trong mục kinh nghiệm
+- Fail mandatory → PHẢI có "❌ Không đáp ứng..." trong weaknesses
+- Job PRIMARY → Đánh giá kỹ hơn
+
+CHO MỖI CÔNG VIỆC, ÁP DỤNG QUY TRÌNH:
+
+VÍ DỤ MINH HỌA:
+
+Ví dụ 1: Job yêu cầu "Tốt nghiệp Đại học" + Ứng viên có "university: HUST"
+→ Bắt buộc: ĐÁP ỨNG ✅
+→ Base điểm: 100
+→ Tính: 28 (exp) + 23 (skills) + 15 (edu) + 12 (level) + 8 (loc) + 3 (soft) = 89
+→ Kết quả: 89/100
+→ Điểm yếu: ["Thiếu kinh nghiệm quản lý nhóm"]
+
+Ví dụ 2: Job yêu cầu "Tốt nghiệp Đại học" + Ứng viên university: null, education: null
+→ Bắt buộc: KHÔNG ĐÁP ỨNG ❌
+→ Penalty: -50 NGAY LẬP TỨC
+→ Base điểm mới: 50 tối đa
+→ Tính trên base 50: 12 (exp) + 10 (skills) + 0 (edu) + 6 (level) + 4 (loc) + 2 (soft) = 34
+→ Kết quả: 34/50
+→ Điểm yếu: ["Ứng viên không đáp ứng yêu cầu bắt buộc: Tốt nghiệp Đại học", "Thiếu kinh nghiệm cloud"]
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+ĐẶC BIỆT CHÚ Ý VỀ BEST_MATCH:
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+1. best_match PHẢI là job có match_score CAO NHẤT trong all_matches
+2. overall_score PHẢI = best_match.match_score
+3. all_matches PHẢI được sắp xếp theo match_score giảm dần
+
+4. Khi viết recommendation cho best_match:
+   - NẾU best_match.job_id == primary_job_id (job ứng viên đã apply):
+     → Viết: "Ứng viên đã apply đúng vị trí phù hợp với hồ sơ. [Điểm mạnh chính]..."
+   
+   - NẾU best_match.job_id != primary_job_id:
+     → Viết: "Ứng viên phù hợp hơn với vị trí [best_match_title] so với vị trí đã apply [primary_job_title]. Lý do: [so sánh cụ thể]..."
+
+5. Đảm bảo recommendation dài 100-150 từ, chi tiết và có bằng chứng cụ thể
+
+Trả về ONLY valid JSON theo format đã cho."""
+
+# Compact per-job prompt for fan-out mode: CV context first so the prefix is shared across jobs
+MATCH_SINGLE_USER = """Phân tích CV và chấm điểm độ phù hợp với MỘT công việc theo QUY TRÌNH CHÍNH XÁC:
+
+${cv_context}
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+CÔNG VIỆC CẦN MATCHING:
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+${job_text}
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+Chấm điểm job trên theo đúng quy trình:
+1. Kiểm tra mandatory TRƯỚC
+2. Nếu PASS hoặc không có mandatory → Base 100
+3. Nếu FAIL mandatory → Penalty -50 → Base 50
+4. Chấm điểm trên base tương ứng
+
+LƯU Ý:
+- KHÔNG SUY LUẬN: "Có Đại học" ≠ "Có Cử nhân"
+- STRICT MATCH: Phải tìm thấy CHÍNH XÁC từ khóa
+- Nếu mandatory là số năm kinh nghiệm thì phải tìm được số năm đúng hoặc lớn hơn trong CV hoặc cộng các năm dựa theo các công việc đã làm trong mục kinh nghiệm
+- Fail mandatory → PHẢI có "❌ Không đáp ứng..." trong weaknesses
+- Recommendation dài 80-120 từ, có bằng chứng cụ thể
+
+CHỈ có MỘT job nên KHÔNG trả về overall_score/best_match/all_matches.
+Trả về ONLY valid JSON là MỘT object:
+{
+  "job_id": "<job_id>",
+  "job_title": "<job_title>",
+  "match_score": <0-100 hoặc 0-50 nếu fail mandatory>,
+  "strengths": ["...", "...", "..."],
+  "weaknesses": ["...", "..."],
+  "recommendation": "..."
+}"""
+
+# ==================== VARIANTS ====================
+# Budgets cap the static tokens of each template (measured at import, see GET /api/prompts)
+
+FULL_PROMPTS = PromptSet("full", [
+    PromptTemplate("parse_cv_system", PARSE_CV_SYSTEM, budget=150),
+    PromptTemplate("parse_cv_user", PARSE_CV_INTRO + "\n\n" + PARSE_CV_CONTENT_HEADER + "${cv_text}\n\n" + PARSE_CV_GUIDELINES, budget=3200),
+    PromptTemplate("match_system", MATCH_SYSTEM, budget=2300),
+    PromptTemplate("match_system_verified", MATCH_SYSTEM_VERIFIED, budget=1900),
+    PromptTemplate("match_cv_context", MATCH_CV_CONTEXT, budget=200),
+    PromptTemplate("match_job", MATCH_JOB, budget=230),
+    PromptTemplate("match_user", MATCH_USER, budget=1300),
+    PromptTemplate("match_single_user", MATCH_SINGLE_USER, budget=550),
+])
+
+COMPACT_PROMPTS = PromptSet("compact", [
+    # Static guidelines first (cacheable), the CV last
+    PromptTemplate("parse_cv_system", compact_text(PARSE_CV_SYSTEM + "\n\n" + PARSE_CV_GUIDELINES), budget=2900),
+    PromptTemplate("parse_cv_user", compact_text(PARSE_CV_INTRO + "\n\nCV CONTENT:\n") + "\n${cv_text}", budget=60),
+    *(FULL_PROMPTS[name].compact() for name in (
+        "match_system", "match_system_verified", "match_cv_context", "match_job", "match_user", "match_single_user"
+    )),
+])
+
+PROMPT_SETS = {"full": FULL_PROMPTS, "compact": COMPACT_PROMPTS}
+if PROMPT_VARIANT not in PROMPT_SETS:
+    raise ValueError(f"PROMPT_VARIANT must be one of {', '.join(PROMPT_SETS)}, got {PROMPT_VARIANT!r}")
+PROMPTS = PROMPT_SETS[PROMPT_VARIANT]
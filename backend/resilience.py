@@ -0,0 +1,251 @@
+"""
+Retry, rate limiting, circuit breaking and hedging for OpenRouter calls.
+
+Every attempt takes a token from a shared bucket sized to the OpenRouter quota.
+Retryable statuses and transport errors are retried with full-jitter exponential
+backoff (honouring Retry-After). A per-model circuit breaker fails fast while
+upstream keeps erroring. Optionally, a hedged second attempt is sent once the
+first has been outstanding longer than the model's observed p95 latency.
+"""
+
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+import httpx
+
+from metrics import LLM_HEDGES, LLM_RETRIES, current_endpoint
+
+OPENROUTER_MAX_RETRIES = int(os.getenv("OPENROUTER_MAX_RETRIES", "3"))
+OPENROUTER_BACKOFF_BASE = float(os.getenv("OPENROUTER_BACKOFF_BASE", "0.5"))
+OPENROUTER_BACKOFF_MAX = float(os.getenv("OPENROUTER_BACKOFF_MAX", "8"))
+# No new attempt is started after this many seconds since the first one
+OPENROUTER_RETRY_DEADLINE = float(os.getenv("OPENROUTER_RETRY_DEADLINE", "90"))
+# Requests per second / burst allowed by the OpenRouter key (0 disables the limiter)
+OPENROUTER_RATE_LIMIT_RPS = float(os.getenv("OPENROUTER_RATE_LIMIT_RPS", "20"))
+OPENROUTER_RATE_LIMIT_BURST = int(os.getenv("OPENROUTER_RATE_LIMIT_BURST", "40"))
+OPENROUTER_BREAKER_THRESHOLD = int(os.getenv("OPENROUTER_BREAKER_THRESHOLD", "5"))
+OPENROUTER_BREAKER_RESET = float(os.getenv("OPENROUTER_BREAKER_RESET", "30"))
+OPENROUTER_HEDGE = os.getenv("OPENROUTER_HEDGE", "false").lower() in ("1", "true", "yes")
+OPENROUTER_HEDGE_QUANTILE = float(os.getenv("OPENROUTER_HEDGE_QUANTILE", "0.95"))
+OPENROUTER_HEDGE_MIN_SAMPLES = int(os.getenv("OPENROUTER_HEDGE_MIN_SAMPLES", "20"))
+
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+# 429 means "slow down", not "upstream is down": retried, but not counted by the breaker
+BREAKER_STATUSES = RETRYABLE_STATUSES - {429}
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, model: str, retry_after: float):
+        super().__init__(f"Circuit open for {model}, retry in {int(retry_after)}s")
+        self.model = model
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, up to `burst` saved up."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        if self.rate <= 0:
+            return True
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        # The lock keeps waiters in FIFO order
+        async with self._lock:
+            while not self.try_acquire():
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """closed -> open after `threshold` consecutive failures -> half-open (one probe) after `reset_timeout`."""
+
+    def __init__(self, model: str, threshold: int = OPENROUTER_BREAKER_THRESHOLD, reset_timeout: float = OPENROUTER_BREAKER_RESET):
+        self.model = model
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> None:
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return
+        retry_after = self.reset_timeout - (time.monotonic() - self.opened_at) if state == "open" else 1.0
+        raise CircuitOpenError(self.model, max(retry_after, 1.0))
+
+    def release_probe(self) -> None:
+        self._probing = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+
+class LatencyTracker:
+    """Rolling window of successful call durations, used to pick the hedging delay."""
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self._samples) < OPENROUTER_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Full-jitter exponential backoff; a numeric Retry-After wins when present."""
+    if retry_after:
+        try:
+            return min(float(retry_after), OPENROUTER_BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(OPENROUTER_BACKOFF_MAX, OPENROUTER_BACKOFF_BASE * (2 ** attempt)))
+
+
+class ResilientCaller:
+    """Wraps a coroutine factory that sends one OpenRouter request."""
+
+    def __init__(self):
+        self.limiter = TokenBucket(OPENROUTER_RATE_LIMIT_RPS, OPENROUTER_RATE_LIMIT_BURST)
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latency: Dict[str, LatencyTracker] = {}
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        if model not in self.breakers:
+            self.breakers[model] = CircuitBreaker(model)
+        return self.breakers[model]
+
+    def stats(self) -> dict:
+        return {
+            model: {"state": breaker.state, "failures": breaker.failures}
+            for model, breaker in self.breakers.items()
+        }
+
+    async def call(self, send: Callable[[], Awaitable[httpx.Response]], model: str, hedge: bool = False, deadline: Optional[float] = None) -> httpx.Response:
+        """
+        Send with retries. Returns the last response (which may be a non-200 the
+        caller turns into an error) or raises the last transport error.
+        Raises CircuitOpenError without sending when the model's breaker is open.
+        `deadline` (seconds) overrides OPENROUTER_RETRY_DEADLINE for this call.
+        """
+        deadline = deadline or OPENROUTER_RETRY_DEADLINE
+        breaker = self.breaker(model)
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            breaker.before_call()
+            await self.limiter.acquire()
+
+            response = None
+            error: Optional[httpx.HTTPError] = None
+            try:
+                response = await (self._hedged(send, model) if hedge and OPENROUTER_HEDGE else self._timed(send, model))
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                error = e
+            except asyncio.CancelledError:
+                # Client went away mid-probe: let the next request probe instead
+                breaker.release_probe()
+                raise
+
+            status = response.status_code if response is not None else None
+            if error is not None or status in BREAKER_STATUSES:
+                breaker.record_failure()
+            else:
+                # Any other answer (including a 429) means upstream is reachable
+                breaker.record_success()
+                if status != 429:
+                    return response
+
+            delay = backoff_delay(attempt, response.headers.get("retry-after") if response is not None else None)
+            out_of_time = time.monotonic() - started + delay > deadline
+            if attempt >= OPENROUTER_MAX_RETRIES or out_of_time or breaker.state == "open":
+                if error is not None:
+                    raise error
+                return response
+
+            if response is not None:
+                await response.aclose()
+            attempt += 1
+            LLM_RETRIES.inc(endpoint=current_endpoint.get(), model=model)
+            await asyncio.sleep(delay)
+
+    async def _timed(self, send: Callable[[], Awaitable[httpx.Response]], model: str) -> httpx.Response:
+        start = time.monotonic()
+        response = await send()
+        if response.status_code == 200:
+            self.latency.setdefault(model, LatencyTracker()).observe(time.monotonic() - start)
+        return response
+
+    async def _hedged(self, send: Callable[[], Awaitable[httpx.Response]], model: str) -> httpx.Response:
+        """Fire a second attempt if the first outlives the model's p95; first good answer wins."""
+        threshold = self.latency.setdefault(model, LatencyTracker()).quantile(OPENROUTER_HEDGE_QUANTILE)
+        if threshold is None:
+            return await self._timed(send, model)
+
+        tasks = [asyncio.ensure_future(self._timed(send, model))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=threshold)
+            # The hedge is an extra request against the quota: skip it rather than wait for a token
+            if done or not self.limiter.try_acquire():
+                return await tasks[0]
+
+            LLM_HEDGES.inc(endpoint=current_endpoint.get(), model=model)
+            tasks.append(asyncio.ensure_future(self._timed(send, model)))
+            pending, fallback = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result().status_code == 200:
+                        return task.result()
+                    fallback = fallback or task
+            return fallback.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
@@ -0,0 +1,55 @@
+"""
+In-process single-flight: concurrent calls with the same key share one execution.
+
+The first caller starts the work in its own task; callers arriving while it is
+in flight await that task instead of repeating it. The work keeps running if
+one caller disconnects and is cancelled only when every caller has gone.
+"""
+
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    def __init__(self):
+        # key -> (task, number of callers waiting on it)
+        self._inflight: Dict[str, Tuple[asyncio.Task, int]] = {}
+        self.shared = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Run `fn` once per key at a time. Returns (result, shared); shared results are deep copies."""
+        entry = self._inflight.get(key)
+        shared = entry is not None
+        if shared:
+            task, waiters = entry
+            self.shared += 1
+        else:
+            task, waiters = asyncio.ensure_future(fn()), 0
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        self._inflight[key] = (task, waiters + 1)
+
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            self._leave(key, task)
+            raise
+        return (copy.deepcopy(result) if shared else result), shared
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        entry = self._inflight.get(key)
+        if entry is not None and entry[0] is task:
+            del self._inflight[key]
+
+    def _leave(self, key: str, task: asyncio.Task) -> None:
+        entry = self._inflight.get(key)
+        if entry is None or entry[0] is not task:
+            return
+        if entry[1] <= 1:
+            # Nobody is waiting any more: stop the upstream call
+            task.cancel()
+        else:
+            self._inflight[key] = (task, entry[1] - 1)
@@ -0,0 +1,222 @@
+"""
+Local skill extraction and normalisation over a versioned skill ontology.
+
+The ontology (skill_ontology.json, SKILL_ONTOLOGY_PATH) lists canonical skills
+with a category and aliases, English and Vietnamese. Aliases are compiled once
+into an Aho-Corasick automaton over word tokens of the accent-free, lower-cased
+text, so a whole CV is scanned in one pass whatever the number of aliases, and
+matches can only start and end on word boundaries ("java" is not found in
+"javascript", "react" not in "react.js"). Overlapping matches resolve to the
+leftmost, then longest alias ("React Native" over "React").
+
+parse_cv uses it to canonicalise the skills returned by the LLM and to add
+the ontology skills the LLM missed (SKILL_EXTRACTION=augment), or as the only
+source of skills (SKILL_EXTRACTION=local).
+"""
+
+import json
+import os
+import re
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from text_utils import normalize_text
+
+SKILL_ONTOLOGY_PATH = os.getenv("SKILL_ONTOLOGY_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "skill_ontology.json"))
+# off | augment (canonicalise + add what the LLM missed) | local (ontology only)
+SKILL_EXTRACTION = os.getenv("SKILL_EXTRACTION", "augment").lower()
+if SKILL_EXTRACTION not in ("off", "augment", "local"):
+    raise ValueError(f"SKILL_EXTRACTION must be one of off, augment, local, got {SKILL_EXTRACTION!r}")
+
+# Word tokens keep tech punctuation ("node.js", "c++", "c#", ".net"); "-" and "/" split ("ci/cd" -> ci, cd)
+_TOKEN_RE = re.compile(r"\.?[a-z0-9+#]+(?:\.[a-z0-9+#]+)*")
+
+
+def skill_tokens(text: str) -> List[Tuple[str, int, int]]:
+    """(token, start, end) over the normalised text."""
+    return [(m.group(), m.start(), m.end()) for m in _TOKEN_RE.finditer(text)]
+
+
+@dataclass
+class Skill:
+    name: str
+    category: str
+    aliases: Tuple[str, ...]
+
+
+@dataclass
+class SkillMatch:
+    name: str
+    category: str
+    # Span in the normalised text (same length as the input for Latin / Vietnamese text)
+    start: int
+    end: int
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class AhoCorasick:
+    """Multi-pattern matcher over token sequences; patterns carry an integer value."""
+
+    def __init__(self, patterns: Sequence[Tuple[Sequence[str], int]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # (value, pattern length in tokens) ending at each state, own and inherited through fail links
+        self._out: List[List[Tuple[int, int]]] = [[]]
+        for tokens, value in patterns:
+            state = 0
+            for token in tokens:
+                nxt = self._goto[state].get(token)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][token] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append((value, len(tokens)))
+
+        self._vocabulary = frozenset(token for tokens, _ in patterns for token in tokens)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(token, 0) if state else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    @property
+    def states(self) -> int:
+        return len(self._goto)
+
+    def search(self, tokens: Sequence[str]) -> List[Tuple[int, int, int]]:
+        """Every (value, first token index, end token index) occurrence."""
+        goto, fail, out, vocabulary = self._goto, self._fail, self._out, self._vocabulary
+        found = []
+        state = 0
+        previous = -2
+        # A token outside every pattern sends the automaton back to the root, so only
+        # pattern tokens are stepped through; a gap between them is such a reset
+        for i, token in [(i, token) for i, token in enumerate(tokens) if token in vocabulary]:
+            if i != previous + 1:
+                state = 0
+            previous = i
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for value, length in out[state]:
+                found.append((value, i + 1 - length, i + 1))
+        return found
+
+
+class SkillOntology:
+    def __init__(self, version: str, skills: List[Skill]):
+        self.version = version
+        self.skills = skills
+        patterns = []
+        self._by_alias: Dict[Tuple[str, ...], int] = {}
+        self._by_name: Dict[str, Skill] = {normalize_text(skill.name): skill for skill in skills}
+        for index, skill in enumerate(skills):
+            for alias in skill.aliases:
+                tokens = tuple(token for token, _, _ in skill_tokens(normalize_text(alias)))
+                if tokens and tokens not in self._by_alias:
+                    self._by_alias[tokens] = index
+                    patterns.append((tokens, index))
+        self._automaton = AhoCorasick(patterns)
+
+    @classmethod
+    def load(cls, path: str = SKILL_ONTOLOGY_PATH) -> "SkillOntology":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        skills = [
+            Skill(
+                name=entry["name"],
+                category=entry["category"],
+                aliases=tuple(([entry["name"]] if entry.get("match_name", True) else []) + entry.get("aliases", []))
+            )
+            for entry in data["skills"]
+        ]
+        return cls(str(data["version"]), skills)
+
+    def _hits(self, tokens: Sequence[str]) -> List[Tuple[int, int, int]]:
+        """Non-overlapping (skill index, first token, end token), leftmost then longest first."""
+        hits = self._automaton.search(tokens)
+        hits.sort(key=lambda hit: (hit[1], -hit[2]))
+        kept = []
+        covered = 0
+        for hit in hits:
+            if hit[1] >= covered:
+                kept.append(hit)
+                covered = hit[2]
+        return kept
+
+    def find(self, text: str) -> List[SkillMatch]:
+        """Skill mentions with their spans, in text order."""
+        tokens = skill_tokens(normalize_text(text or ""))
+        return [
+            SkillMatch(self.skills[index].name, self.skills[index].category, tokens[first][1], tokens[end - 1][2])
+            for index, first, end in self._hits([token for token, _, _ in tokens])
+        ]
+
+    def extract(self, text: str) -> List[str]:
+        """Distinct canonical skills mentioned in `text`, in order of first mention."""
+        hits = self._hits(_TOKEN_RE.findall(normalize_text(text or "")))
+        return list(dict.fromkeys(self.skills[index].name for index, _, _ in hits))
+
+    def canonical(self, value: str) -> Optional[Skill]:
+        """The skill whose alias is exactly `value` (case / accent / punctuation-insensitive), if any."""
+        tokens = tuple(token for token, _, _ in skill_tokens(normalize_text(value or "")))
+        index = self._by_alias.get(tokens)
+        return self.skills[index] if index is not None else None
+
+    def category_of(self, name: str) -> Optional[str]:
+        skill = self._by_name.get(normalize_text(name))
+        return skill.category if skill else None
+
+    def categorize(self, names: Sequence[str]) -> Dict[str, List[str]]:
+        """category -> names; names outside the ontology go under "other"."""
+        categories: Dict[str, List[str]] = {}
+        for name in names:
+            categories.setdefault(self.category_of(name) or "other", []).append(name)
+        return categories
+
+    def normalize(self, values: Sequence[str]) -> List[str]:
+        """Canonical names for known skills, others kept as written; duplicates dropped, order kept."""
+        result: Dict[str, str] = {}
+        for value in values:
+            if not isinstance(value, str) or not value.strip():
+                continue
+            skill = self.canonical(value)
+            name = skill.name if skill else value.strip()
+            result.setdefault(normalize_text(name), name)
+        return list(result.values())
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "skills": len(self.skills),
+            "aliases": len(self._by_alias),
+            "categories": sorted({skill.category for skill in self.skills}),
+            "automaton_states": self._automaton.states
+        }
+
+
+def apply_skill_extraction(parsed_data: dict, cv_text: str, ontology: SkillOntology, mode: str = SKILL_EXTRACTION) -> dict:
+    """
+    Post-process a parse result: canonical skill names, skills found locally but
+    missed by the LLM, and `skill_categories`. Returns a new dict.
+    """
+    if mode == "off":
+        return parsed_data
+    local = ontology.extract(cv_text)
+    if mode == "local":
+        skills = local
+    else:
+        skills = ontology.normalize((parsed_data.get("skills") or []) + local)
+    return {**parsed_data, "skills": skills, "skill_categories": ontology.categorize(skills)}
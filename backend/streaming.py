@@ -0,0 +1,133 @@
+"""
+Server-Sent Events helpers for the streaming generate endpoints.
+
+OpenRouter token deltas are relayed as they arrive. Markdown fences around the
+interview questions are stripped on the fly, and the job-description JSON is
+parsed incrementally so each top-level field is sent as soon as it is complete.
+"""
+
+import json
+import re
+from typing import Any, List, Tuple
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    # Stop nginx / Railway proxies from buffering the stream
+    "X-Accel-Buffering": "no",
+}
+
+# A closing fence (or the start of one) plus trailing whitespace is held back until the stream ends
+_TAIL_RE = re.compile(r"\s*`{0,3}\s*$")
+_FENCE_OPENERS = ("```markdown", "```")
+
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class MarkdownFenceStripper:
+    """
+    Incremental version of the interview-question clean-up: drops a leading
+    ```markdown / ``` fence and a trailing ``` fence, and trims outer whitespace.
+    Concatenating every feed() result plus finish() gives the cleaned text.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._head_done = False
+        self._at_start = True
+
+    def _strip_head(self, force: bool) -> bool:
+        head = self._buffer.lstrip()
+        if not force and len(head) < len(_FENCE_OPENERS[0]) and "\n" not in head:
+            return False
+        for opener in _FENCE_OPENERS:
+            if head.startswith(opener):
+                head = head[len(opener):]
+                break
+        self._buffer = head
+        self._head_done = True
+        return True
+
+    def feed(self, delta: str) -> str:
+        self._buffer += delta
+        if not self._head_done and not self._strip_head(force=False):
+            return ""
+
+        cut = _TAIL_RE.search(self._buffer).start()
+        out, self._buffer = self._buffer[:cut], self._buffer[cut:]
+        if self._at_start:
+            out = out.lstrip()
+            self._at_start = not out
+        return out
+
+    def finish(self) -> str:
+        if not self._head_done:
+            self._strip_head(force=True)
+        tail = self._buffer.rstrip()
+        if tail.endswith("```"):
+            tail = tail[:-3].rstrip()
+        if self._at_start:
+            tail = tail.lstrip()
+        self._buffer = ""
+        return tail
+
+
+class JSONFieldStream:
+    """
+    Incremental parser for a flat JSON object streamed token by token.
+    feed() returns the (key, value) pairs whose values became complete with
+    this delta. Text before the opening brace (e.g. a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = -1  # index just after "{" once found
+        self.fields: dict = {}
+        self.closed = False
+
+    def _skip(self, chars: str) -> int:
+        pos = self._pos
+        while pos < len(self._buffer) and self._buffer[pos] in chars:
+            pos += 1
+        return pos
+
+    def feed(self, delta: str) -> List[Tuple[str, Any]]:
+        self._buffer += delta
+        completed: List[Tuple[str, Any]] = []
+        if self._pos < 0:
+            start = self._buffer.find("{")
+            if start < 0:
+                return completed
+            self._pos = start + 1
+
+        while not self.closed:
+            pos = self._skip(" \t\r\n,")
+            if pos >= len(self._buffer):
+                break
+            if self._buffer[pos] == "}":
+                self.closed = True
+                self._pos = pos + 1
+                break
+            try:
+                key, pos = self._decoder.raw_decode(self._buffer, pos)
+                while pos < len(self._buffer) and self._buffer[pos] in " \t\r\n":
+                    pos += 1
+                if pos >= len(self._buffer) or self._buffer[pos] != ":":
+                    break
+                pos += 1
+                while pos < len(self._buffer) and self._buffer[pos] in " \t\r\n":
+                    pos += 1
+                value, end = self._decoder.raw_decode(self._buffer, pos)
+            except (json.JSONDecodeError, IndexError):
+                break
+            # Numbers / literals are only complete once a delimiter follows them
+            if end >= len(self._buffer) and self._buffer[pos] not in "\"[{":
+                break
+            self._pos = end
+            if isinstance(key, str):
+                self.fields[key] = value
+                completed.append((key, value))
+        return completed
@@ -0,0 +1,212 @@
+"""
+Structured LLM output: response schemas and tolerant JSON parsing.
+
+Pydantic models describe the parse / match / job-description outputs; they
+are sent as an OpenAI-style `response_format` (JSON schema) and used to
+validate what comes back. `PartialJSON` scans output incrementally and can
+close a truncated document after its last complete value; `prune_incomplete`
+then drops the nested object the cut went through, so a `max_tokens` cut in
+the middle of `all_matches` keeps every finished entry.
+"""
+
+import json
+import re
+from typing import Any, List, Optional, Tuple, Type, Union, get_args
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+
+# ==================== RESPONSE MODELS ====================
+
+class _LLMOutput(BaseModel):
+    # Unknown keys are kept: the schema describes what we need, not everything the model may add
+    model_config = ConfigDict(extra="allow")
+
+
+class ParsedCVOutput(_LLMOutput):
+    full_name: Optional[str] = None
+    email: Optional[str] = None
+    phone_number: Optional[str] = None
+    address: Optional[str] = None
+    university: Optional[str] = None
+    education: Optional[Union[str, List[Any]]] = None
+    experience: Optional[Union[str, List[Any]]] = None
+    skills: Optional[List[str]] = None
+    summary: Optional[str] = None
+
+
+class JobMatchOutput(_LLMOutput):
+    job_id: Union[str, int]
+    job_title: Optional[str] = None
+    match_score: Union[int, float]
+    strengths: List[str] = Field(default_factory=list)
+    weaknesses: List[str] = Field(default_factory=list)
+    recommendation: Optional[str] = None
+
+
+class MatchAnalysisOutput(_LLMOutput):
+    overall_score: Optional[Union[int, float]] = None
+    best_match: Optional[JobMatchOutput] = None
+    all_matches: List[JobMatchOutput] = Field(default_factory=list)
+
+
+class JobDescriptionOutput(_LLMOutput):
+    description: str
+    requirements: str
+    benefits: str
+
+
+def json_schema_format(output_model: Type[BaseModel]) -> dict:
+    """OpenAI / OpenRouter `response_format` asking for JSON that follows `output_model`."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": output_model.__name__,
+            # Non-strict: strict mode forbids optional fields and extra keys
+            "strict": False,
+            "schema": output_model.model_json_schema()
+        }
+    }
+
+
+def validate_output(output_model: Type[BaseModel], data: Any) -> dict:
+    """Validate and coerce; returns only the keys that were present (no added defaults). Raises ValidationError."""
+    return output_model.model_validate(data).model_dump(exclude_unset=True)
+
+
+def _nested_model(annotation: Any) -> Optional[Type[BaseModel]]:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in get_args(annotation):
+        found = _nested_model(arg)
+        if found is not None:
+            return found
+    return None
+
+
+def _is_complete(value: Any, item_model: Type[BaseModel]) -> bool:
+    return isinstance(value, dict) and all(name in value for name in item_model.model_fields)
+
+
+def prune_incomplete(data: Any, output_model: Type[BaseModel]) -> Any:
+    """
+    For a document recovered from truncated output: drop nested objects (or list
+    entries) that are missing any schema field, i.e. the ones the cut went through.
+    """
+    if not isinstance(data, dict):
+        return data
+    for name, field in output_model.model_fields.items():
+        item_model = _nested_model(field.annotation)
+        if item_model is None or name not in data:
+            continue
+        value = data[name]
+        if isinstance(value, list):
+            data[name] = [item for item in value if _is_complete(item, item_model)]
+        elif not _is_complete(value, item_model):
+            del data[name]
+    return data
+
+
+# ==================== TOLERANT PARSING ====================
+
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL)
+
+
+class PartialJSON:
+    """
+    Incremental scanner over (possibly truncated) JSON text.
+
+    `feed()` only scans the new characters; `value()` parses the text up to the
+    last complete value (a closed container or the value before a comma),
+    appending the brackets still open there.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._start = -1
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        # (end index, closers) at the last cut point
+        self._safe: Optional[Tuple[int, str]] = None
+        self.complete = False
+
+    def feed(self, delta: str) -> None:
+        self.text += delta
+        text = self.text
+        while self._pos < len(text) and not self.complete:
+            char = text[self._pos]
+            self._pos += 1
+            if self._start < 0:
+                if char in "{[":
+                    self._start = self._pos - 1
+                    self._stack.append("}" if char == "{" else "]")
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char == ",":
+                self._safe = (self._pos - 1, "".join(reversed(self._stack)))
+            elif char in "{[":
+                self._stack.append("}" if char == "{" else "]")
+            elif char in "}]" and self._stack:
+                self._stack.pop()
+                self._safe = (self._pos, "".join(reversed(self._stack)))
+                self.complete = not self._stack
+
+    def value(self) -> Any:
+        """Best-effort parse: the full document if complete, else the prefix up to the last closed container."""
+        if self._start < 0:
+            raise ValueError("No JSON object in response")
+        if self.complete:
+            return json.loads(self.text[self._start:self._pos])
+        if self._safe is None:
+            raise ValueError("Truncated before any JSON value completed")
+        end, closers = self._safe
+        prefix = self.text[self._start:end].rstrip()
+        return json.loads(prefix + closers)
+
+
+def parse_json_tolerant(content: str) -> Tuple[Any, bool]:
+    """
+    Parse an LLM reply as JSON: plain, fenced, surrounded by prose, or truncated.
+    Returns (value, recovered) where recovered=True means the text was cut short
+    and only its complete parts were kept. Raises ValueError when nothing is usable.
+    """
+    try:
+        return json.loads(content), False
+    except json.JSONDecodeError:
+        pass
+
+    fenced = _FENCE_RE.search(content)
+    candidate = fenced.group(1) if fenced else content
+    parser = PartialJSON()
+    parser.feed(candidate)
+    try:
+        return parser.value(), not parser.complete
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Failed to parse AI response as JSON: {e}") from e
+
+
+def build_repair_messages(content: str, output_model: Type[BaseModel], error: str) -> List[dict]:
+    """Short prompt that only fixes the syntax / shape of a reply (the original prompt is not re-sent)."""
+    schema = json.dumps(output_model.model_json_schema(), ensure_ascii=False)
+    return [
+        {"role": "system", "content": "You repair malformed JSON. Return ONLY valid JSON matching the schema, keep every value from the input, do not invent data."},
+        {"role": "user", "content": f"Schema:\n{schema}\n\nError: {error}\n\nMalformed JSON:\n{content}"}
+    ]
+
+
+__all__ = [
+    "ParsedCVOutput", "JobMatchOutput", "MatchAnalysisOutput", "JobDescriptionOutput",
+    "json_schema_format", "validate_output", "prune_incomplete", "PartialJSON", "parse_json_tolerant",
+    "build_repair_messages", "ValidationError",
+]
@@ -0,0 +1,24 @@
+import os
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def main_module(tmp_path_factory):
+    """The app module, imported with a dummy API key and throwaway storage."""
+    storage = tmp_path_factory.mktemp("app")
+    os.environ.update({
+        "OPENROUTER_API_KEY": "test-key",
+        "JOB_QUEUE_PATH": str(storage / "jobs.sqlite3"),
+        "VECTOR_INDEX_DIR": str(storage / "vectors"),
+        "CV_CACHE_BACKEND": "memory",
+        "GENERATE_CACHE_BACKEND": "memory",
+    })
+    import main
+
+    yield main
+    main.extraction_pool.shutdown()
+    main.cv_index.close()
+    main.job_index.close()
@@ -0,0 +1,129 @@
+import asyncio
+import io
+import json
+import os
+import zipfile
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+import batch
+from batch import read_batch_uploads, stream_batch_results
+from extraction import extract_text_sync
+
+
+def _upload(filename, data):
+    return UploadFile(io.BytesIO(data), size=len(data), filename=filename)
+
+
+def _zip(entries):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in entries.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def _run(files, worker=None, concurrency=2):
+    async def default_worker(upload):
+        return {"size": upload.size, "head": upload.read()[:4].decode()}
+
+    async def run():
+        loaded = await read_batch_uploads(files)
+        lines = [json.loads(line) async for line in stream_batch_results(loaded, worker or default_worker, concurrency)]
+        return loaded, lines
+
+    return asyncio.run(run())
+
+
+def test_plain_files_and_zip_entries_stream_results():
+    archive = _zip({"a.pdf": b"AAAA" * 10, "b.docx": b"BBBB", "notes.txt": b"x", "__MACOSX/._a.pdf": b"x", "dir/": b""})
+    loaded, lines = _run([_upload("one.pdf", b"ONE!"), _upload("cvs.zip", archive), _upload("empty.pdf", b"")])
+
+    results = {line["filename"]: line for line in lines if line["type"] == "result"}
+    assert results["one.pdf"]["head"] == "ONE!"
+    assert results["cvs.zip/a.pdf"]["size"] == 40
+    assert results["cvs.zip/b.docx"]["head"] == "BBBB"
+    assert results["cvs.zip/notes.txt"]["error"] == "Unsupported file format"
+    assert results["empty.pdf"]["error"] == "File is empty"
+    assert lines[-1] == {"type": "summary", "total": 5, "succeeded": 3, "failed": 2}
+    assert loaded.total_bytes == 4 + 40 + 4
+
+
+def test_count_limit_is_checked_before_entries_are_read(monkeypatch):
+    archive = _zip({f"{i}.pdf": b"x" for i in range(10)})
+    monkeypatch.setattr(batch, "CV_BATCH_MAX_FILES", 3)
+    monkeypatch.setattr(zipfile.ZipFile, "read", lambda *a, **k: pytest.fail("entry read while indexing"))
+    monkeypatch.setattr(zipfile.ZipFile, "open", lambda *a, **k: pytest.fail("entry opened while indexing"))
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(read_batch_uploads([_upload("cvs.zip", archive)]))
+    assert exc.value.status_code == 413
+
+
+def test_total_limit_counts_uncompressed_entries(monkeypatch):
+    monkeypatch.setattr(batch, "CV_BATCH_MAX_TOTAL_BYTES", 1000)
+    # Compresses to a few hundred bytes
+    archive = _zip({"a.pdf": b"0" * 600, "b.pdf": b"0" * 600})
+    assert len(archive) < 1000
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(read_batch_uploads([_upload("cvs.zip", archive)]))
+    assert exc.value.status_code == 413
+
+
+def test_entry_limit_applies_to_plain_uploads_and_zip_entries(monkeypatch):
+    monkeypatch.setattr(batch, "CV_BATCH_MAX_ENTRY_BYTES", 100)
+    archive = _zip({"big.pdf": b"0" * 500, "ok.pdf": b"fine"})
+    _, lines = _run([_upload("big.pdf", b"0" * 500), _upload("cvs.zip", archive)])
+
+    results = {line["filename"]: line for line in lines if line["type"] == "result"}
+    assert results["big.pdf"]["status_code"] == 413
+    assert results["cvs.zip/big.pdf"]["status_code"] == 413
+    assert results["cvs.zip/ok.pdf"]["success"]
+
+
+def test_entries_are_spooled_lazily_and_removed_after_use(monkeypatch):
+    monkeypatch.setattr(batch, "CV_BATCH_MAX_ENTRY_BYTES", 10 * 1024 * 1024)
+    big = os.urandom(2 * 1024 * 1024)
+    archive = _zip({"a.pdf": big, "b.pdf": big})
+    seen = []
+
+    async def worker(upload):
+        # Past the spool threshold, so each entry is a temp file held only while it runs
+        assert upload.path and os.path.exists(upload.path)
+        seen.append(upload.path)
+        return {}
+
+    loaded, lines = _run([_upload("cvs.zip", archive)], worker, concurrency=1)
+
+    assert lines[-1]["succeeded"] == 2
+    assert len(seen) == 2 and not any(os.path.exists(path) for path in seen)
+    assert all(item.closed for item in loaded.items)
+
+
+def test_invalid_zip_fails_only_its_own_line():
+    _, lines = _run([_upload("broken.zip", b"not a zip"), _upload("ok.pdf", b"data")])
+
+    results = {line["filename"]: line for line in lines if line["type"] == "result"}
+    assert results["broken.zip"]["error"] == "Invalid zip archive"
+    assert results["ok.pdf"]["success"]
+
+
+def test_upper_case_extensions_are_accepted_and_extracted():
+    corpus = os.path.join(os.path.dirname(batch.__file__), "bench", "corpus")
+    with open(os.path.join(corpus, "cv_000.pdf"), "rb") as f:
+        pdf = f.read()
+    with open(os.path.join(corpus, "cv_001.docx"), "rb") as f:
+        docx = f.read()
+
+    async def worker(upload):
+        # No per-page alarm: signals only work in the main thread
+        text, _ = await asyncio.to_thread(extract_text_sync, upload.filename, upload.source, 0)
+        return {"chars": len(text)}
+
+    _, lines = _run([_upload("CV.PDF", pdf), _upload("CVS.ZIP", _zip({"Nguyen.DOCX": docx}))], worker)
+
+    results = {line["filename"]: line for line in lines if line["type"] == "result"}
+    assert results["CV.PDF"]["success"] and results["CV.PDF"]["chars"] > 0
+    assert results["CVS.ZIP/Nguyen.DOCX"]["success"] and results["CVS.ZIP/Nguyen.DOCX"]["chars"] > 0
@@ -0,0 +1,34 @@
+import asyncio
+
+from cache import MemoryLRUCache, ResultCache, content_key
+
+
+def test_stats_report_an_empty_memory_backend():
+    cache = ResultCache("test", MemoryLRUCache(max_entries=10, ttl=None))
+    stats = cache.stats()
+    assert stats["enabled"] is True
+    assert stats["backend"] == "MemoryLRUCache"
+    assert stats["entries"] == 0
+
+
+def test_disabled_cache():
+    cache = ResultCache("test", None)
+    assert asyncio.run(cache.get("key")) is None
+    assert cache.stats()["backend"] is None
+
+
+def test_hit_miss_and_bypass():
+    cache = ResultCache("test", MemoryLRUCache(max_entries=10, ttl=None))
+
+    async def scenario():
+        assert await cache.get("a") is None
+        await cache.set("a", {"value": 1})
+        assert await cache.get("a") == {"value": 1}
+        assert await cache.get("a", bypass=True) is None
+
+    asyncio.run(scenario())
+    assert (cache.hits, cache.misses, cache.bypassed, cache.stats()["entries"]) == (1, 1, 1, 1)
+
+
+def test_content_key_is_length_prefixed():
+    assert content_key("ab", "c") != content_key("a", "bc")
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from candidate_ranking import Candidate, pre_screened_entry, prescore_candidates
+from mandatory_check import FAIL
+from vector_index import HashingEmbedder
+
+EMBEDDER = HashingEmbedder()
+
+
+def _cv(name, skills, education="Cử nhân CNTT", experience=""):
+    return SimpleNamespace(full_name=name, email=f"{name}@example.com", education=education, university="Đại học Bách Khoa",
+                           experience=experience, skills=skills, summary=None)
+
+
+CANDIDATES = {
+    "py": _cv("py", ["Python", "FastAPI", "PostgreSQL"], experience="Python Backend Developer, FastAPI"),
+    "ops": _cv("ops", ["Docker", "Python"], experience="DevOps Engineer"),
+    "chef": _cv("chef", ["Nấu ăn"], experience="Bếp trưởng nhà hàng"),
+    # Best skills, but no bachelor's degree
+    "dropout": _cv("dropout", ["Python", "FastAPI", "PostgreSQL", "Django"], education="Cao đẳng", experience="Python Backend Developer, FastAPI, Django"),
+}
+AI_SCORES = {"py": 70, "ops": 85, "chef": 10, "dropout": 95}
+
+
+def _job(mandatory=None):
+    return SimpleNamespace(id="job-1", title="Python Backend Developer", requirements="Python, FastAPI, PostgreSQL",
+                           mandatory_requirements=mandatory, description=None)
+
+
+def _prescore(job, ids, check_mandatory=True):
+    return prescore_candidates(job, [Candidate(i, CANDIDATES[i]) for i in ids], EMBEDDER, check_mandatory)
+
+
+def test_candidates_are_ordered_by_local_score():
+    prescored = _prescore(_job(), ["chef", "ops", "py"])
+
+    assert [p.candidate.id for p in prescored] == ["py", "ops", "chef"]
+    assert prescored[0].score == 1.0
+    assert [p.score for p in prescored] == sorted((p.score for p in prescored), reverse=True)
+
+
+def test_decisive_mandatory_fail_ranks_after_everyone_else():
+    job = _job("Tốt nghiệp Cử nhân")
+    unchecked = _prescore(job, ["chef", "dropout", "py"], check_mandatory=False)
+    assert [p.candidate.id for p in unchecked] == ["py", "dropout", "chef"]
+
+    prescored = _prescore(job, ["chef", "dropout", "py"])
+    assert [p.candidate.id for p in prescored] == ["py", "chef", "dropout"]
+    assert prescored[-1].decisive_fail and prescored[-1].mandatory_check.status == FAIL
+
+
+def test_skill_fail_is_not_decisive_and_keeps_its_place():
+    prescored = _prescore(_job("Django"), ["chef", "dropout", "py"])
+
+    assert [p.candidate.id for p in prescored] == ["dropout", "py", "chef"]
+    assert prescored[1].mandatory_check.status == FAIL and not prescored[1].decisive_fail
+
+
+def test_pre_screened_entry_is_not_on_the_ai_scale():
+    entry = pre_screened_entry(_prescore(_job(), ["py", "ops"])[1])
+
+    assert entry["match_score"] is None and entry["pre_screened"] is True
+    assert 0 <= entry["prefilter_score"] < 100
+    assert entry["candidate_id"] == "ops"
+
+
+@pytest.fixture
+def match_candidates(main_module, monkeypatch):
+    """POST /api/match-job-candidates with inline candidates; the AI scores each one from AI_SCORES."""
+    scored = []
+
+    async def call_model_route(route, messages, output_model=None):
+        name = re.search(r"^Họ tên: (\S+)$", messages[-1]["content"], re.MULTILINE).group(1)
+        scored.append(name)
+        content = {"job_id": "job-1", "match_score": AI_SCORES[name], "strengths": [], "weaknesses": [], "recommendation": "ok"}
+        return {"choices": [{"message": {"content": json.dumps(content)}}]}, "model"
+
+    monkeypatch.setattr(main_module, "call_model_route", call_model_route)
+
+    def post(**body):
+        payload = {
+            "job": {"id": "job-1", "title": "Python Backend Developer", "requirements": "Python, FastAPI, PostgreSQL", **body.pop("job", {})},
+            "candidates": [{"id": i, "cv_data": {**vars(cv), "phone_number": None}} for i, cv in CANDIDATES.items()],
+            **body,
+        }
+
+        async def run():
+            transport = httpx.ASGITransport(app=main_module.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return (await client.post("/api/match-job-candidates", json=payload)).json()
+
+        return asyncio.run(run()), scored
+
+    return post
+
+
+def test_only_the_shortlist_reaches_the_ai_and_is_ranked_by_its_score(match_candidates):
+    response, scored = match_candidates(shortlist_size=2)
+    data = response["data"]
+
+    assert sorted(scored) == ["dropout", "py"]
+    assert [(m["candidate_id"], m["match_score"], m["rank"]) for m in data["ranking"]] == [("dropout", 95, 1), ("py", 70, 2)]
+    assert [entry["candidate_id"] for entry in data["pre_screened"]] == ["ops", "chef"]
+    assert all(entry["match_score"] is None for entry in data["pre_screened"])
+    assert response["metadata"]["candidates_ai_scored"] == 2 and response["metadata"]["candidates_pre_screened"] == 2
+
+
+def test_mandatory_fail_keeps_a_candidate_out_of_the_shortlist_and_caps_its_score(match_candidates):
+    job = {"mandatory_requirements": "Tốt nghiệp Cử nhân"}
+
+    response, scored = match_candidates(job=job, shortlist_size=2, local_mandatory_check=True)
+    assert sorted(scored) == ["ops", "py"]
+    assert response["data"]["pre_screened"][-1]["candidate_id"] == "dropout"
+    assert response["data"]["pre_screened"][-1]["mandatory_status"] == FAIL
+
+    response, _ = match_candidates(job=job, shortlist_size=4, local_mandatory_check=True)
+    ranking = {m["candidate_id"]: m for m in response["data"]["ranking"]}
+    assert ranking["dropout"]["match_score"] == 50
+    assert [m["candidate_id"] for m in response["data"]["ranking"]][:2] == ["ops", "py"]
@@ -0,0 +1,48 @@
+import pytest
+
+from contact_extraction import extract_contact_fields, extract_name, extract_phone
+
+
+# Header of a LaTeX (fontawesome) CV as PDF extraction returns it: icon glyph names glued to the values
+_ICON_HEADER = "Nguyen Van An\n♂phone+84 912 345 678 /envel⌢peannguyen.dev@example.com /githubgithub.com/annguyen\nSoftware Engineer"
+
+
+def test_icon_font_header():
+    contacts = extract_contact_fields(_ICON_HEADER)
+    assert contacts.full_name == "Nguyen Van An"
+    assert contacts.email == "annguyen.dev@example.com"
+    assert contacts.phone_number == "+84 912 345 678"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("mobile0912345678 | envelopebinh@example.com | map-markerHa Noi", "binh@example.com"),
+    ("Email: githubber@example.com", "githubber@example.com"),
+    ("Contact: phone@example.com", "phone@example.com"),
+    ("a.linkedin@example.com", "a.linkedin@example.com"),
+])
+def test_email_next_to_icon_names(text, expected):
+    assert extract_contact_fields(text).email == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Điện thoại: 0912.345.678", "0912.345.678"),
+    ("phone+84 945446761", "+84 945446761"),
+    ("Tel:0912345678", "0912345678"),
+    ("SĐT: (028) 3822 1234", "(028) 3822 1234"),
+    ("Phone: +1 (415) 555-0132", "+1 (415) 555-0132"),
+    ("84912345678", "84912345678"),
+])
+def test_phone_formats(text, expected):
+    assert extract_phone(text) == expected
+
+
+@pytest.mark.parametrize("text", ["Đại học (2008 - 2012)", "GPA 3.29/4.0", "ID12345678901", "Mã số thuế 0312345"])
+def test_phone_rejects_other_numbers(text):
+    assert extract_phone(text) is None
+
+
+def test_name_label_and_headings():
+    assert extract_name(["CURRICULUM VITAE", "Họ và tên: Nguyễn Thị Mai Anh"]) == "Nguyễn Thị Mai Anh"
+    assert extract_name(["Senior Backend Developer", "THÔNG TIN CÁ NHÂN", "NGUYỄN VĂN AN"]) == "NGUYỄN VĂN AN"
+    assert extract_name(["John Michael Doe", "Software Engineer"]) == "John Michael Doe"
+    assert extract_name(["Kinh nghiệm làm việc", "2020 - 2023"]) is None
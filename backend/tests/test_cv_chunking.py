@@ -0,0 +1,63 @@
+from cv_chunking import chunk_cv, merge_parsed_chunks, split_sections
+
+
+def _cv():
+    return "\n".join([
+        "Nguyễn Văn An",
+        "an@example.com",
+        "KINH NGHIỆM LÀM VIỆC",
+        *[f"- Công ty {i}: phát triển hệ thống thanh toán, tối ưu truy vấn" for i in range(30)],
+        "Học vấn",
+        "Đại học Bách Khoa TP.HCM, 2015 - 2019",
+        "Skills:",
+        "Python, Go, PostgreSQL, Docker",
+    ])
+
+
+def test_sections_split_on_en_and_vi_headings():
+    headings = [section.heading for section in split_sections(_cv())]
+    assert headings == ["header", "KINH NGHIỆM LÀM VIỆC", "Học vấn", "Skills:"]
+
+
+def test_short_cv_is_one_chunk():
+    assert chunk_cv("short cv", max_chars=100) == ["short cv"]
+
+
+def test_long_cv_chunks_fit_and_keep_every_line():
+    text = _cv()
+    chunks = chunk_cv(text, max_chars=600)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 600 for chunk in chunks)
+    joined = "\n".join(chunks)
+    assert all(line in joined for line in text.splitlines())
+    # Small sections are packed whole rather than cut
+    assert any("Học vấn" in chunk and "Skills:" in chunk for chunk in chunks)
+
+
+def test_overlong_line_is_hard_cut():
+    chunks = chunk_cv("Experience\n" + "z" * 250, max_chars=100)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert "".join(chunks).count("z") == 250
+
+
+def test_merge_parsed_chunks():
+    merged = merge_parsed_chunks([
+        {"full_name": "Nguyễn Văn An", "email": None, "experience": "Công ty A: backend", "skills": ["Python", "Node.js"]},
+        {"full_name": "An", "email": "an@example.com", "experience": "Công ty A: backend\n\nCông ty B: lead", "skills": ["python", "NodeJS", "Go"]},
+        {"education": "Đại học Bách Khoa", "skills": [None, "Docker"]},
+    ])
+
+    assert merged["full_name"] == "Nguyễn Văn An"
+    assert merged["email"] == "an@example.com"
+    # The fuller later version replaces the fragment instead of repeating it
+    assert merged["experience"] == "Công ty A: backend\n\nCông ty B: lead"
+    assert merged["education"] == "Đại học Bách Khoa"
+    assert merged["skills"] == ["Python", "Node.js", "Go", "Docker"]
+    assert merged["phone_number"] is None
+
+
+def test_merge_single_result_is_a_copy():
+    result = {"full_name": "An"}
+    merged = merge_parsed_chunks([result])
+    assert merged == result and merged is not result
@@ -0,0 +1,60 @@
+import asyncio
+import os
+import time
+
+import pytest
+from fastapi import HTTPException
+
+import extraction
+from extraction import ExtractionPool, SpooledFile, extract_text_sync
+
+from conftest import REPO_ROOT
+
+
+def _fake_extract(filename, content, page_timeout):
+    """Stand-in worker: "hang" blocks past the deadline, "crash" kills its process, others take a moment."""
+    if filename.startswith("hang"):
+        time.sleep(30)
+    if filename.startswith("crash"):
+        os._exit(1)
+    time.sleep(0.4)
+    return filename.upper(), []
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    monkeypatch.setattr(extraction, "extract_text_sync", _fake_extract)
+    monkeypatch.setattr(extraction, "CV_EXTRACT_TIMEOUT", 1.5)
+    pool = ExtractionPool(workers=2)
+    yield pool
+    pool._reset()
+
+
+def test_hung_document_does_not_fail_the_others(fake_pool):
+    async def run():
+        hung = asyncio.ensure_future(fake_pool.extract("hang.pdf", b""))
+        await asyncio.sleep(0.1)
+        others = [fake_pool.extract(f"cv{i}.pdf", b"") for i in range(5)]
+        return await asyncio.gather(hung, *others, return_exceptions=True)
+
+    hung, *others = asyncio.run(run())
+    assert isinstance(hung, HTTPException) and hung.status_code == 422
+    assert [text for text, _ in others] == [f"CV{i}.PDF" for i in range(5)]
+
+
+def test_crash_is_retried_then_reported(fake_pool):
+    async def run():
+        return await asyncio.gather(fake_pool.extract("crash.pdf", b""), fake_pool.extract("ok.pdf", b""), return_exceptions=True)
+
+    crashed, ok = asyncio.run(run())
+    assert isinstance(crashed, HTTPException) and crashed.status_code == 503
+    assert ok == ("OK.PDF", [])
+
+
+def test_spooled_file_matches_bytes(tmp_path):
+    sample = next(name for name in os.listdir(REPO_ROOT) if name.endswith(".pdf"))
+    with open(os.path.join(REPO_ROOT, sample), "rb") as f:
+        content = f.read()
+    spooled = tmp_path / "cv.pdf"
+    spooled.write_bytes(content)
+    assert extract_text_sync("cv.pdf", SpooledFile(str(spooled))) == extract_text_sync("cv.pdf", content)
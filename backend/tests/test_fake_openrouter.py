@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+import httpx
+
+from bench.fake_openrouter import create_app
+from bench.loadtest import percentile
+from prompts import PARSE_CV_SYSTEM
+
+_CV = "Nguyen Van An\nan@example.com\n0912 345 678\nPython, Docker"
+
+
+def _post(body, **options):
+    async def run():
+        transport = httpx.ASGITransport(app=create_app(latency="fixed:0", token_ms=0, seed="1", **options))
+        async with httpx.AsyncClient(transport=transport, base_url="http://fake") as client:
+            return await client.post("/chat/completions", json=body)
+
+    return asyncio.run(run())
+
+
+def _parse_request(**extra):
+    return {
+        "model": "openai/gpt-4o-mini",
+        "messages": [{"role": "system", "content": PARSE_CV_SYSTEM}, {"role": "user", "content": f"CV CONTENT:\n{_CV}"}],
+        **extra
+    }
+
+
+def test_serves_a_parse_completion():
+    response = _post(_parse_request())
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["choices"][0]["finish_reason"] == "stop"
+    parsed = json.loads(body["choices"][0]["message"]["content"])
+    assert parsed["full_name"] == "Nguyen Van An"
+    assert parsed["email"] == "an@example.com"
+    assert parsed["skills"] == ["Python", "Docker"]
+    assert body["usage"]["completion_tokens"] > 0
+
+
+def test_streams_token_deltas():
+    response = _post(_parse_request(stream=True))
+
+    events = [line[len("data: "):] for line in response.text.splitlines() if line.startswith("data: ")]
+    assert events[-1] == "[DONE]"
+    chunks = [json.loads(event) for event in events[:-1]]
+    content = "".join(chunk["choices"][0]["delta"].get("content", "") for chunk in chunks)
+    assert json.loads(content)["email"] == "an@example.com"
+    assert chunks[-1]["choices"][0]["finish_reason"] == "stop"
+
+
+def test_max_tokens_cut_and_failing_models():
+    truncated = _post(_parse_request(max_tokens=10)).json()["choices"][0]
+    assert truncated["finish_reason"] == "length" and len(truncated["message"]["content"]) == 40
+
+    assert _post(_parse_request(model="bad/model"), fail_models="bad/model").status_code == 503
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 95) == 0.0
@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+JOB = {"title": "Python Developer", "level": "Senior", "department": "Engineering"}
+QUESTIONS = {"job_id": "job-1", "job_title": "Python Developer", "department": "Engineering", "level": "Senior"}
+
+
+@pytest.fixture
+def generate(main_module, monkeypatch):
+    """POST to the generation endpoints with a stubbed model route; returns (responses, upstream calls)."""
+    calls = []
+
+    async def call_model_route(route, messages, output_model=None):
+        calls.append(route.name)
+        content = {"description": "d", "requirements": "r", "benefits": "b"} if route.name == "job_description" else "1. Why Python?"
+        return {"choices": [{"message": {"content": json.dumps(content) if isinstance(content, dict) else content}}]}, route.primary
+
+    monkeypatch.setattr(main_module, "call_model_route", call_model_route)
+    main_module.generate_cache.backend.clear()
+
+    def post(path, *bodies):
+        async def run():
+            transport = httpx.ASGITransport(app=main_module.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return [(await client.post(path, json=body)).json() for body in bodies]
+
+        return asyncio.run(run()), calls
+
+    return post
+
+
+def test_key_ignores_delivery_flags_and_group_ignores_details(main_module):
+    request = main_module.GenerateJobDescriptionRequest
+    base = request(**JOB)
+
+    assert main_module.generation_cache_key("job_description", base) == main_module.generation_cache_key("job_description", request(**JOB, stream=True, regenerate=True))
+    assert main_module.generation_cache_key("job_description", base) != main_module.generation_cache_key("job_description", request(**JOB, keywords="Django"))
+
+    group = main_module.job_description_cache_group
+    assert group(base) == group(request(**JOB, keywords="Django", job_type="Full-time"))
+    assert group(base) == group(request(**{**JOB, "title": " python developer "}))
+    assert group(base) != group(request(**JOB, language="english"))
+    assert group(base) != group(request(**{**JOB, "level": "Junior"}))
+
+
+@pytest.mark.parametrize("path,body,changed", [
+    ("/api/generate-job-description", JOB, {"keywords": "Django"}),
+    ("/api/generate-interview-questions", QUESTIONS, {"requirements": "Django"}),
+])
+def test_changed_inputs_evict_the_previous_entry(main_module, generate, path, body, changed):
+    kind = "job_description" if "description" in path else "interview_questions"
+    request = (main_module.GenerateJobDescriptionRequest if kind == "job_description" else main_module.GenerateInterviewQuestionsRequest)
+    old_key = main_module.generation_cache_key(kind, request(**body))
+    new_key = main_module.generation_cache_key(kind, request(**body, **changed))
+
+    responses, calls = generate(path, body, body, {**body, **changed})
+
+    assert [r["metadata"]["cache"] for r in responses] == ["miss", "hit", "miss"]
+    assert calls == [kind, kind]
+    cache = main_module.generate_cache.backend
+    assert cache.get(old_key) is None
+    assert cache.get(new_key) is not None
@@ -0,0 +1,127 @@
+import asyncio
+import sqlite3
+
+import pytest
+from fastapi import HTTPException
+
+import job_queue
+from job_queue import FAILED, PRIORITIES, QUEUED, RUNNING, SUCCEEDED, JobQueue, JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    yield store
+    store.close()
+
+
+def _submit(store, priority="interactive", dedup_key=None, params=None):
+    return store.submit("parse_cv", params or {}, None, PRIORITIES[priority], dedup_key)
+
+
+def test_claims_by_priority_then_fifo(store):
+    bulk, _ = _submit(store, "bulk")
+    first, _ = _submit(store)
+    second, _ = _submit(store)
+
+    assert [store.claim("w")["id"] for _ in range(3)] == [first, second, bulk]
+    assert store.claim("w") is None
+
+
+def test_dedup_returns_in_flight_job_and_promotes_it(store):
+    job_id, deduplicated = _submit(store, "bulk", dedup_key="cv:abc")
+    assert not deduplicated
+    assert _submit(store, "interactive", dedup_key="cv:abc") == (job_id, True)
+    assert store.get(job_id)["priority"] == PRIORITIES["interactive"]
+
+    store.claim("w")
+    assert _submit(store, dedup_key="cv:abc") == (job_id, True)
+    store.finish(job_id, "w", {"ok": True})
+    # Finished jobs are not reused
+    new_id, deduplicated = _submit(store, dedup_key="cv:abc")
+    assert new_id != job_id and not deduplicated
+
+
+def test_expired_lease_is_claimed_again_until_max_attempts(store, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_LEASE_SECONDS", -1)
+    monkeypatch.setattr(job_queue, "JOB_MAX_ATTEMPTS", 2)
+    job_id, _ = _submit(store)
+
+    assert store.claim("crashed")["id"] == job_id
+    assert store.claim("other")["id"] == job_id
+    assert store.get(job_id)["attempts"] == 2
+    # A third expiry gives up instead of looping
+    assert store.claim("other") is None
+    job = store.get(job_id)
+    assert job["status"] == FAILED and job["status_code"] == 500
+
+
+def test_release_requeues_only_this_workers_jobs(store):
+    mine, _ = _submit(store)
+    theirs, _ = _submit(store)
+    store.claim("me")
+    store.claim("them")
+
+    assert store.release("me") == 1
+    assert store.get(mine)["status"] == QUEUED and store.get(mine)["attempts"] == 0
+    assert store.get(theirs)["status"] == RUNNING
+
+
+def test_finish_by_another_worker_is_ignored(store):
+    job_id, _ = _submit(store)
+    store.claim("owner")
+    store.finish(job_id, "stale", {"ok": False})
+    store.finish(job_id, "owner", {"ok": True})
+    job = store.get(job_id)
+    assert job["status"] == SUCCEEDED and job["result"] == {"ok": True}
+
+
+def test_bad_priority_is_422(store):
+    async def run():
+        queue = JobQueue(store)
+        queue.register("parse_cv", lambda params, data: None)
+        await queue.submit("parse_cv", {}, priority="urgent")
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(run())
+    assert exc.value.status_code == 422
+
+
+def test_worker_survives_store_errors(store, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_POLL_INTERVAL", 0.01)
+    claim, finish = store.claim, store.finish
+    failures = {"claim": 1, "finish": 1}
+
+    def flaky(name, fn):
+        def call(*args):
+            if failures[name]:
+                failures[name] -= 1
+                raise sqlite3.OperationalError("database is locked")
+            return fn(*args)
+        return call
+
+    monkeypatch.setattr(store, "claim", flaky("claim", claim))
+    monkeypatch.setattr(store, "finish", flaky("finish", finish))
+    # The job whose finish failed comes back once its lease expires
+    monkeypatch.setattr(job_queue, "JOB_LEASE_SECONDS", 0.05)
+
+    async def handler(params, data):
+        return {"n": params["n"]}
+
+    async def run():
+        queue = JobQueue(store, workers=1)
+        queue.register("parse_cv", handler)
+        queue.start()
+        try:
+            job_id, _ = await queue.submit("parse_cv", {"n": 1})
+            for _ in range(200):
+                job = await queue.get(job_id)
+                if job["status"] == SUCCEEDED:
+                    return job
+                await asyncio.sleep(0.01)
+        finally:
+            await queue.stop()
+
+    job = asyncio.run(run())
+    assert job is not None and job["result"] == {"n": 1} and job["attempts"] == 2
+    assert failures == {"claim": 0, "finish": 0}
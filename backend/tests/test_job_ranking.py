@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+from job_ranking import local_relevance, prefilter_jobs, rank_jobs
+
+_CV = SimpleNamespace(education="Cử nhân CNTT", university="Đại học Bách Khoa", experience="Backend Python, FastAPI, PostgreSQL", skills=["Python", "FastAPI", "PostgreSQL"], summary=None)
+_CV_TEXT = "Backend developer: Python, FastAPI, PostgreSQL, Docker"
+
+
+def _job(job_id, title, requirements=""):
+    return SimpleNamespace(id=job_id, title=title, requirements=requirements, mandatory_requirements=None, description=None)
+
+
+_JOBS = [
+    _job("chef", "Bếp trưởng", "Nấu ăn, quản lý bếp"),
+    _job("py", "Python Backend Developer", "Python, FastAPI, PostgreSQL"),
+    _job("docker", "DevOps Engineer", "Docker, Kubernetes"),
+    _job("sales", "Sales Executive", "Bán hàng, chăm sóc khách hàng"),
+    _job("java", "Java Developer", "Java, Spring"),
+]
+
+
+def test_rank_jobs_puts_relevant_jobs_first():
+    ranked = rank_jobs(_JOBS, _CV, _CV_TEXT)
+    assert [job.id for job, _ in ranked[:2]] == ["py", "docker"]
+    assert local_relevance(_JOBS, _CV, _CV_TEXT)["py"] == 1.0
+
+
+def test_top_k_shortlist_and_pre_screened_entries():
+    shortlist, pre_screened = prefilter_jobs(_JOBS, _CV, _CV_TEXT, top_k=2)
+
+    assert [job.id for job in shortlist] == ["py", "docker"]
+    assert len(pre_screened) == 3 and {entry["job_id"] for entry in pre_screened} == {"chef", "sales", "java"}
+    for entry in pre_screened:
+        # Not on the AI's 0-100 scale, so it cannot outrank an AI-scored job
+        assert entry["match_score"] is None
+        assert entry["pre_screened"] is True
+        assert 0 <= entry["prefilter_score"] < 100
+        assert set(entry) >= {"job_title", "local_score", "strengths", "weaknesses", "recommendation"}
+    scores = [entry["prefilter_score"] for entry in pre_screened]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_primary_job_is_always_shortlisted():
+    shortlist, pre_screened = prefilter_jobs(_JOBS, _CV, _CV_TEXT, top_k=2, primary_job_id="chef")
+
+    assert [job.id for job in shortlist] == ["py", "chef"]
+    assert [entry["job_id"] for entry in pre_screened][0] == "docker"
+    assert "chef" not in {entry["job_id"] for entry in pre_screened}
+
+
+def test_no_prefilter_when_jobs_fit_or_disabled():
+    assert prefilter_jobs(_JOBS, _CV, _CV_TEXT, top_k=5) == (_JOBS, [])
+    assert prefilter_jobs(_JOBS, _CV, _CV_TEXT, top_k=0) == (_JOBS, [])
@@ -0,0 +1,23 @@
+import logging
+
+from log_config import JSONFormatter, TextFormatter, redact
+
+
+def _record(msg: str, **extra) -> logging.LogRecord:
+    record = logging.LogRecord("cv_api", logging.INFO, __file__, 1, msg, (), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_redacts_pii_keys_and_inline_contacts():
+    assert redact({"email": "a@b.com", "file_name": "CV - Võ Huỳnh Thái Bảo.pdf", "chars": 10}) == {
+        "email": "[redacted]", "file_name": "[redacted]", "chars": 10
+    }
+    assert redact("call 0912 345 678 or mail a.b@example.com") == "call [redacted] or mail [redacted]"
+
+
+def test_formatters_redact_file_names():
+    record = _record("📄 CV parsing start", file_name="CV - Nguyễn Văn A.pdf", file_type=".pdf")
+    assert "Nguyễn" not in JSONFormatter(redact_pii=True).format(record)
+    assert "Nguyễn" not in TextFormatter(redact_pii=True).format(record)
+    assert "Nguyễn" in TextFormatter(redact_pii=False).format(record)
@@ -0,0 +1,84 @@
+from datetime import date
+from types import SimpleNamespace
+
+from mandatory_check import FAIL, NONE, PASS, UNVERIFIED, check_mandatory_requirements
+
+TODAY = date(2026, 10, 1)
+
+
+def cv(**fields):
+    return SimpleNamespace(**{"education": "", "university": "", "experience": "", "skills": [], **fields})
+
+
+def check(requirements, cv_data, cv_text=""):
+    return check_mandatory_requirements(requirements, cv_data, cv_text, today=TODAY)
+
+
+def test_no_requirements():
+    assert check("", cv()).status == NONE
+    assert check(None, cv()).status == NONE
+
+
+def test_node_js_does_not_require_javascript():
+    result = check("Node.js required", cv(skills=["Node.js"]))
+    assert result.status == PASS
+    assert result.checks[0].keywords == ["Node.js"]
+
+
+def test_skill_evidence_points_at_the_original_text():
+    result = check("Python", cv(), cv_text="Kỹ năng: Python, Docker")
+    assert result.status == PASS
+    assert result.checks[0].evidence[0].text == "Python"
+
+
+def test_missing_skill_fails():
+    result = check("Java", cv(skills=["JavaScript"]))
+    assert result.status == FAIL
+    assert result.failed[0].missing == ["Java"]
+    assert not result.decisive_fail
+
+
+def test_any_of_clause():
+    assert check("Python hoặc Java", cv(skills=["Java"])).status == PASS
+    assert check("Python, Java", cv(skills=["Java"])).status == FAIL
+
+
+def test_degree_is_strict_and_decisive():
+    result = check("Tốt nghiệp Cử nhân", cv(education="Đại học Bách Khoa"))
+    assert result.status == FAIL
+    assert result.decisive_fail
+    assert check("Tốt nghiệp Cử nhân", cv(education="Cử nhân CNTT")).status == PASS
+
+
+def test_years_of_experience_from_date_ranges():
+    experience = "Backend Developer tại FPT (01/2020 - 12/2023)"
+    assert check("Tối thiểu 3 năm kinh nghiệm", cv(experience=experience)).status == PASS
+    result = check("Tối thiểu 5 năm kinh nghiệm", cv(experience=experience))
+    assert result.status == FAIL
+    assert result.decisive_fail
+
+
+def test_unrecognised_clause_is_unverified():
+    assert check("Có tinh thần trách nhiệm", cv()).status == UNVERIFIED
+
+
+def test_local_check_is_off_by_default(main_module, monkeypatch):
+    monkeypatch.delenv("MATCH_LOCAL_MANDATORY_CHECK", raising=False)
+    assert main_module.MATCH_LOCAL_MANDATORY_CHECK is False
+
+
+def test_verdict_caps_only_a_decisive_fail(main_module):
+    apply = main_module.apply_mandatory_verdict
+
+    degree = apply({"match_score": 82, "weaknesses": []}, check("Tốt nghiệp Cử nhân", cv(education="Đại học Bách Khoa")))
+    assert degree["match_score"] == 50
+    assert degree["mandatory_check"]["status"] == FAIL
+    assert "Cử nhân" in degree["weaknesses"][0]
+
+    skill = apply({"match_score": 82, "weaknesses": []}, check("Java", cv(skills=["JavaScript"])))
+    assert skill["match_score"] == 82
+    assert skill["weaknesses"] == []
+    assert skill["mandatory_check"]["status"] == FAIL
+
+    untouched = apply({"match_score": 82}, check("", cv()))
+    assert untouched == {"match_score": 82}
@@ -0,0 +1,61 @@
+import asyncio
+import json
+import re
+
+import pytest
+from fastapi import HTTPException
+
+
+def _fake_route(replies, calls):
+    """Stands in for call_model_route: answers per job id (a score, or an exception to raise)."""
+    async def call_model_route(route, messages, output_model=None):
+        job_id = re.search(r"^ID: (\S+)$", messages[-1]["content"], re.MULTILINE).group(1)
+        calls.append(job_id)
+        reply = replies[job_id]
+        if isinstance(reply, BaseException):
+            raise reply
+        # Echoed ids/titles are overwritten by the caller
+        content = {"job_id": "echo", "job_title": "echo", "match_score": reply, "strengths": ["Python"], "weaknesses": [], "recommendation": "ok"}
+        return {"choices": [{"message": {"content": json.dumps(content)}}]}, f"model-{reply % 2}"
+
+    return call_model_route
+
+
+@pytest.fixture
+def fan_out(main_module, monkeypatch):
+    def run(replies):
+        calls = []
+        monkeypatch.setattr(main_module, "call_model_route", _fake_route(replies, calls))
+        jobs = [main_module.JobData(id=job_id, title=f"Job {job_id}") for job_id in replies]
+        return asyncio.run(main_module.score_jobs_fan_out("CV", jobs, "b")), calls
+
+    return run
+
+
+def test_results_are_merged_in_job_order(fan_out):
+    (analysis, models), calls = fan_out({"a": 40, "b": 91, "c": 72})
+
+    assert sorted(calls) == ["a", "b", "c"]
+    assert [(m["job_id"], m["job_title"], m["match_score"]) for m in analysis["all_matches"]] == [
+        ("a", "Job a", 40), ("b", "Job b", 91), ("c", "Job c", 72)
+    ]
+    assert analysis["best_match"]["job_id"] == "b"
+    assert models == "model-0,model-1"
+
+
+def test_a_failed_job_only_degrades_its_own_entry(fan_out):
+    (analysis, models), _ = fan_out({"a": 40, "b": HTTPException(status_code=502, detail="upstream down"), "c": 72})
+
+    failed = analysis["all_matches"][1]
+    assert failed["job_id"] == "b" and failed["match_score"] == 0
+    assert failed["error"] == "upstream down"
+    assert analysis["best_match"]["job_id"] == "c"
+    assert models == "model-0"
+
+
+def test_first_error_is_raised_only_when_every_job_fails(fan_out):
+    first, second = HTTPException(status_code=504, detail="timeout"), RuntimeError("boom")
+
+    with pytest.raises(HTTPException) as exc:
+        fan_out({"a": first, "b": second})
+    assert exc.value is first
@@ -0,0 +1,97 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from metrics import CONTENT_TYPE, REQUEST_DURATION, STAGE_DURATION, MetricsMiddleware, Registry, stage_timer
+
+
+def _samples(text, name):
+    return [line for line in text.splitlines() if line.startswith(name)]
+
+
+def test_counter_and_histogram_exposition():
+    registry = Registry()
+    counter = registry.counter("app_calls_total", "Calls by outcome", ("model", "outcome"))
+    histogram = registry.histogram("app_seconds", "Latency", ("stage",), buckets=(0.1, 1.0))
+    counter.inc(model="a", outcome="ok")
+    counter.inc(2, model="a", outcome="ok")
+    histogram.observe(0.05, stage="llm")
+    histogram.observe(0.5, stage="llm")
+    histogram.observe(3, stage="llm")
+
+    assert registry.render() == "\n".join([
+        "# HELP app_calls_total Calls by outcome",
+        "# TYPE app_calls_total counter",
+        'app_calls_total{model="a",outcome="ok"} 3',
+        "# HELP app_seconds Latency",
+        "# TYPE app_seconds histogram",
+        'app_seconds_bucket{stage="llm",le="0.1"} 1',
+        'app_seconds_bucket{stage="llm",le="1"} 2',
+        'app_seconds_bucket{stage="llm",le="+Inf"} 3',
+        'app_seconds_sum{stage="llm"} 3.55',
+        'app_seconds_count{stage="llm"} 3',
+    ]) + "\n"
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    counter = registry.counter("app_errors_total", "Errors", ("reason",))
+    counter.inc(reason='bad "quote" \\ and\nnewline')
+
+    assert _samples(registry.render(), "app_errors_total{") == [
+        'app_errors_total{reason="bad \\"quote\\" \\\\ and\\nnewline"} 1'
+    ]
+
+
+def test_middleware_labels_requests_and_times_streamed_bodies():
+    app = FastAPI()
+
+    @app.get("/work")
+    async def work():
+        with stage_timer("prompt_build", "test-model"):
+            pass
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def body():
+            yield b"a"
+            await asyncio.sleep(0.05)
+            yield b"b"
+        return StreamingResponse(body())
+
+    app.add_middleware(MetricsMiddleware, known_paths=lambda: {route.path for route in app.routes})
+    client = TestClient(app)
+
+    assert client.get("/work").status_code == 200
+    assert client.get("/stream").text == "ab"
+    assert client.get("/wp-login.php").status_code == 404
+
+    text = "\n".join(REQUEST_DURATION.render() + STAGE_DURATION.render())
+    assert 'cv_request_duration_seconds_count{endpoint="/work",method="GET",status="200"} 1' in text
+    assert 'cv_request_duration_seconds_count{endpoint="/stream",method="GET",status="200"} 1' in text
+    # Timed until the last chunk, not just the response headers
+    (stream_sum,) = _samples(text, 'cv_request_duration_seconds_sum{endpoint="/stream"')
+    assert float(stream_sum.split()[-1]) >= 0.05
+    # Unknown paths share one label
+    assert _samples(text, 'cv_request_duration_seconds_count{endpoint="other",method="GET",status="404"}')
+    assert "wp-login" not in text
+    assert 'cv_stage_duration_seconds_count{stage="prompt_build",endpoint="/work",model="test-model"} 1' in text
+
+
+def test_metrics_endpoint_renders_the_registry(main_module):
+    client = TestClient(main_module.app)
+    client.get("/health")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == CONTENT_TYPE
+    text = response.text
+    assert "# HELP cv_request_duration_seconds Total request time, including streamed bodies" in text
+    assert "# TYPE cv_request_duration_seconds histogram" in text
+    assert "# TYPE cv_llm_requests_total counter" in text
+    health = _samples(text, 'cv_request_duration_seconds_bucket{endpoint="/health",method="GET",status="200",le="+Inf"}')
+    assert len(health) == 1 and int(health[0].split()[-1]) >= 1
+    assert _samples(text, 'cv_request_duration_seconds_sum{endpoint="/health"')
@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from model_routing import FALLBACK_STATUSES, ModelRoute
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def _route(**kwargs):
+    return ModelRoute("test", ["primary", "fallback"], 0.0, 100, **kwargs)
+
+
+@pytest.fixture
+def upstream(main_module, monkeypatch):
+    """Stubbed OpenRouter: per model, a reply, an exception, or a delay before replying."""
+    calls = []
+
+    def install(behaviour):
+        async def call_openrouter_api(messages, model, temperature, max_tokens, timeout=None, deadline=None, response_format=None):
+            calls.append((model, timeout, deadline))
+            outcome = behaviour[model]
+            if isinstance(outcome, BaseException):
+                raise outcome
+            if isinstance(outcome, float):
+                await asyncio.sleep(outcome)
+            return {"model": model}
+
+        monkeypatch.setattr(main_module, "call_openrouter_api", call_openrouter_api)
+        return calls
+
+    return install
+
+
+@pytest.mark.parametrize("status", sorted(FALLBACK_STATUSES))
+def test_fallback_status_moves_to_the_next_model(main_module, upstream, status):
+    calls = upstream({"primary": HTTPException(status_code=status, detail="x"), "fallback": {}})
+
+    result, model = asyncio.run(main_module.call_model_route(_route(latency_budget=5), MESSAGES))
+
+    assert model == "fallback" and result == {"model": "fallback"}
+    assert [call[0] for call in calls] == ["primary", "fallback"]
+
+
+def test_other_errors_do_not_fall_back(main_module, upstream):
+    calls = upstream({"primary": HTTPException(status_code=400, detail="bad request"), "fallback": {}})
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(main_module.call_model_route(_route(latency_budget=5), MESSAGES))
+    assert exc.value.status_code == 400
+    assert len(calls) == 1
+
+
+def test_latency_budget_ends_the_attempt_and_the_fallback_gets_the_rest(main_module, upstream):
+    calls = upstream({"primary": 5.0, "fallback": {}})
+
+    started = time.monotonic()
+    _, model = asyncio.run(main_module.call_model_route(_route(latency_budget=0.1, deadline=2), MESSAGES))
+
+    assert model == "fallback"
+    assert time.monotonic() - started < 1
+    (_, primary_timeout, _), (_, fallback_timeout, fallback_deadline) = calls
+    assert primary_timeout == 0.1
+    # What the primary left of the route's deadline, not a fresh default
+    assert 1.8 < fallback_timeout < 1.95 and fallback_deadline == fallback_timeout
+
+
+def test_route_deadline_ends_the_last_model(main_module, upstream):
+    upstream({"primary": 5.0, "fallback": 5.0})
+
+    started = time.monotonic()
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(main_module.call_model_route(_route(latency_budget=0.1, deadline=0.3), MESSAGES))
+    assert exc.value.status_code == 504
+    assert time.monotonic() - started < 1
+
+
+def test_stream_falls_back_when_the_first_delta_is_late(main_module, monkeypatch):
+    async def stream_openrouter_api(messages, model, temperature, max_tokens, timeout=None, deadline=None, response_format=None):
+        if model == "primary":
+            await asyncio.sleep(5)
+        for delta in ("a", "b"):
+            yield delta
+
+    monkeypatch.setattr(main_module, "stream_openrouter_api", stream_openrouter_api)
+
+    async def collect():
+        return [item async for item in main_module.stream_model_route(_route(latency_budget=0.1, deadline=2), MESSAGES)]
+
+    assert asyncio.run(collect()) == [("fallback", "a"), ("fallback", "b")]
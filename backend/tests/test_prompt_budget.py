@@ -0,0 +1,87 @@
+from typing import Optional
+
+import pytest
+from pydantic import BaseModel
+
+import token_count
+from prompt_budget import MIN_FIELD_TOKENS, OMITTED, fit_jobs
+from token_count import count_tokens, tokenizer_name, truncate_tokens
+
+
+@pytest.fixture
+def estimate(monkeypatch):
+    """Force the no-tiktoken fallback."""
+    monkeypatch.setattr(token_count, "tiktoken", None)
+    token_count._encoding.cache_clear()
+    yield
+    token_count._encoding.cache_clear()
+
+
+class Job(BaseModel):
+    id: str
+    title: str
+    location: Optional[str] = None
+    work_location: Optional[str] = None
+    description: Optional[str] = None
+    requirements: Optional[str] = None
+    benefits: Optional[str] = None
+    mandatory_requirements: Optional[str] = None
+
+
+def _render(index, job):
+    return "\n".join(f"{name}: {value}" for name, value in job.model_dump().items() if value)
+
+
+def _words(n, word="word"):
+    return " ".join([word] * n)
+
+
+def test_estimate_fallback(estimate):
+    assert tokenizer_name() == "estimate"
+    assert count_tokens(None) == count_tokens("") == 0
+    # Words cost ceil(bytes / 4), a single space between them nothing
+    assert count_tokens("hello world") == 4
+    assert count_tokens("a\n\nb") == 4
+    # Accented Vietnamese costs more bytes, so more tokens than its ASCII form
+    assert count_tokens("Kỹ năng lập trình") > count_tokens("Ky nang lap trinh")
+
+
+def test_truncate_tokens(estimate):
+    text = _words(200)
+    cut = truncate_tokens(text, 50)
+    assert cut.endswith("…") and count_tokens(cut) <= 50
+    assert truncate_tokens("short", 50) == "short"
+
+
+def test_jobs_within_budget_are_untouched(estimate):
+    jobs = [Job(id="1", title="Dev", benefits=_words(50))]
+    fitted, trims = fit_jobs(jobs, _render, 10_000)
+    assert fitted == jobs and trims == []
+
+
+def test_benefits_are_dropped_before_descriptions_are_shortened(estimate):
+    jobs = [
+        Job(id=str(i), title="Backend Developer", description=_words(300), requirements=_words(100), benefits=_words(200), mandatory_requirements="3 năm Python")
+        for i in range(3)
+    ]
+    full = sum(count_tokens(_render(i, job)) for i, job in enumerate(jobs))
+    # Dropping every benefits block is not enough; descriptions have to give some too
+    available = full - 3 * 200 - 300
+
+    fitted, trims = fit_jobs(jobs, _render, available)
+
+    assert sum(count_tokens(_render(i, job)) for i, job in enumerate(fitted)) <= available
+    assert [trim.field for trim in trims][:3] == ["benefits"] * 3
+    assert {trim.field for trim in trims} == {"benefits", "description"}
+    for job in fitted:
+        assert job.benefits == OMITTED
+        assert job.title == "Backend Developer" and job.mandatory_requirements == "3 năm Python"
+        assert job.requirements == _words(100)
+        assert MIN_FIELD_TOKENS <= count_tokens(job.description) < 300
+
+
+def test_budget_that_cannot_be_met_keeps_minimum_fields(estimate):
+    jobs = [Job(id="1", title="Dev", description=_words(300), requirements=_words(300))]
+    fitted, trims = fit_jobs(jobs, _render, 1)
+    assert {trim.field for trim in trims} == {"description", "requirements"}
+    assert count_tokens(fitted[0].description) <= MIN_FIELD_TOKENS
@@ -0,0 +1,76 @@
+import os
+import re
+
+import pytest
+
+from prompt_templates import compact_text
+from prompts import COMPACT_PROMPTS, FULL_PROMPTS
+
+# Rendered by the f-string builders in main.py from before the move to templates, with these values
+GOLDEN_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "prompts_full")
+MARKERS = ("✅", "❌", "⚠️")
+
+VALUES = {
+    "cv_text": "Nguyễn Văn An\nBackend Developer\nPython, Django, PostgreSQL\nĐại học Bách Khoa Hà Nội - Cử nhân CNTT",
+    "full_name": "Nguyễn Văn An",
+    "email": "an.nguyen@example.com",
+    "phone_number": "0912 345 678",
+    "address": "Hà Nội",
+    "university": "Đại học Bách Khoa Hà Nội",
+    "education": "Cử nhân Công nghệ Thông tin (2016 - 2020)",
+    "experience": "Backend Developer tại FPT (01/2020 - 12/2023)",
+    "cv_text_label": "CV FULL TEXT (3500 ký tự đầu - dùng để tìm bằng chứng bổ sung)",
+    "excerpt": "Nguyễn Văn An\nBackend Developer\nPython, Django, PostgreSQL",
+    "idx": 1,
+    "title": "Python Developer",
+    "primary_marker": "⭐ PRIMARY (Ứng viên đã apply)",
+    "job_id": "job-42",
+    "level": "Senior",
+    "department": "Engineering",
+    "job_type": "Full-time",
+    "work_location": "Hybrid",
+    "location": "Hà Nội",
+    "description": "Phát triển API cho hệ thống tuyển dụng",
+    "requirements": "Python, Django, 3 năm kinh nghiệm",
+    "mandatory_requirements": "Tốt nghiệp Cử nhân",
+    "benefits": "Lương tháng 13, bảo hiểm",
+    "cv_context": "\n📋 ỨNG VIÊN PROFILE\nHọ tên: Nguyễn Văn An\n",
+    "jobs_text": "\nJOB #1: Python Developer\n",
+    "job_text": "\nJOB #1: Python Developer\n",
+    "job_count": 3,
+}
+
+
+def _golden(name):
+    with open(os.path.join(GOLDEN_DIR, f"{name}.txt"), "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("name", sorted(FULL_PROMPTS.templates))
+def test_full_template_renders_the_baseline_prompt_byte_for_byte(name):
+    template = FULL_PROMPTS[name]
+    rendered = template.render(**{key: VALUES[key] for key in template.placeholders})
+    assert rendered.encode("utf-8") == _golden(name)
+
+
+def _pairs():
+    """(full source, compact source) per prompt; parse_cv moves its guidelines into the system message."""
+    full, compact = FULL_PROMPTS.templates, COMPACT_PROMPTS.templates
+    parse = ("parse_cv_system", "parse_cv_user")
+    yield "parse_cv", *("\n".join(prompts[name].source for name in parse) for prompts in (full, compact))
+    for name in full:
+        if name not in parse:
+            yield name, full[name].source, compact[name].source
+
+
+@pytest.mark.parametrize("name,full,compact", list(_pairs()))
+def test_compact_keeps_placeholders_and_markers(name, full, compact):
+    placeholders = re.compile(r"\$\{?(\w+)")
+    assert sorted(placeholders.findall(compact)) == sorted(placeholders.findall(full))
+
+    assert compact.count("✅") == full.count("✅")
+    assert compact.count("❌") == full.count("❌")
+    # Every line carrying a marker keeps it; only repeated or standalone ⚠️ are dropped
+    for line in full.splitlines():
+        if any(marker in line for marker in MARKERS) and line.strip() not in MARKERS:
+            assert compact_text(line).strip() in compact
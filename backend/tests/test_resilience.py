@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import pytest
+
+from resilience import CircuitBreaker, CircuitOpenError, TokenBucket
+
+
+def test_breaker_opens_after_threshold_and_probes_once():
+    breaker = CircuitBreaker("model", threshold=3, reset_timeout=0.05)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError) as exc:
+        breaker.before_call()
+    assert exc.value.model == "model" and exc.value.retry_after >= 1
+
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    breaker.before_call()
+    # Only one probe at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_failed_probe_reopens_immediately():
+    breaker = CircuitBreaker("model", threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_released_probe_can_be_retried():
+    breaker = CircuitBreaker("model", threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    breaker.before_call()
+    breaker.release_probe()
+    breaker.before_call()
+
+
+def test_bucket_allows_burst_then_refills():
+    bucket = TokenBucket(rate=20, burst=2)
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    time.sleep(0.06)
+    assert bucket.try_acquire()
+
+
+def test_bucket_acquire_waits_for_a_token():
+    async def run():
+        bucket = TokenBucket(rate=20, burst=1)
+        start = time.monotonic()
+        for _ in range(3):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    # Two refills at 20/s
+    assert 0.08 <= asyncio.run(run()) < 0.5
+
+
+def test_zero_rate_disables_the_limiter():
+    bucket = TokenBucket(rate=0, burst=1)
+    assert all(bucket.try_acquire() for _ in range(100))
+    asyncio.run(bucket.acquire())
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"skills": ["Python"]}
+
+    async def run():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("cv", work) for _ in range(5)))
+        return flight, results
+
+    flight, results = asyncio.run(run())
+    assert len(calls) == 1
+    assert [shared for _, shared in results] == [False, True, True, True, True]
+    assert flight.shared == 4 and len(flight) == 0
+    # Shared results are copies, so one caller cannot mutate another's
+    results[1][0]["skills"].append("Go")
+    assert results[0][0]["skills"] == ["Python"]
+
+
+def test_different_keys_run_separately_and_errors_reach_every_caller():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def run():
+        flight = SingleFlight()
+        outcomes = await asyncio.gather(flight.do("a", fail), flight.do("a", fail), flight.do("b", fail), return_exceptions=True)
+        return flight, outcomes
+
+    flight, outcomes = asyncio.run(run())
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert flight.shared == 1 and len(flight) == 0
+
+
+def test_work_survives_one_caller_leaving_and_stops_when_all_leave():
+    finished = []
+
+    async def work():
+        await asyncio.sleep(0.1)
+        finished.append(1)
+        return "done"
+
+    async def run():
+        flight = SingleFlight()
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == ("done", True)
+
+        third = asyncio.ensure_future(flight.do("k2", work))
+        await asyncio.sleep(0.01)
+        third.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await third
+        await asyncio.sleep(0.15)
+        return flight
+
+    flight = asyncio.run(run())
+    # The second key's work was cancelled with its only caller
+    assert finished == [1] and len(flight) == 0
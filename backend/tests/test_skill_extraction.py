@@ -0,0 +1,39 @@
+import pytest
+
+from skill_extraction import AhoCorasick, SkillOntology
+
+
+@pytest.fixture(scope="module")
+def ontology():
+    return SkillOntology.load()
+
+
+def test_automaton_reports_every_overlapping_match():
+    automaton = AhoCorasick([(("a", "b"), 1), (("b",), 2), (("b", "c", "d"), 3)])
+    assert automaton.search(["a", "b", "c", "d", "x", "b"]) == [(1, 0, 2), (2, 1, 2), (3, 1, 4), (2, 5, 6)]
+    # A token outside the patterns breaks a match
+    assert automaton.search(["a", "x", "b"]) == [(2, 2, 3)]
+    assert automaton.search([]) == []
+
+
+def test_extract_canonical_skills_in_order(ontology):
+    text = "Dùng JavaScript, Node.js và React Native; biết Java, ReactJS, c++, C#, .NET, CI/CD, Docker"
+    assert ontology.extract(text) == ["JavaScript", "Node.js", "React Native", "Java", "React", "C++", "C#", ".NET", "CI/CD", "Docker"]
+
+
+@pytest.mark.parametrize("text, absent", [
+    ("javascript developer", "Java"),
+    ("react.js frontend", "React Native"),
+])
+def test_matches_stay_on_word_boundaries(ontology, text, absent):
+    assert absent not in ontology.extract(text)
+
+
+def test_find_returns_spans_in_the_original_text(ontology):
+    text = "Kỹ năng: Python, Docker"
+    matches = ontology.find(text)
+    assert [(m.name, text[m.start:m.end]) for m in matches] == [("Python", "Python"), ("Docker", "Docker")]
+
+
+def test_normalize_canonicalises_and_dedupes(ontology):
+    assert ontology.normalize(["reactjs", "React", "Vẽ tranh", "  ", None, "vẽ tranh"]) == ["React", "Vẽ tranh"]
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from streaming import JSONFieldStream, MarkdownFenceStripper
+
+
+def _strip(text, step):
+    stripper = MarkdownFenceStripper()
+    out = "".join(stripper.feed(text[i:i + step]) for i in range(0, len(text), step))
+    return out + stripper.finish()
+
+
+@pytest.mark.parametrize("step", [1, 3, 1000])
+@pytest.mark.parametrize("text, expected", [
+    ("```markdown\n# Q1\nWhat is `x`?\n```\n", "# Q1\nWhat is `x`?"),
+    ("  ```\n## Q2\n```", "## Q2"),
+    ("\n\n# No fence\nbody  \n", "# No fence\nbody"),
+    ("```", ""),
+])
+def test_fence_stripper_matches_whole_text_cleanup(text, expected, step):
+    assert _strip(text, step) == expected
+
+
+def test_field_stream_emits_fields_as_they_complete():
+    stream = JSONFieldStream()
+    assert stream.feed('```json\n{"description": "Build ') == []
+    assert stream.feed('APIs", "requirements": ["Py') == [("description", "Build APIs")]
+    assert stream.feed('thon"], "years": 3') == [("requirements", ["Python"])]
+    # A number is only complete once a delimiter follows it
+    assert stream.feed("}\n```") == [("years", 3)]
+    assert stream.closed
+    assert stream.fields == {"description": "Build APIs", "requirements": ["Python"], "years": 3}
+
+
+def test_field_stream_char_by_char_equals_json_loads():
+    document = {"description": "Mô tả \"công việc\"\nchi tiết", "requirements": "3+ năm", "benefits": {"bonus": [1, 2]}}
+    text = json.dumps(document, ensure_ascii=False, indent=2)
+    stream = JSONFieldStream()
+    emitted = [pair for char in text for pair in stream.feed(char)]
+    assert dict(emitted) == document
+    assert stream.closed
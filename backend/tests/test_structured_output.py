@@ -0,0 +1,50 @@
+import pytest
+
+from structured_output import MatchAnalysisOutput, PartialJSON, parse_json_tolerant, prune_incomplete
+
+_MATCH = '{"job_id": 1, "job_title": "Backend", "match_score": 70, "strengths": [], "weaknesses": [], "recommendation": "yes"}'
+
+
+def test_plain_and_fenced_json():
+    assert parse_json_tolerant('{"a": 1}') == ({"a": 1}, False)
+    assert parse_json_tolerant('Here you go:\n```json\n{"a": [1, 2], "b": "x"}\n```') == ({"a": [1, 2], "b": "x"}, False)
+    assert parse_json_tolerant('Result: {"a": {"b": "}"}} trailing prose') == ({"a": {"b": "}"}}, False)
+
+
+def test_truncated_reply_keeps_complete_values():
+    value, recovered = parse_json_tolerant('{"overall_score": 80, "all_matches": [' + _MATCH + ', {"job_id": 2, "match_sc')
+    assert recovered
+    assert value["overall_score"] == 80
+    assert value["all_matches"][0]["job_id"] == 1
+    assert value["all_matches"][1] == {"job_id": 2}
+
+
+@pytest.mark.parametrize("content", ["no json here", '{"a": "unterminated'])
+def test_unusable_reply_raises(content):
+    with pytest.raises(ValueError):
+        parse_json_tolerant(content)
+
+
+def test_partial_json_feed_matches_one_shot_parse():
+    text = '{"overall_score": 80, "all_matches": [' + _MATCH + ']}'
+    parser = PartialJSON()
+    for char in text:
+        parser.feed(char)
+    assert parser.complete
+    assert parser.value() == parse_json_tolerant(text)[0]
+
+
+def test_partial_json_value_before_any_brace():
+    parser = PartialJSON()
+    parser.feed("thinking...")
+    with pytest.raises(ValueError):
+        parser.value()
+
+
+def test_prune_incomplete_drops_entries_the_cut_went_through():
+    value, _ = parse_json_tolerant('{"overall_score": 80, "all_matches": [' + _MATCH + ', {"job_id": 2, "match_score": 5}, {"job_id": 3')
+    assert [match["job_id"] for match in prune_incomplete(value, MatchAnalysisOutput)["all_matches"]] == [1]
+
+    pruned = prune_incomplete({"overall_score": 80, "best_match": {"job_id": 1}, "all_matches": []}, MatchAnalysisOutput)
+    assert pruned == {"overall_score": 80, "all_matches": []}
+    assert prune_incomplete([1, 2], MatchAnalysisOutput) == [1, 2]
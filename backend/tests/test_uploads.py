@@ -0,0 +1,75 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI, File, UploadFile
+
+from uploads import UploadLimitMiddleware, read_cv_upload
+
+LIMIT = 256 * 1024
+
+
+def _app():
+    app = FastAPI()
+    app.add_middleware(UploadLimitMiddleware, paths=["/upload"], max_bytes=LIMIT)
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        cv = await read_cv_upload(file, max_bytes=LIMIT, spool_bytes=1024)
+        try:
+            return {"size": cv.size, "on_disk": cv.path is not None}
+        finally:
+            cv.close()
+
+    @app.post("/other")
+    async def other(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    return app
+
+
+def _multipart(size):
+    boundary = "testboundary"
+    head = f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="cv.pdf"\r\nContent-Type: application/pdf\r\n\r\n'.encode()
+    body = head + b"x" * size + f"\r\n--{boundary}--\r\n".encode()
+    return body, {"content-type": f"multipart/form-data; boundary={boundary}"}
+
+
+def _post(path, size, chunked=False):
+    body, headers = _multipart(size)
+
+    async def stream():
+        for i in range(0, len(body), 8192):
+            yield body[i:i + 8192]
+
+    async def run():
+        transport = httpx.ASGITransport(app=_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, content=stream() if chunked else body, headers=headers)
+
+    return asyncio.run(run())
+
+
+def test_small_upload_is_spooled():
+    response = _post("/upload", 4096)
+    assert response.status_code == 200
+    assert response.json() == {"size": 4096, "on_disk": True}
+
+
+def test_oversized_upload_rejected_from_content_length():
+    response = _post("/upload", 2 * LIMIT)
+    assert response.status_code == 413
+    assert "limit" in response.json()["detail"]
+
+
+def test_oversized_chunked_upload_rejected_while_streaming():
+    response = _post("/upload", 2 * LIMIT, chunked=True)
+    assert response.status_code == 413
+
+
+def test_chunked_upload_within_limit_passes():
+    response = _post("/upload", LIMIT // 2, chunked=True)
+    assert response.status_code == 200 and response.json()["size"] == LIMIT // 2
+
+
+def test_other_paths_are_not_limited():
+    assert _post("/other", 2 * LIMIT, chunked=True).status_code == 200
@@ -0,0 +1,102 @@
+import sqlite3
+import threading
+
+import pytest
+
+from vector_index import HashingEmbedder, VectorIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = VectorIndex(str(tmp_path), "cvs", HashingEmbedder(dim=256))
+    yield index
+    index.close()
+
+
+def item(i: int, skills: str):
+    return (f"cv-{i}", {"title": "Backend Developer", "skills": skills}, {"n": i})
+
+
+def test_upsert_search_delete(index):
+    index.upsert([item(1, "Python FastAPI PostgreSQL"), item(2, "React TypeScript CSS"), item(3, "Python Django")])
+    hits = index.search_fields([{"skills": "Python FastAPI"}], top_k=2)[0]
+    assert [item_id for item_id, _ in hits][0] == "cv-1"
+    assert index.get(["cv-2", "missing"]) == {"cv-2": {"n": 2}}
+
+    assert index.delete(["cv-1"]) == 1
+    assert "cv-1" not in index
+    assert all(item_id != "cv-1" for item_id, _ in index.search_fields([{"skills": "Python FastAPI"}], top_k=5)[0])
+    # The freed row is reused
+    index.upsert([item(4, "Go Kubernetes")])
+    assert index.stats()["items"] == 3
+
+
+def test_restrict_to(index):
+    index.upsert([item(i, "Python") for i in range(5)])
+    hits = index.search_fields([{"skills": "Python"}], top_k=10, restrict_to=["cv-1", "cv-3", "unknown"])[0]
+    assert sorted(item_id for item_id, _ in hits) == ["cv-1", "cv-3"]
+
+
+def test_reads_during_concurrent_writes(index):
+    errors = []
+
+    def writer():
+        try:
+            for batch in range(20):
+                index.upsert([item(batch * 50 + i, f"Python skill{i}") for i in range(50)])
+                index.delete([f"cv-{batch * 50}"])
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    def reader():
+        try:
+            for _ in range(200):
+                ids = [f"cv-{i}" for i in range(0, 1000, 7)]
+                metadata = index.get(ids)
+                assert all(value["n"] == int(key[3:]) for key, value in metadata.items())
+                index.search_fields([{"skills": "Python"}], top_k=5)
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(index) == 20 * 49
+
+
+class _FailingCommit:
+    """Connection stand-in whose COMMIT fails, e.g. a full disk."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def execute(self, sql, *args):
+        if sql == "COMMIT":
+            raise sqlite3.OperationalError("database or disk is full")
+        return self._conn.execute(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def test_failed_upsert_leaves_no_ghost_rows(index):
+    index.upsert([item(1, "Python FastAPI PostgreSQL")])
+    conn = index._conn
+    index._conn = _FailingCommit(conn)
+    with pytest.raises(sqlite3.OperationalError):
+        index.upsert([item(1, "React TypeScript CSS"), item(2, "React TypeScript CSS")])
+    index._conn = conn
+
+    assert "cv-2" not in index and len(index) == 1
+    assert index.get(["cv-1", "cv-2"]) == {"cv-1": {"n": 1}}
+    # cv-1 still carries its committed vector
+    hits = index.search_fields([{"title": "Backend Developer", "skills": "React TypeScript CSS"}], top_k=5)[0]
+    assert [item_id for item_id, _ in hits] == ["cv-1"]
+    assert hits[0][1] < index.search_fields([{"title": "Backend Developer", "skills": "Python FastAPI PostgreSQL"}], top_k=1)[0][0][1]
+
+    # The row taken for cv-2 went back to the free list and is used again
+    index.upsert([item(2, "Go")])
+    assert index.stats()["items"] == 2 and index._high == 2
@@ -0,0 +1,69 @@
+"""
+Text normalisation shared by the local (non-LLM) ranking and matching code.
+
+CVs and job posts mix Vietnamese and English, with and without diacritics, so
+everything is compared on a lower-cased, accent-free form.
+"""
+
+import re
+import unicodedata
+from typing import List, Tuple
+
+# Tokens keep tech punctuation: "c++", "c#", "node.js", "ci/cd"
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it of on or the to with will our you your we
+this that these those can must should able using use used experience years year
+va cac co cua cho voi trong la duoc nhung mot nguoi tai khi se da tu den theo ve nay do
+kinh nghiem nam yeu cau ung vien cong viec
+""".split())
+
+
+def _strip_char(ch: str) -> str:
+    ch = ch.replace("đ", "d").replace("Đ", "D")
+    return "".join(c for c in unicodedata.normalize("NFD", ch) if unicodedata.category(c) != "Mn")
+
+
+class _StripTable(dict):
+    """str.translate table filled on first sight of each character (a CV uses a few hundred)."""
+
+    def __missing__(self, code: int) -> str:
+        value = self[code] = _strip_char(chr(code))
+        return value
+
+
+_STRIP_TABLE = _StripTable()
+
+
+def strip_diacritics(text: str) -> str:
+    """'Đại học Bách Khoa' -> 'Dai hoc Bach Khoa'."""
+    if text.isascii():
+        return text
+    # Per character, so one translate() pass instead of NFD plus a category lookup per code point
+    return text.translate(_STRIP_TABLE)
+
+
+def normalize_text(text: str) -> str:
+    return strip_diacritics(text or "").lower()
+
+
+def normalize_with_offsets(text: str) -> Tuple[str, List[int]]:
+    """
+    normalize_text() plus, for every output character, its index in `text`,
+    so matches found on the normalised form can be mapped back to the original.
+    """
+    out = []
+    offsets = []
+    for i, ch in enumerate(text or ""):
+        for norm_ch in normalize_text(ch):
+            out.append(norm_ch)
+            offsets.append(i)
+    return "".join(out), offsets
+
+
+def tokenize(text: str, drop_stopwords: bool = True) -> List[str]:
+    tokens = _TOKEN_RE.findall(normalize_text(text))
+    if drop_stopwords:
+        return [t for t in tokens if t not in STOPWORDS]
+    return tokens
@@ -0,0 +1,76 @@
+"""
+Local token counting for prompt budgets.
+
+Uses tiktoken when it is available (TOKENIZER_ENCODING, o200k_base = the
+gpt-4o family); otherwise an estimate from UTF-8 bytes per word, which is
+close for English and errs high for Vietnamese and box-drawing characters.
+"""
+
+import os
+import re
+from functools import lru_cache
+from typing import Optional
+
+try:
+    import tiktoken
+except ImportError:  # optional dependency
+    tiktoken = None
+
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "o200k_base")
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]+|\s+")
+_BYTES_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception:
+        # Unknown encoding or BPE file not downloadable (offline): use the estimate
+        return None
+
+
+def tokenizer_name() -> str:
+    return f"tiktoken:{TOKENIZER_ENCODING}" if _encoding() is not None else "estimate"
+
+
+def _estimate(text: str) -> int:
+    tokens = 0
+    for piece in _PIECE_RE.findall(text):
+        if piece.isspace():
+            # Single spaces merge into the next word; newlines and indentation runs do not
+            tokens += piece.count("\n") if len(piece) > 1 or piece == "\n" else 0
+        else:
+            tokens += max(1, -(-len(piece.encode("utf-8")) // _BYTES_PER_TOKEN))
+    return tokens
+
+
+def count_tokens(text: Optional[str]) -> int:
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return _estimate(text)
+
+
+def truncate_tokens(text: str, max_tokens: int, marker: str = "…") -> str:
+    """Cut `text` to at most `max_tokens` tokens (marker included), preferring a word boundary."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    limit = max(0, max_tokens - count_tokens(marker))
+    encoding = _encoding()
+    if encoding is not None:
+        cut = encoding.decode(encoding.encode(text, disallowed_special=())[:limit])
+    else:
+        # Shrink proportionally until the estimate fits
+        cut = text
+        while cut and count_tokens(cut) > limit:
+            cut = cut[:int(len(cut) * max(0.5, limit / count_tokens(cut)))]
+    space = cut.rfind(" ")
+    if space > len(cut) * 0.8:
+        cut = cut[:space]
+    return cut.rstrip() + marker
@@ -0,0 +1,157 @@
+"""
+Bounded-memory handling of CV uploads.
+
+Starlette streams each multipart file into a SpooledTemporaryFile (in memory
+up to CV_UPLOAD_SPOOL_BYTES, on disk past it), so the upload is never held as
+one bytes object unless we read it that way. UploadLimitMiddleware answers 413
+from Content-Length before the body is read, or as soon as a chunked body
+crosses the limit. read_cv_upload() then walks the spooled file in fixed-size
+chunks, hashing as it goes: small files are kept as bytes, larger ones are
+copied to a named temp file that the extraction worker memory-maps by path,
+so neither the API process nor the worker holds a full copy.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Iterable, Optional, Union
+
+from fastapi import HTTPException, UploadFile
+
+from extraction import SpooledFile
+
+CV_UPLOAD_MAX_BYTES = int(os.getenv("CV_UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+# Uploads up to this size stay in memory, larger ones go to a temp file
+CV_UPLOAD_SPOOL_BYTES = int(os.getenv("CV_UPLOAD_SPOOL_BYTES", str(1024 * 1024)))
+CV_UPLOAD_TMP_DIR = os.getenv("CV_UPLOAD_TMP_DIR") or None
+CV_UPLOAD_CHUNK_BYTES = 64 * 1024
+
+# Room for the multipart boundaries, headers and small form fields around the file
+_FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit")
+
+
+@dataclass
+class CVUpload:
+    filename: str
+    size: int
+    # Hex SHA-256 of the file, computed while spooling
+    sha256: str
+    content: Optional[bytes] = None
+    path: Optional[str] = None
+
+    @classmethod
+    def from_bytes(cls, filename: str, content: bytes) -> "CVUpload":
+        return cls(filename, len(content), hashlib.sha256(content).hexdigest(), content=content)
+
+    @property
+    def source(self) -> Union[bytes, SpooledFile]:
+        """What the extraction worker gets: the bytes, or the temp file path to map."""
+        return SpooledFile(self.path) if self.path else self.content
+
+    def read(self) -> bytes:
+        """The whole file as bytes (only for callers that must persist it, e.g. the job queue)."""
+        if self.path is None:
+            return self.content
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def close(self) -> None:
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+
+def spool_stream(file, filename: str, max_bytes: int = CV_UPLOAD_MAX_BYTES, spool_bytes: int = CV_UPLOAD_SPOOL_BYTES) -> CVUpload:
+    """Copy a readable binary stream from its current position into a CVUpload (413 past `max_bytes`). Blocking."""
+    digest = hashlib.sha256()
+    head = bytearray()
+    out = None
+    size = 0
+    try:
+        for chunk in iter(lambda: file.read(CV_UPLOAD_CHUNK_BYTES), b""):
+            size += len(chunk)
+            if size > max_bytes:
+                raise _too_large(max_bytes)
+            digest.update(chunk)
+            if out is None and size > spool_bytes:
+                out = tempfile.NamedTemporaryFile(prefix="cv-upload-", suffix=os.path.splitext(filename)[1], dir=CV_UPLOAD_TMP_DIR, delete=False)
+                out.write(head)
+                head = None
+            if out is None:
+                head += chunk
+            else:
+                out.write(chunk)
+    except BaseException:
+        if out is not None:
+            out.close()
+            os.unlink(out.name)
+        raise
+
+    if out is None:
+        return CVUpload(filename, size, digest.hexdigest(), content=bytes(head))
+    out.close()
+    return CVUpload(filename, size, digest.hexdigest(), path=out.name)
+
+
+async def read_cv_upload(upload: UploadFile, max_bytes: int = CV_UPLOAD_MAX_BYTES, spool_bytes: int = CV_UPLOAD_SPOOL_BYTES) -> CVUpload:
+    """Spool an upload in chunks (413 past `max_bytes`); close() the result to remove its temp file."""
+    # Size Starlette counted while parsing the form; the spooling pass checks again
+    if upload.size is not None and upload.size > max_bytes:
+        raise _too_large(max_bytes)
+    await upload.seek(0)
+    return await asyncio.to_thread(spool_stream, upload.file, upload.filename, max_bytes, spool_bytes)
+
+
+class UploadLimitMiddleware:
+    """
+    Pure ASGI middleware: 413 for request bodies on `paths` larger than
+    `max_bytes` (plus form overhead), decided before the body is parsed;
+    bodies without Content-Length are counted as they stream in.
+    """
+
+    def __init__(self, app, paths: Iterable[str], max_bytes: int = CV_UPLOAD_MAX_BYTES):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.max_bytes = max_bytes
+        self.limit = max_bytes + _FORM_OVERHEAD_BYTES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        length = dict(scope.get("headers") or []).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.limit:
+            body = json.dumps({"detail": _too_large(self.max_bytes).detail}).encode()
+            # The unread body is dropped with the connection
+            await send({"type": "http.response.start", "status": 413, "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close")
+            ]})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        received = 0
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.limit:
+                    # Raised inside form parsing, so FastAPI turns it into the 413 response
+                    raise _too_large(self.max_bytes)
+            return message
+
+        await self.app(scope, counting_receive, send)
@@ -0,0 +1,341 @@
+"""
+In-process vector index for first-pass CV <-> job similarity, without the LLM.
+
+Embeddings are CPU-only and offline: the normalised, stopword-free text of each
+field is hashed into a fixed number of signed buckets (character 3-5 grams plus
+whole words, sublinear term frequency), L2-normalised, and the fields are
+combined with per-field weights. CVs and jobs land in the same space, so a job
+can be compared with stored CVs and the other way round.
+
+Each index is two files in VECTOR_INDEX_DIR:
+
+    <name>.f32       float32 matrix (capacity x dim), memory-mapped; loads with no copy
+    <name>.sqlite3   id -> row, the embedded field texts and caller metadata
+
+Rows are written and flushed before the SQLite commit that makes them visible,
+so a crash can only leave an unreferenced row behind. Deleted rows are reused.
+If the embedder settings change, stored items are re-embedded from their saved
+fields on open. One process should write an index; the app keeps one per worker.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from log_config import logger
+from text_utils import tokenize
+
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "vector_index")
+VECTOR_INDEX_DIM = int(os.getenv("VECTOR_INDEX_DIM", "1024"))
+
+# Relative weight of each field in the combined vector; fields are normalised first,
+# so a long experience section does not drown out the skills list
+FIELD_WEIGHTS: Dict[str, float] = {
+    "skills": 2.0,
+    "experience": 1.5,
+    "education": 1.0,
+    "summary": 1.0,
+    "title": 2.0,
+    "requirements": 1.5,
+    "description": 1.0,
+}
+
+_INITIAL_CAPACITY = 256
+
+
+def cv_fields(cv_data) -> Dict[str, str]:
+    return {
+        "skills": ", ".join(getattr(cv_data, "skills", None) or []),
+        "experience": cv_data.experience or "",
+        "education": " ".join(filter(None, (cv_data.education, cv_data.university))),
+        "summary": getattr(cv_data, "summary", None) or "",
+    }
+
+
+def job_fields(job) -> Dict[str, str]:
+    return {
+        "title": job.title,
+        "requirements": " ".join(filter(None, (job.requirements, job.mandatory_requirements))),
+        "description": job.description or "",
+    }
+
+
+# ==================== EMBEDDING ====================
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    """splitmix64 finaliser: spreads the rolling hash over all 64 bits."""
+    h = h ^ (h >> np.uint64(30))
+    h = h * np.uint64(0xBF58476D1CE4E5B9)
+    h = h ^ (h >> np.uint64(27))
+    h = h * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+class HashingEmbedder:
+    def __init__(self, dim: int = VECTOR_INDEX_DIM, ngram_range: Tuple[int, int] = (3, 5)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+
+    @property
+    def signature(self) -> str:
+        # Stored with the index; a different signature means the vectors must be rebuilt
+        return f"hashed-ngrams-v1:{self.dim}:{self.ngram_range[0]}-{self.ngram_range[1]}"
+
+    def _hashes(self, text: str) -> np.ndarray:
+        tokens = tokenize(text)
+        if not tokens:
+            return np.zeros(0, dtype=np.uint64)
+        padded = f" {' '.join(tokens)} "
+        codes = np.frombuffer(padded.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        parts = [np.array([zlib.crc32(token.encode("utf-8")) for token in tokens], dtype=np.uint64)]
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            count = len(codes) - n + 1
+            if count <= 0:
+                break
+            # Polynomial rolling hash over every n-gram at once (uint64 arithmetic wraps)
+            h = np.full(count, n, dtype=np.uint64)
+            for j in range(n):
+                h = h * np.uint64(1_000_003) + codes[j:j + count]
+            parts.append(h)
+        return _mix(np.concatenate(parts))
+
+    def embed_text(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        hashes = self._hashes(text or "")
+        if not len(hashes):
+            return vector
+        unique, counts = np.unique(hashes, return_counts=True)
+        weights = 1.0 + np.log(counts)
+        signs = np.where(unique >> np.uint64(63), -1.0, 1.0)
+        buckets = (unique % np.uint64(self.dim)).astype(np.intp)
+        vector += np.bincount(buckets, weights=signs * weights, minlength=self.dim).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed(self, fields: Dict[str, str]) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for name, text in fields.items():
+            if text:
+                vector += FIELD_WEIGHTS.get(name, 1.0) * self.embed_text(text)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_many(self, items: Sequence[Dict[str, str]]) -> np.ndarray:
+        matrix = np.zeros((len(items), self.dim), dtype=np.float32)
+        for i, fields in enumerate(items):
+            matrix[i] = self.embed(fields)
+        return matrix
+
+
+# ==================== INDEX ====================
+
+class VectorIndex:
+    """id -> unit vector, with batched top-K cosine search. Blocking; call from a thread."""
+
+    def __init__(self, directory: str, name: str, embedder: Optional[HashingEmbedder] = None):
+        os.makedirs(directory, exist_ok=True)
+        self.name = name
+        self.embedder = embedder or HashingEmbedder()
+        self.dim = self.embedder.dim
+        self._vectors_path = os.path.join(directory, f"{name}.f32")
+        self._lock = threading.Lock()
+        # Row is occupied (rows past the high-water mark or freed by delete are not)
+        self._valid = np.zeros(0, dtype=bool)
+        self._conn = sqlite3.connect(os.path.join(directory, f"{name}.sqlite3"), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            "id TEXT PRIMARY KEY, row INTEGER NOT NULL UNIQUE, fields TEXT NOT NULL, metadata TEXT, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._load()
+
+    # ---------- storage ----------
+
+    def _map(self, capacity: int) -> None:
+        size = capacity * self.dim * 4
+        with open(self._vectors_path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._valid = np.concatenate([self._valid, np.zeros(capacity - len(self._valid), dtype=bool)])
+
+    def _load(self) -> None:
+        row = self._conn.execute("SELECT value FROM settings WHERE key = 'embedder'").fetchone()
+        rebuild = row is not None and row[0] != self.embedder.signature
+        if rebuild or not os.path.exists(self._vectors_path):
+            open(self._vectors_path, "wb").close()
+        self._conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('embedder', ?)", (self.embedder.signature,))
+
+        rows = self._conn.execute("SELECT id, row FROM items").fetchall()
+        high = max((r for _, r in rows), default=-1) + 1
+        stored = os.path.getsize(self._vectors_path) // (self.dim * 4)
+        self._map(max(_INITIAL_CAPACITY, stored, high))
+        self._ids: Dict[int, str] = {r: item_id for item_id, r in rows}
+        self._rows: Dict[str, int] = {item_id: r for item_id, r in rows}
+        self._valid[list(self._ids)] = True
+        self._high = high
+        self._free = sorted(set(range(high)) - set(self._ids), reverse=True)
+
+        if rebuild and rows:
+            logger.warning("⚠️ Vector index embedder changed, re-embedding stored items", extra={"index": self.name, "items": len(rows)})
+            for item_id, fields in self._conn.execute("SELECT id, fields FROM items").fetchall():
+                self._vectors[self._rows[item_id]] = self.embedder.embed(json.loads(fields))
+            self._vectors.flush()
+        logger.info("🧭 Vector index loaded", extra={"index": self.name, "items": len(rows), "capacity": len(self._vectors)})
+
+    def _take_row(self) -> int:
+        if self._free:
+            return self._free.pop()
+        if self._high == len(self._vectors):
+            self._vectors.flush()
+            self._map(len(self._vectors) * 2)
+        self._high += 1
+        return self._high - 1
+
+    # ---------- writes ----------
+
+    def upsert(self, items: Sequence[Tuple[str, Dict[str, str], Optional[dict]]]) -> int:
+        """Add or replace (id, fields, metadata) items; embedding happens before the lock is taken."""
+        if not items:
+            return 0
+        matrix = self.embedder.embed_many([fields for _, fields, _ in items])
+        now = time.time()
+        with self._lock:
+            # New ids get rows here but are only published to _rows/_ids once the commit succeeds
+            new_rows: Dict[str, int] = {}
+            assigned = []
+            for item_id, _, _ in items:
+                row = self._rows.get(item_id)
+                if row is None:
+                    row = new_rows.get(item_id)
+                if row is None:
+                    row = new_rows[item_id] = self._take_row()
+                assigned.append(row)
+            replaced = sorted(set(assigned) - set(new_rows.values()))
+            previous = np.array(self._vectors[replaced])
+            self._vectors[assigned] = matrix
+            self._vectors.flush()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO items (id, row, fields, metadata, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (item_id, row, json.dumps(fields, ensure_ascii=False), json.dumps(metadata, ensure_ascii=False), now)
+                        for (item_id, fields, metadata), row in zip(items, assigned)
+                    ]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                # Back to what the database holds: old vectors, new rows free again
+                self._vectors[replaced] = previous
+                self._vectors[list(new_rows.values())] = 0.0
+                self._vectors.flush()
+                self._free = sorted(set(self._free) | set(new_rows.values()), reverse=True)
+                raise
+            for item_id, row in new_rows.items():
+                self._rows[item_id] = row
+                self._ids[row] = item_id
+            self._valid[assigned] = True
+        return len(items)
+
+    def delete(self, ids: Sequence[str]) -> int:
+        with self._lock:
+            rows = [(item_id, self._rows[item_id]) for item_id in ids if item_id in self._rows]
+            if not rows:
+                return 0
+            self._conn.executemany("DELETE FROM items WHERE id = ?", [(item_id,) for item_id, _ in rows])
+            for item_id, row in rows:
+                del self._rows[item_id]
+                del self._ids[row]
+                self._valid[row] = False
+                self._vectors[row] = 0.0
+                self._free.append(row)
+            self._free.sort(reverse=True)
+            self._vectors.flush()
+        return len(rows)
+
+    # ---------- reads ----------
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._rows
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._rows)
+
+    def vectors(self, ids: Sequence[str]) -> Dict[str, np.ndarray]:
+        """id -> copy of the stored vector, for the ids that exist."""
+        with self._lock:
+            found = [item_id for item_id in ids if item_id in self._rows]
+            matrix = np.array(self._vectors[[self._rows[item_id] for item_id in found]])
+        return dict(zip(found, matrix))
+
+    def get(self, ids: Sequence[str]) -> Dict[str, Any]:
+        """id -> stored metadata, for the ids that exist."""
+        ids = list(ids)
+        found = {}
+        # The connection is shared with the writers, which hold the lock around their transactions
+        with self._lock:
+            # Chunked: older SQLite builds allow 999 bound parameters per statement
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for item_id, metadata in self._conn.execute(f"SELECT id, metadata FROM items WHERE id IN ({placeholders})", chunk):
+                    found[item_id] = json.loads(metadata)
+        return found
+
+    def search(self, queries: np.ndarray, top_k: int = 10, restrict_to: Optional[Sequence[str]] = None) -> List[List[Tuple[str, float]]]:
+        """Top-K (id, cosine) per query row, best first; `restrict_to` limits the candidates to those ids."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        with self._lock:
+            if restrict_to is None:
+                # One (queries x rows) product over the mapped matrix, no copy; free rows are masked out
+                rows = np.arange(self._high)
+                scores = queries @ self._vectors[:self._high].T
+                scores[:, ~self._valid[:self._high]] = -np.inf
+                available = len(self._rows)
+            else:
+                rows = np.array(sorted({self._rows[i] for i in restrict_to if i in self._rows}), dtype=np.intp)
+                scores = queries @ self._vectors[rows].T
+                available = len(rows)
+            k = min(top_k, available)
+            if k <= 0:
+                return [[] for _ in range(len(queries))]
+
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            results = []
+            for q, columns in enumerate(top):
+                columns = columns[np.argsort(-scores[q, columns], kind="stable")]
+                results.append([(self._ids[int(rows[c])], float(scores[q, c])) for c in columns])
+        return results
+
+    def search_fields(self, queries: Sequence[Dict[str, str]], top_k: int = 10, restrict_to: Optional[Sequence[str]] = None) -> List[List[Tuple[str, float]]]:
+        return self.search(self.embedder.embed_many(queries), top_k, restrict_to)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "items": len(self._rows),
+                "capacity": len(self._vectors),
+                "dim": self.dim,
+                "embedder": self.embedder.signature,
+                "bytes": os.path.getsize(self._vectors_path)
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._vectors.flush()
+            self._conn.close()